@@ -0,0 +1,56 @@
+# lazy.py
+"""Deferred imports of heavy or optional dependencies (timing packages,
+astropy, pyarrow, healpy, ...), so that importing enterprise
+only pays for the packages that are actually used.
+"""
+
+import importlib
+import importlib.util
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LazyModule(object):
+    """Stand-in for the module `name`, which is imported on first access to
+    any of its attributes."""
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        if self._module is None:
+            self.__dict__["_module"] = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "imported" if self._module is not None else "not yet imported"
+        return "<lazy module '{}' ({})>".format(self._name, state)
+
+
+def lazy_import(name, warning=None):
+    """Return a `LazyModule` for the (optional) module `name`. If its
+    top-level package is not installed, log `warning` (if given) and
+    return None. Finding the package does not import it."""
+
+    try:
+        spec = importlib.util.find_spec(name.split(".")[0])
+    except (ImportError, ValueError):  # pragma: no cover
+        spec = None
+
+    if spec is None:
+        if warning is not None:
+            logger.warning(warning)  # pragma: no cover
+        return None
+
+    return LazyModule(name)
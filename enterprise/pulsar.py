@@ -2,50 +2,92 @@
 """Class containing pulsar data from timing package [tempo2/PINT].
 """
 
+import concurrent.futures
 import contextlib
+import hashlib
+import itertools
 import json
 import logging
 import os
 import pickle
 
-from pyarrow import feather
-from pyarrow import Table
+from collections.abc import Mapping
+
 from io import StringIO
 
 import numpy as np
-from ephem import Ecliptic, Equatorial
-from astropy.time import Time
 
 import enterprise
 from enterprise.signals import utils
 
-from enterprise.pulsar_inflate import PulsarInflater
+from enterprise.lazy import LazyModule, lazy_import
+from enterprise.pulsar_inflate import DeflateMixin
 
 logger = logging.getLogger(__name__)
 
-try:
-    import libstempo as t2
-except ImportError:
-    logger.warning(
-        "libstempo not installed. PINT or libstempo are required to use par and tim files."
-    )  # pragma: no cover
-    t2 = None
-
-try:
-    import pint
-    from pint.models import TimingModel, get_model_and_toas
-    from pint.residuals import Residuals as resids
-    from pint.toa import TOAs
-except ImportError:
-    logger.warning("PINT not installed. PINT or libstempo are required to use par and tim files.")  # pragma: no cover
-    pint = None
-
-try:
-    import astropy.constants as const
-    import astropy.units as u
-except ImportError:  # pragma: no cover
-    const = None
-    u = None
+# heavy dependencies are imported on first use
+pyarrow = LazyModule("pyarrow")
+feather = LazyModule("pyarrow.feather")
+pyephem = LazyModule("ephem")
+
+t2 = lazy_import("libstempo", "libstempo not installed. PINT or libstempo are required to use par and tim files.")
+
+pint = lazy_import("pint", "PINT not installed. PINT or libstempo are required to use par and tim files.")
+pint_models = lazy_import("pint.models")
+pint_residuals = lazy_import("pint.residuals")
+pint_toa = lazy_import("pint.toa")
+
+const = lazy_import("astropy.constants")
+u = lazy_import("astropy.units")
+astropy_time = lazy_import("astropy.time")
+
+
+def encode_flags(values):
+    """Dictionary-encode an array of flag values: return integer codes into the
+    (sorted) vocabulary of distinct values, and the vocabulary."""
+    vocab, codes = np.unique(values, return_inverse=True)
+    return codes.astype(np.int32).reshape(-1), vocab
+
+
+def encode_backends(flagcodes, flagvocab):
+    """Compute backend codes and vocabulary from encoded flags, using the
+    ranked ordering of `BasePulsar.backend_flags`. The work on full-length
+    arrays is integer indexing; strings are only handled in the vocabularies."""
+
+    ntoas = len(next(iter(flagcodes.values()))) if flagcodes else 0
+
+    # candidate labels are indexed by key; key 0 is the empty label
+    labels, key = [""], np.zeros(ntoas, dtype=np.int64)
+
+    if "fe" in flagcodes and "be" in flagcodes:
+        nbe = len(flagvocab["be"])
+        combo = flagcodes["fe"].astype(np.int64) * nbe + flagcodes["be"]
+
+        used = np.flatnonzero(np.bincount(combo, minlength=len(flagvocab["fe"]) * nbe))
+        lookup = np.zeros(len(flagvocab["fe"]) * nbe, dtype=np.int64)
+        lookup[used] = len(labels) + np.arange(len(used))
+
+        fe, be = flagvocab["fe"][used // nbe], flagvocab["be"][used % nbe]
+        labels.extend(a + "_" + b if (a and b) else "" for a, b in zip(fe, be))
+        key = lookup[combo]
+
+    # go through the flags in reverse order of preference
+    for flag in ["f", "i", "sys", "g", "group"]:
+        if flag in flagcodes:
+            codes, vocab = flagcodes[flag], flagvocab[flag]
+            mask = (vocab != "")[codes]
+            key[mask] = len(labels) + codes[mask]
+            labels.extend(vocab)
+
+    # merge equal labels and drop unused ones
+    labels = np.array(labels, dtype=str)
+    used = np.flatnonzero(np.bincount(key, minlength=len(labels)))
+    vocab, inverse = np.unique(labels[used], return_inverse=True)
+
+    lookup = np.zeros(len(labels), dtype=np.int32)
+    lookup[used] = inverse.reshape(-1)
+
+    return lookup[key], vocab
 
 
 def get_maxobs(timfile):
@@ -68,9 +110,64 @@ def get_maxobs(timfile):
     return maxobs
 
 
-class BasePulsar(object):
+class BasePulsar(DeflateMixin):
     """Abstract Base Class for Pulsar objects."""
 
+    # infrastructure for sharing Pulsar objects among processes:
+    # psr.deflate() will copy these numpy arrays to SharedMemory,
+    # then replace them with pickleable objects that can be inflated
+    # to numpy arrays with SharedMemory storage
+    _todeflate = [
+        "_toas",
+        "_stoas",
+        "_residuals",
+        "_toaerrs",
+        "_ssbfreqs",
+        "_designmatrix",
+        "_planetssb",
+        "_sunssb",
+        "_planetidx",
+        "_pos_t",
+        "_flagcodes",
+        "_backendcodes",
+        "_isort",
+        "_iisort",
+    ]
+
+    # per-TOA arrays, permuted together by filter_data and presorted storage
+    _toaarrays = [
+        "_toas",
+        "_stoas",
+        "_residuals",
+        "_toaerrs",
+        "_ssbfreqs",
+        "_designmatrix",
+        "_pos_t",
+        "_telescope",
+        "_flagcodes",
+        "_backendcodes",
+        "_planetidx",
+        "_planetrows",
+    ]
+
+    # with presort, the arrays are stored in time order and the
+    # properties return read-only views rather than sorted copies
+    _presort = False
+    _presorted = False
+
+    # planet and Sun ephemerides (planetssb, sunssb) are computed at construction,
+    # or on first access if planets="lazy"; they can be stored in single precision,
+    # and averaged over epochs of TOAs, which then index them through _planetidx
+    planets = True
+    _planets_dtype = np.float64
+    _planets_dt = None
+    _planetidx = None
+    _planetrows = None
+
+    # incremented whenever the TOAs or flags change, so that cached
+    # selections (see selections.Selection) are recomputed
+    _version = 0
+
     def _get_pdist(self):
         dfile = enterprise.__path__[0] + "/datafiles/pulsar_distances.json"
         with open(dfile, "r") as fl:
@@ -94,14 +191,14 @@ class BasePulsar(object):
     def _get_radec_from_ecliptic(self, elong, elat):
         # convert via pyephem
         try:
-            ec = Ecliptic(elong, elat)
+            ec = pyephem.Ecliptic(elong, elat)
 
             # check for B name
             if "B" in self.name:
                 epoch = "1950"
             else:
                 epoch = "2000"
-            eq = Equatorial(ec, epoch=str(epoch))
+            eq = pyephem.Equatorial(ec, epoch=str(epoch))
             raj = np.double(eq.ra)
             decj = np.double(eq.dec)
 
@@ -124,13 +221,113 @@ class BasePulsar(object):
             ]
         )
 
+    def _compute_ephemerides(self):
+        """Return the planet and Sun ephemerides for all the TOAs of the
+        timing-package object, in its original order."""
+        raise NotImplementedError
+
+    def _init_ephemerides(self, dtype=np.float64, dt=None, lazy=False, source=()):
+        """Compute and store the ephemerides (from the timing-package objects
+        in `source`), or defer that to first access."""
+
+        self._planets_dtype, self._planets_dt = dtype, dt
+
+        if self.planets and lazy:
+            # row of each TOA in the timing-package object, kept in step with filter_data and sorting
+            self._planetssb, self._sunssb = None, None
+            self._planetrows = np.arange(len(self._toas))
+        else:
+            self._store_ephemerides(*self._compute_ephemerides(*source))
+
+    def _load_ephemerides(self):
+        """Compute the ephemerides if they were deferred to first access."""
+
+        if self._planetrows is not None:
+            planetssb, sunssb = self._compute_ephemerides()
+            rows, self._planetrows = self._planetrows, None
+            self._store_ephemerides(planetssb[rows], sunssb[rows])
+
+    def _store_ephemerides(self, planetssb, sunssb):
+        if planetssb is None:
+            self._planetssb, self._sunssb = None, None
+            return
+
+        planetssb, sunssb = planetssb.astype(self._planets_dtype), sunssb.astype(self._planets_dtype)
+
+        if self._planets_dt is not None:
+            # TOAs within planets_dt seconds of the first TOA of an epoch share the
+            # epoch-averaged ephemerides (as in utils.create_quantization_matrix)
+            isort = np.argsort(self._toas, kind="mergesort")
+            toas = self._toas[isort]
+
+            starts = [0]
+            while True:
+                start = max(np.searchsorted(toas, toas[starts[-1]] + self._planets_dt), starts[-1] + 1)
+                if start >= len(toas):
+                    break
+                starts.append(start)
+
+            counts = np.diff(starts + [len(toas)])
+            self._planetidx = np.zeros(len(toas), dtype=np.int32)
+            self._planetidx[isort] = np.repeat(np.arange(len(starts), dtype=np.int32), counts)
+
+            shape = (-1,) + (1,) * (planetssb.ndim - 1)
+            planetssb = (np.add.reduceat(planetssb[isort], starts) / counts.reshape(shape)).astype(planetssb.dtype)
+            sunssb = (np.add.reduceat(sunssb[isort], starts) / counts[:, np.newaxis]).astype(sunssb.dtype)
+
+        self._planetssb, self._sunssb = planetssb, sunssb
+
+    def _get_ephemeris(self, attr):
+        self._load_ephemerides()
+
+        value = getattr(self, attr)
+        if value is None:
+            return None
+        elif self._planetidx is not None:
+            return value[self._sorted(self._planetidx)]
+        else:
+            return self._sorted(value)
+
+    def _permute(self, index):
+        """Index all per-TOA arrays (and flags) along their first axis."""
+
+        # epoch-averaged or deferred ephemerides are indexed through _planetidx and _planetrows
+        toaarrays = self._toaarrays
+        if self._planetidx is None and self._planetrows is None:
+            toaarrays = toaarrays + ["_planetssb", "_sunssb"]
+
+        for attr in toaarrays:
+            value = getattr(self, attr, None)
+            if isinstance(value, dict):
+                setattr(self, attr, {key: val[index] for key, val in value.items()})
+            elif value is not None:
+                setattr(self, attr, value[index])
+
+        self._version += 1
+
+    def _sorted(self, array):
+        """Return `array` in time order: a read-only view if the stored
+        arrays are presorted, a sorted copy otherwise."""
+        if self._presorted:
+            view = array.view()
+            view.flags.writeable = False
+            return view
+        else:
+            return array[self._isort]
+
     def sort_data(self):
-        """Sort data by time."""
+        """Sort data by time. If `presort` was requested, the stored arrays
+        are permuted into time order once; `isort` and `iisort` still relate
+        the sorted arrays to the original order."""
         if self._sort:
-            self._isort = np.argsort(self._toas, kind="mergesort")
-            self._iisort = np.zeros(len(self._isort), dtype=int)
-            for ii, p in enumerate(self._isort):
-                self._iisort[p] = ii
+            if not self._presorted:
+                self._isort = np.argsort(self._toas, kind="mergesort")
+                self._iisort = np.zeros(len(self._isort), dtype=int)
+                self._iisort[self._isort] = np.arange(len(self._isort))
+
+                if self._presort:
+                    self._permute(self._isort)
+                    self._presorted = True
         else:
             self._isort = slice(None, None, None)
             self._iisort = slice(None, None, None)
@@ -147,33 +344,34 @@ class BasePulsar(object):
             end_time (float, optional): End time (MJD) for filtering. If None, the max time in the dataset is used.
         """
 
+        # a custom mask is given in the original order of the TOAs
+        if mask is not None and self._presorted:
+            mask = np.asarray(mask)[self._isort]
+
         start_time = start_time * 86400 if start_time is not None else np.min(self._toas)
         end_time = end_time * 86400 if end_time is not None else np.max(self._toas)
         mask_times = np.logical_and(self._toas >= start_time, self._toas <= end_time)
         mask = np.logical_and(mask, mask_times) if mask is not None else mask_times
 
-        self._toas = self._toas[mask]
-        self._toaerrs = self._toaerrs[mask]
-        self._residuals = self._residuals[mask]
-        self._ssbfreqs = self._ssbfreqs[mask]
+        self._permute(mask)
 
-        self._designmatrix = self._designmatrix[mask, :]
         dmx_mask = np.sum(self._designmatrix, axis=0) != 0.0
         self._designmatrix = self._designmatrix[:, dmx_mask]
 
-        if isinstance(self._flags, np.ndarray):
-            self._flags = self._flags[mask]
+        if self._presorted:
+            # the remaining arrays are still sorted; renumber their original positions
+            self._iisort = np.argsort(self._isort[mask], kind="mergesort")
+            self._isort = np.zeros(len(self._iisort), dtype=int)
+            self._isort[self._iisort] = np.arange(len(self._iisort))
         else:
-            for key in self._flags:
-                self._flags[key] = self._flags[key][mask]
-
-        if self._planetssb is not None:
-            self._planetssb = self._planetssb[mask, :, :]
+            self.sort_data()
 
-        self.sort_data()
+    def deflate(self, attrs=()):  # pragma: py-lt-38
+        self._load_ephemerides()
+        super().deflate(attrs)
 
-    def to_feather(self, filename, noisedict=None):
-        FeatherPulsar.save_feather(self, filename, noisedict=noisedict)
+    def to_feather(self, filename, noisedict=None, version=2, planets=True):
+        FeatherPulsar.save_feather(self, filename, noisedict=noisedict, version=version, planets=planets)
 
     def drop_not_picklable(self):
         """Drop all attributes that cannot be pickled.
@@ -210,32 +408,32 @@ class BasePulsar(object):
     @property
     def toas(self):
         """Return array of TOAs in seconds."""
-        return self._toas[self._isort]
+        return self._sorted(self._toas)
 
     @property
     def stoas(self):
         """Return array of observatory TOAs in seconds."""
-        return self._stoas[self._isort]
+        return self._sorted(self._stoas)
 
     @property
     def residuals(self):
         """Return array of residuals in seconds."""
-        return self._residuals[self._isort]
+        return self._sorted(self._residuals)
 
     @property
     def toaerrs(self):
         """Return array of TOA errors in seconds."""
-        return self._toaerrs[self._isort]
+        return self._sorted(self._toaerrs)
 
     @property
     def freqs(self):
         """Return array of radio frequencies in MHz."""
-        return self._ssbfreqs[self._isort]
+        return self._sorted(self._ssbfreqs)
 
     @property
     def Mmat(self):
         """Return ntoa x npar design matrix."""
-        return self._designmatrix[self._isort, :]
+        return self._sorted(self._designmatrix)
 
     @property
     def pdist(self):
@@ -253,21 +451,55 @@ class BasePulsar(object):
         from parfile."""
         return self._dmx
 
+    @property
+    def _flags(self):
+        """Return a dictionary of (decoded) flags, in the stored order."""
+        return {flag: vocab[self._flagcodes[flag]] for flag, vocab in self._flagvocab.items()}
+
+    @_flags.setter
+    def _flags(self, flags):
+        # flags are stored dictionary-encoded, as integer codes into a small
+        # vocabulary of values; the backend codes are computed once here
+        flagnames = flags.dtype.names if isinstance(flags, np.ndarray) else flags.keys()
+
+        self._flagcodes, self._flagvocab = {}, {}
+        for flag in flagnames:
+            self._flagcodes[flag], self._flagvocab[flag] = encode_flags(flags[flag])
+
+        self._backendcodes, self._backendvocab = encode_backends(self._flagcodes, self._flagvocab)
+        self._version += 1
+
+    def __setstate__(self, state):
+        # encode the flags of pulsars pickled before they were stored as codes
+        flags = state.pop("_flags", None)
+        self.__dict__.update(state)
+
+        if isinstance(flags, (dict, np.ndarray)):
+            self._flags = flags
+
     @property
     def flags(self):
         """Return a dictionary of tim-file flags."""
+        return {flag: vocab[self._sorted(self._flagcodes[flag])] for flag, vocab in self._flagvocab.items()}
 
-        flagnames = self._flags.dtype.names if isinstance(self._flags, np.ndarray) else self._flags.keys()
+    @property
+    def flag_codes(self):
+        """Return a dictionary of tim-file flags as integer codes into `flag_names`."""
+        return {flag: self._sorted(codes) for flag, codes in self._flagcodes.items()}
 
-        return {flag: self._flags[flag][self._isort] for flag in flagnames}
+    @property
+    def flag_names(self):
+        """Return a dictionary of the distinct values of each tim-file flag."""
+        return {flag: vocab.tolist() for flag, vocab in self._flagvocab.items()}
 
     def set_flags(self, flagname, values):
         """Set value of existing or new flags."""
 
-        if isinstance(self._flags, np.ndarray):
-            raise NotImplementedError("Cannot set flags when stored as numpy.ndarray.")
-        else:
-            self._flags[flagname] = values[self._iisort]
+        values = np.asarray(values) if self._presorted else np.asarray(values)[self._iisort]
+        self._flagcodes[flagname], self._flagvocab[flagname] = encode_flags(values)
+
+        self._backendcodes, self._backendvocab = encode_backends(self._flagcodes, self._flagvocab)
+        self._version += 1
 
     @property
     def backend_flags(self):
@@ -278,24 +510,17 @@ class BasePulsar(object):
         for flags. The order is `group`, `g`, `sys`, `i`, `f`, `fe`+`be`.
 
         """
+        return self._backendvocab[self._sorted(self._backendcodes)]
 
-        # collect flag names
-        flagnames = self._flags.dtype.names if isinstance(self._flags, np.ndarray) else list(self._flags.keys())
-
-        # allocate array with widest dtype
-        ret = np.zeros(len(self._toas), dtype=max([self._flags[name].dtype for name in flagnames]))
-
-        # go through the flags in reverse order of preference
-        # setting or replacing values for each TOA
-
-        if "fe" in flagnames and "be" in flagnames:
-            ret[:] = [(a + "_" + b if (a and b) else "") for a, b in zip(self._flags["fe"], self._flags["be"])]
-
-        for flag in ["f", "i", "sys", "g", "group"]:
-            if flag in flagnames:
-                ret[:] = np.where(self._flags[flag] == "", ret, self._flags[flag])
+    @property
+    def backend_codes(self):
+        """Return array of backend flags as integer codes into `backend_names`."""
+        return self._sorted(self._backendcodes)
 
-        return ret[self._isort]
+    @property
+    def backend_names(self):
+        """Return list of the distinct backend flags."""
+        return self._backendvocab.tolist()
 
     @property
     def theta(self):
@@ -315,27 +540,38 @@ class BasePulsar(object):
     @property
     def pos_t(self):
         """Return unit vector from SSB to pulsar as function of time."""
-        return self._pos_t[self._isort, :]
+        return self._sorted(self._pos_t)
 
     @property
     def planetssb(self):
         """Return planetary position vectors at all timestamps"""
-        return self._planetssb[self._isort, :, :]
+        return self._get_ephemeris("_planetssb")
 
     @property
     def sunssb(self):
         """Return sun position vector at all timestamps"""
-        return self._sunssb[self._isort, :]
+        return self._get_ephemeris("_sunssb")
 
     @property
     def telescope(self):
         """Return telescope name at all timestamps"""
-        return self._telescope[self._isort]
+        return self._sorted(self._telescope)
 
 
 class PintPulsar(BasePulsar):
-    def __init__(self, toas, model, sort=True, drop_pintpsr=True, planets=True):
+    def __init__(
+        self,
+        toas,
+        model,
+        sort=True,
+        drop_pintpsr=True,
+        planets=True,
+        presort=False,
+        planets_dtype=np.float64,
+        planets_dt=None,
+    ):
         self._sort = sort
+        self._presort = presort
         self.planets = planets
         self.name = model.PSR.value
 
@@ -352,7 +588,7 @@ class PintPulsar(BasePulsar):
         self._toas = np.array(model.get_barycentric_toas(toas).value, dtype="float64") * 86400
         # saving also stoas (e.g., for DMX comparisons)
         self._stoas = np.array(toas.get_mjds().value, dtype="float64") * 86400
-        self._residuals = np.array(resids(toas, model).time_resids.to(u.s), dtype="float64")
+        self._residuals = np.array(pint_residuals.Residuals(toas, model).time_resids.to(u.s), dtype="float64")
         self._toaerrs = np.array(toas.get_errors().to(u.s), dtype="float64")
         self._designmatrix, self.fitpars, self.designmatrix_units = model.designmatrix(toas)
         self._ssbfreqs = np.array(model.barycentric_radio_freq(toas), dtype="float64")
@@ -364,29 +600,14 @@ class PintPulsar(BasePulsar):
         # set parameters
         self.setpars = [sp for sp in model.params if sp not in self.fitpars]
 
-        # FIXME: this can be done more cleanly using PINT
-        self._flags = {}
-        for ii, obsflags in enumerate(toas.get_flags()):
-            for jj, flag in enumerate(obsflags):
-                if flag not in list(self._flags.keys()):
-                    self._flags[flag] = [""] * toas.ntoas
-
-                self._flags[flag][ii] = obsflags[flag]
-
-        # convert flags to arrays
-        # TODO probably better way to do this
-        #      -- PINT always stores flags as strings
-        for key, val in self._flags.items():
-            if isinstance(val[0], u.quantity.Quantity):
-                self._flags[key] = np.array([v.value for v in val])
-            else:
-                self._flags[key] = np.array(val)
+        self._flags = self._get_flags(toas)
 
         self._pdist = self._get_pdist()
         self._raj, self._decj = self._get_radec(model)
         self._pos = self._get_pos()
-        self._planetssb = self._get_planetssb(toas, model)
-        self._sunssb = self._get_sunssb(toas, model)
+        # ephemerides can only be deferred if the PINT objects are kept
+        lazy = planets == "lazy" and not drop_pintpsr
+        self._init_ephemerides(planets_dtype, planets_dt, lazy=lazy, source=(toas, model))
 
         which_astrometry = (
             "AstrometryEquatorial" if "AstrometryEquatorial" in model.components else "AstrometryEcliptic"
@@ -394,13 +615,14 @@ class PintPulsar(BasePulsar):
 
         self._pos_t = (
             model.components[which_astrometry]
-            .ssb_to_psb_xyz_ICRS(Time(model.get_barycentric_toas(toas), format="mjd"))
+            .ssb_to_psb_xyz_ICRS(astropy_time.Time(model.get_barycentric_toas(toas), format="mjd"))
             .value
         )
 
         self.sort_data()
 
     def drop_pintpsr(self):
+        self._load_ephemerides()
         with contextlib.suppress(NameError):
             del self.model
             del self.parfile
@@ -408,6 +630,7 @@ class PintPulsar(BasePulsar):
             del self.timfile
 
     def drop_not_picklable(self):
+        self._load_ephemerides()
         with contextlib.suppress(AttributeError):
             del self.model
             del self.pint_toas
@@ -438,6 +661,28 @@ class PintPulsar(BasePulsar):
         else:
             self._dmx = None
 
+    def _get_flags(self, toas):
+        """Extract the flags column by column from the per-TOA flag dictionaries
+        of the PINT table; TOAs without a flag get an empty string."""
+
+        # a list is much faster to iterate over repeatedly than the table column
+        obsflags = list(toas.get_flags())
+
+        # flag names, in order of first appearance
+        flagnames = dict.fromkeys(itertools.chain.from_iterable(obsflags))
+
+        flags = {}
+        for flag in flagnames:
+            values = [obs.get(flag, "") for obs in obsflags]
+
+            # PINT stores flags as strings, but older versions may give quantities
+            if isinstance(values[0], u.quantity.Quantity):
+                flags[flag] = np.array([v.value for v in values])
+            else:
+                flags[flag] = np.array(values)
+
+        return flags
+
     def _get_radec(self, model):
         if hasattr(model, "RAJ") and hasattr(model, "DECJ"):
             raj = model.RAJ.quantity.to(u.rad).value
@@ -467,7 +712,7 @@ class PintPulsar(BasePulsar):
         [Mercury, Venus, Mars, Pluto] unavailable pending Pint enhancements.
         """
         if self.planets:
-            planetssb = np.empty((len(self._toas), 9, 6))
+            planetssb = np.empty((toas.ntoas, 9, 6))
             planetssb[:] = np.nan
             planetssb[:, 2, :3] = self._get_ssb_lsec(toas, "obs_earth_pos")
             planetssb[:, 4, :3] = self._get_ssb_lsec(toas, "obs_jupiter_pos")
@@ -481,10 +726,15 @@ class PintPulsar(BasePulsar):
             #         # planetssb[:, ii, 3:] = utils.ecl2eq_vec(planetssb[:, ii, 3:])
         return planetssb
 
+    def _compute_ephemerides(self, toas=None, model=None):
+        toas = self.pint_toas if toas is None else toas
+        model = self.model if model is None else model
+        return self._get_planetssb(toas, model), self._get_sunssb(toas, model)
+
     def _get_sunssb(self, toas, model):
         sunssb = None
         if self.planets:
-            sunssb = np.zeros((len(self._toas), 6))
+            sunssb = np.zeros((toas.ntoas, 6))
             sunssb[:, :3] = self._get_ssb_lsec(toas, "obs_sun_pos")
 
             # if hasattr(model, "ELAT") and hasattr(model, "ELONG"):
@@ -502,8 +752,12 @@ class Tempo2Pulsar(BasePulsar):
         planets=True,
         par_name=None,
         tim_name=None,
+        presort=False,
+        planets_dtype=np.float64,
+        planets_dt=None,
     ):
         self._sort = sort
+        self._presort = presort
         self.t2pulsar = t2pulsar
         self.planets = planets
         self.name = str(t2pulsar.name)
@@ -528,16 +782,15 @@ class Tempo2Pulsar(BasePulsar):
         for key in t2pulsar.flags():
             flags[key] = t2pulsar.flagvals(key)
 
-        # new-style storage of flags as a numpy record array (previously, psr._flags = flags)
-        self._flags = np.zeros(len(self._toas), dtype=[(key, val.dtype) for key, val in flags.items()])
-        for key, val in flags.items():
-            self._flags[key] = val
+        # flags are stored dictionary-encoded (see BasePulsar._flags)
+        self._flags = flags
 
         self._pdist = self._get_pdist()
         self._raj, self._decj = self._get_radec(t2pulsar)
         self._pos = self._get_pos()
-        self._planetssb = self._get_planetssb(t2pulsar)
-        self._sunssb = self._get_sunssb(t2pulsar)
+        # ephemerides can only be deferred if the libstempo object is kept
+        lazy = planets == "lazy" and not drop_t2pulsar
+        self._init_ephemerides(planets_dtype, planets_dt, lazy=lazy, source=(t2pulsar,))
 
         # gather DM/DMX information if available
         self._set_dm(t2pulsar)
@@ -557,6 +810,7 @@ class Tempo2Pulsar(BasePulsar):
                 self.timfile = open(tim_name).read()
 
     def drop_tempopsr(self):
+        self._load_ephemerides()
         with contextlib.suppress(NameError):
             del self.t2pulsar
 
@@ -594,89 +848,61 @@ class Tempo2Pulsar(BasePulsar):
             elat = t2pulsar["ELAT"].val
             return self._get_radec_from_ecliptic(elong, elat)
 
-    def _get_planetssb(self, t2pulsar):
-        planetssb = None
+    def _compute_ephemerides(self, t2pulsar=None):
+        t2pulsar = self.t2pulsar if t2pulsar is None else t2pulsar
+
+        planetssb, sunssb = None, None
         if self.planets:
             for ii in range(1, 10):
                 tag = "DMASSPLANET" + str(ii)
-                self.t2pulsar[tag].val = 0.0
-            self.t2pulsar.formbats()
-            planetssb = np.zeros((len(self._toas), 9, 6))
-            planetssb[:, 0, :] = self.t2pulsar.mercury_ssb
-            planetssb[:, 1, :] = self.t2pulsar.venus_ssb
-            planetssb[:, 2, :] = self.t2pulsar.earth_ssb
-            planetssb[:, 3, :] = self.t2pulsar.mars_ssb
-            planetssb[:, 4, :] = self.t2pulsar.jupiter_ssb
-            planetssb[:, 5, :] = self.t2pulsar.saturn_ssb
-            planetssb[:, 6, :] = self.t2pulsar.uranus_ssb
-            planetssb[:, 7, :] = self.t2pulsar.neptune_ssb
-            planetssb[:, 8, :] = self.t2pulsar.pluto_ssb
+                t2pulsar[tag].val = 0.0
+
+            # a single formbats computes both the planet and the Sun positions
+            t2pulsar.formbats()
+
+            planetssb = np.zeros((t2pulsar.nobs, 9, 6))
+            planetssb[:, 0, :] = t2pulsar.mercury_ssb
+            planetssb[:, 1, :] = t2pulsar.venus_ssb
+            planetssb[:, 2, :] = t2pulsar.earth_ssb
+            planetssb[:, 3, :] = t2pulsar.mars_ssb
+            planetssb[:, 4, :] = t2pulsar.jupiter_ssb
+            planetssb[:, 5, :] = t2pulsar.saturn_ssb
+            planetssb[:, 6, :] = t2pulsar.uranus_ssb
+            planetssb[:, 7, :] = t2pulsar.neptune_ssb
+            planetssb[:, 8, :] = t2pulsar.pluto_ssb
+
+            sunssb = np.zeros((t2pulsar.nobs, 6))
+            sunssb[:, :] = t2pulsar.sun_ssb
 
             if "ELONG" and "ELAT" in np.concatenate((t2pulsar.pars(), t2pulsar.pars(which="set"))):
                 for ii in range(9):
                     planetssb[:, ii, :3] = utils.ecl2eq_vec(planetssb[:, ii, :3])
                     planetssb[:, ii, 3:] = utils.ecl2eq_vec(planetssb[:, ii, 3:])
-        return planetssb
 
-    def _get_sunssb(self, t2pulsar):
-        sunssb = None
-        if self.planets:
-            # for ii in range(1, 10):
-            #     tag = 'DMASSPLANET' + str(ii)@pytest.mark.skipif(t2 is None, reason="TEMPO2/libstempo not available")
-            #     self.t2pulsar[tag].val = 0.0
-            self.t2pulsar.formbats()
-            sunssb = np.zeros((len(self._toas), 6))
-            sunssb[:, :] = self.t2pulsar.sun_ssb
-
-            if "ELONG" and "ELAT" in np.concatenate((t2pulsar.pars(), t2pulsar.pars(which="set"))):
                 sunssb[:, :3] = utils.ecl2eq_vec(sunssb[:, :3])
                 sunssb[:, 3:] = utils.ecl2eq_vec(sunssb[:, 3:])
-        return sunssb
 
-    # infrastructure for sharing Pulsar objects among processes
-    # (currently Tempo2Pulsar only)
-    # the Pulsar deflater will copy select numpy arrays to SharedMemory,
-    # then replace them with pickleable objects that can be inflated
-    # to numpy arrays with SharedMemory storage
+        return planetssb, sunssb
 
     def drop_not_picklable(self):
+        self._load_ephemerides()
         with contextlib.suppress(AttributeError):
             del self.t2pulsar
             logger.warning("t2pulsar object cannot be pickled and has been removed.")
         return super().drop_not_picklable()
 
-    _todeflate = ["_designmatrix", "_planetssb", "_sunssb", "_flags"]
-    _deflated = "pristine"
-
-    def deflate(psr):  # pragma: py-lt-38
-        if psr._deflated == "pristine":
-            for attr in psr._todeflate:
-                if isinstance(getattr(psr, attr), np.ndarray):
-                    setattr(psr, attr, PulsarInflater(getattr(psr, attr)))
-
-            psr._deflated = "deflated"
-
-    def inflate(psr):  # pragma: py-lt-38
-        if psr._deflated == "deflated":
-            for attr in psr._todeflate:
-                if isinstance(getattr(psr, attr), PulsarInflater):
-                    setattr(psr, attr, getattr(psr, attr).inflate())
-
-            psr._deflated = "inflated"
-
-    def destroy(psr):  # pragma: py-lt-38
-        if psr._deflated == "deflated":
-            for attr in psr._todeflate:
-                if isinstance(getattr(psr, attr), PulsarInflater):
-                    getattr(psr, attr).destroy()
 
-            psr._deflated = "destroyed"
-
-
-class FeatherPulsar:
+class FeatherPulsar(DeflateMixin):
     columns = ["toas", "stoas", "toaerrs", "residuals", "freqs", "backend_flags", "telescope"]
     vector_columns = ["Mmat", "sunssb", "pos_t"]
     tensor_columns = ["planetssb"]
+    arrays = vector_columns + tensor_columns
+    # optional columns, read as None if absent
+    ephemerides = ["planetssb", "sunssb"]
+    # flags and backend flags are stored as integer codes into vocabularies
+    categoricals = ["_flagcodes", "_flagvocab", "_backendcodes", "_backendvocab"]
+    _todeflate = [c for c in columns if c != "backend_flags"] + arrays + ["_flagcodes", "_backendcodes"]
+    _todeflate += ["_isort", "_iisort"]
     # flags are done separately
     metadata = ["name", "dm", "dmx", "pdist", "pos", "phi", "theta", "fitpars", "setpars", "_pdist"]
     # notes: currently ignores _isort/__isort and gets sorted versions
@@ -694,36 +920,180 @@ class FeatherPulsar:
         """Sort data by time. This function is defined so that tests will pass."""
         self._isort = np.argsort(self.toas, kind="mergesort")
         self._iisort = np.zeros(len(self._isort), dtype=int)
-        for ii, p in enumerate(self._isort):
-            self._iisort[p] = ii
+        self._iisort[self._isort] = np.arange(len(self._isort))
 
-    @classmethod
-    def read_feather(cls, filename):
-        f = feather.read_table(filename)
-        self = FeatherPulsar()
+    @staticmethod
+    def _to_numpy(column):
+        """Return a NumPy view of a (single-chunk, memory-mapped) feather column;
+        columns of fixed-size lists are returned flattened."""
+
+        chunk = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+        if isinstance(chunk, pyarrow.FixedSizeListArray):
+            chunk = chunk.flatten()
+
+        return chunk.to_numpy(zero_copy_only=False)
+
+    def deflate(self, attrs=()):  # pragma: py-lt-38
+        super().deflate(attrs)
+
+        # all columns are now loaded, so we can release the feather file
+        self.__dict__.pop("_table", None)
+        self.__dict__.pop("_meta", None)
+
+    def __getstate__(self):
+        # the feather file of lazily read pulsars is not pickled: load all columns instead
+        if "_table" in self.__dict__:
+            for attr in FeatherPulsar.columns + FeatherPulsar.arrays + FeatherPulsar.categoricals:
+                if attr != "backend_flags":
+                    with contextlib.suppress(AttributeError):
+                        getattr(self, attr)
+
+        return {key: val for key, val in self.__dict__.items() if key not in ("_table", "_meta")}
+
+    @property
+    def flags(self):
+        """Return a dictionary of tim-file flags."""
+        if "flags" in self.__dict__:
+            return self.__dict__["flags"]
+
+        return {flag: self._flagvocab[flag][codes] for flag, codes in self._flagcodes.items()}
+
+    @property
+    def flag_codes(self):
+        """Return a dictionary of tim-file flags as integer codes into `flag_names`."""
+        return self._flagcodes
 
-        for array in FeatherPulsar.columns:
-            if array in f.column_names:
-                setattr(self, array, f[array].to_numpy())
+    @property
+    def flag_names(self):
+        """Return a dictionary of the distinct values of each tim-file flag."""
+        return {flag: vocab.tolist() for flag, vocab in self._flagvocab.items()}
+
+    @property
+    def backend_flags(self):
+        """Return array of backend flags."""
+        if "backend_flags" in self.__dict__:
+            return self.__dict__["backend_flags"]
+
+        return self._backendvocab[self._backendcodes]
 
-        for array in FeatherPulsar.vector_columns:
-            cols = [c for c in f.column_names if c.startswith(array)]
-            setattr(self, array, np.array([f[col].to_numpy() for col in cols]).swapaxes(0, 1).copy())
+    @property
+    def backend_codes(self):
+        """Return array of backend flags as integer codes into `backend_names`."""
+        return self._backendcodes
 
-        for array in FeatherPulsar.tensor_columns:
-            rows = sorted(set(["_".join(c.split("_")[:-1]) for c in f.column_names if c.startswith(array)]))
+    @property
+    def backend_names(self):
+        """Return list of the distinct backend flags."""
+        return self._backendvocab.tolist()
+
+    def __getattr__(self, attr):
+        # convert the columns of lazily read feather files on first access
+        if attr in FeatherPulsar.categoricals:
+            self._set_categoricals(attr[:-5])
+            return self.__dict__[attr]
+
+        if "_table" not in self.__dict__ or attr not in FeatherPulsar.columns + FeatherPulsar.arrays:
+            raise AttributeError(f"'FeatherPulsar' object has no attribute '{attr}'")
+
+        value = self._read_column(attr)
+        setattr(self, attr, value)
+
+        return value
+
+    def _set_categoricals(self, name):
+        """Set the codes and vocabularies of the flags (``name = "_flag"``)
+        or of the backend flags (``name = "_backend"``)."""
+
+        # pulsars pickled before flags were stored as codes
+        legacy = "flags" if name == "_flag" else "backend_flags"
+        if legacy in self.__dict__:
+            values = self.__dict__[legacy]
+        elif "_table" in self.__dict__:
+            f = self.__dict__["_table"]
+            if name == "_flag":
+                values = {"_".join(c.split("_")[1:]): f[c] for c in f.column_names if c.startswith("flags_")}
+            elif "backend_flags" in f.column_names:
+                values = f["backend_flags"]
+            else:
+                raise AttributeError(f"'FeatherPulsar' object has no attribute '{name}codes'")
+        else:
+            raise AttributeError(f"'FeatherPulsar' object has no attribute '{name}codes'")
+
+        if isinstance(values, dict):
+            codes, vocab = {}, {}
+            for flag, value in values.items():
+                codes[flag], vocab[flag] = FeatherPulsar._encode(value)
+        else:
+            codes, vocab = FeatherPulsar._encode(values)
+
+        setattr(self, name + "codes", codes)
+        setattr(self, name + "vocab", vocab)
+
+    @staticmethod
+    def _encode(values):
+        """Return codes and vocabulary for an array or feather column of values;
+        dictionary-encoded columns are read without decoding."""
+
+        if isinstance(values, pyarrow.ChunkedArray):
+            chunk = values.chunk(0) if values.num_chunks == 1 else values.combine_chunks()
+            if isinstance(chunk, pyarrow.DictionaryArray):
+                vocab = chunk.dictionary.to_numpy(zero_copy_only=False).astype("U")
+                return chunk.indices.to_numpy(zero_copy_only=False), vocab
+            values = chunk.to_numpy(zero_copy_only=False).astype("U")
+
+        return encode_flags(values)
+
+    def _read_column(self, attr):
+        f, meta = self.__dict__["_table"], self.__dict__["_meta"]
+
+        if attr in FeatherPulsar.ephemerides and not any(c.startswith(attr) for c in f.column_names):
+            if attr not in meta.get("shapes", {}):
+                return None
+
+        if attr in FeatherPulsar.columns:
+            if attr in f.column_names:
+                return FeatherPulsar._to_numpy(f[attr])
+        elif meta.get("format", 1) >= 2:
+            # matrices and tensors are stored as fixed-size lists, with their shapes in the metadata
+            if attr in meta["shapes"]:
+                shape = (f.num_rows,) + tuple(meta["shapes"][attr])
+                return FeatherPulsar._to_numpy(f[attr]).reshape(shape) if attr in f.column_names else np.zeros(shape)
+        elif attr in FeatherPulsar.vector_columns:
+            cols = [c for c in f.column_names if c.startswith(attr)]
+            return np.array([f[col].to_numpy() for col in cols]).swapaxes(0, 1).copy()
+        elif attr in FeatherPulsar.tensor_columns:
+            rows = sorted(set(["_".join(c.split("_")[:-1]) for c in f.column_names if c.startswith(attr)]))
             cols = [[c for c in f.column_names if c.startswith(row)] for row in rows]
-            setattr(
-                self,
-                array,
-                np.array([[f[col].to_numpy() for col in row] for row in cols]).swapaxes(0, 2).swapaxes(1, 2).copy(),
-            )
+            return np.array([[f[col].to_numpy() for col in row] for row in cols]).swapaxes(0, 2).swapaxes(1, 2).copy()
 
-        self.flags = {}
-        for array in [c for c in f.column_names if c.startswith("flags_")]:
-            self.flags["_".join(array.split("_")[1:])] = f[array].to_numpy().astype("U")
+        raise AttributeError(f"'FeatherPulsar' object has no attribute '{attr}'")
+
+    @classmethod
+    def read_feather(cls, filename, lazy=False, planets=True):
+        """Read pulsar from feather file. With ``lazy=True``, array columns
+        and flags are converted to NumPy on first access, so that only the
+        parts of the (memory-mapped) file that are used are ever read.
+        With ``planets="lazy"``, only the ephemerides (``planetssb``, ``sunssb``)
+        are read on first access; with ``planets=False``, they are not read."""
+
+        f = feather.read_table(filename, memory_map=True)
+        self = FeatherPulsar()
 
         meta = json.loads(f.schema.metadata[b"json"])
+        self._table, self._meta = f, meta
+
+        if not planets:
+            self.planetssb, self.sunssb = None, None
+
+        if not lazy:
+            for attr in FeatherPulsar.columns + FeatherPulsar.arrays + FeatherPulsar.categoricals:
+                if attr != "backend_flags" and not (planets == "lazy" and attr in FeatherPulsar.ephemerides):
+                    with contextlib.suppress(AttributeError):
+                        getattr(self, attr)
+
+            if planets != "lazy":
+                del self._table, self._meta
+
         for attr in FeatherPulsar.metadata:
             if attr in meta:
                 setattr(self, attr, meta[attr])
@@ -740,30 +1110,69 @@ class FeatherPulsar:
     def to_list(a):
         return a.tolist() if isinstance(a, np.ndarray) else a
 
-    def save_feather(self, filename, noisedict=None):
-        self._toas = self._toas.astype(float)
-        pydict = {array: getattr(self, array) for array in FeatherPulsar.columns}
-
-        pydict.update(
-            {
-                f"{array}_{i}": getattr(self, array)[:, i]
-                for array in FeatherPulsar.vector_columns
-                for i in range(getattr(self, array).shape[1])
-            }
-        )
+    def save_feather(self, filename, noisedict=None, version=2, planets=True):
+        """Save pulsar to feather file. With ``version=2`` (the default), matrices
+        and tensors are stored as single fixed-size-list columns, and the file is
+        left uncompressed so that it can be memory-mapped on reading; with
+        ``version=1``, they are split into one column per component. The
+        ephemerides are omitted if ``planets=False`` (or if they are None)."""
 
-        pydict.update(
-            {
-                f"{array}_{i}_{j}": getattr(self, array)[:, i, j]
-                for array in FeatherPulsar.tensor_columns
-                for i in range(getattr(self, array).shape[1])
-                for j in range(getattr(self, array).shape[2])
-            }
-        )
+        arrays = [a for a in FeatherPulsar.arrays if planets or a not in FeatherPulsar.ephemerides]
 
-        pydict.update({f"flags_{flag}": self.flags[flag] for flag in self.flags})
+        if hasattr(self, "_toas"):
+            self._toas = self._toas.astype(float)
+        pydict = {array: getattr(self, array) for array in FeatherPulsar.columns if array != "backend_flags"}
 
         meta = {}
+        if version >= 2:
+            meta["format"], meta["shapes"] = 2, {}
+            for array in arrays:
+                value = getattr(self, array)
+                if value is None:
+                    continue
+
+                # single-precision ephemerides are kept as such
+                value = np.ascontiguousarray(value, dtype=np.float32 if value.dtype == np.float32 else float)
+                meta["shapes"][array] = value.shape[1:]
+                if value.size:
+                    size = int(np.prod(value.shape[1:]))
+                    pydict[array] = pyarrow.FixedSizeListArray.from_arrays(value.reshape(-1), size)
+        else:
+            values = {array: getattr(self, array) for array in arrays}
+            values = {array: value for array, value in values.items() if value is not None}
+
+            pydict.update(
+                {
+                    f"{array}_{i}": values[array][:, i]
+                    for array in FeatherPulsar.vector_columns
+                    if array in values
+                    for i in range(values[array].shape[1])
+                }
+            )
+
+            pydict.update(
+                {
+                    f"{array}_{i}_{j}": values[array][:, i, j]
+                    for array in FeatherPulsar.tensor_columns
+                    if array in values
+                    for i in range(values[array].shape[1])
+                    for j in range(values[array].shape[2])
+                }
+            )
+
+        if version >= 2:
+            # flags are dictionary-encoded, so they can be read back as codes
+            def encoded(codes, vocab):
+                return pyarrow.DictionaryArray.from_arrays(np.asarray(codes, dtype=np.int32), list(vocab))
+
+            pydict["backend_flags"] = encoded(self.backend_codes, self.backend_names)
+            pydict.update(
+                {f"flags_{flag}": encoded(self.flag_codes[flag], vocab) for flag, vocab in self.flag_names.items()}
+            )
+        else:
+            pydict["backend_flags"] = self.backend_flags
+            pydict.update({f"flags_{flag}": self.flags[flag] for flag in self.flags})
+
         for attr in FeatherPulsar.metadata:
             if hasattr(self, attr):
                 meta[attr] = FeatherPulsar.to_list(getattr(self, attr))
@@ -776,42 +1185,143 @@ class FeatherPulsar:
             # only keep noisedict entries that are for this pulsar (requires pulsar name to be first part of the key!)
             meta["noisedict"] = {par: val for par, val in noisedict.items() if par.startswith(self.name)}
 
-        feather.write_feather(Table.from_pydict(pydict, metadata={"json": json.dumps(meta)}), filename)
+        table = pyarrow.Table.from_pydict(pydict, metadata={"json": json.dumps(meta)})
+        if version >= 2:
+            feather.write_feather(table, filename, compression="uncompressed", chunksize=max(table.num_rows, 1))
+        else:
+            feather.write_feather(table, filename)
+
+
+class PulsarDataset(Mapping):
+    """Collection of pulsars written by ``save_dataset``: a directory with one
+    feather file per pulsar, and a JSON index of pulsar names, file names,
+    number of TOAs and noise dictionaries. Pulsars are read on first access,
+    by default lazily (see ``FeatherPulsar.read_feather``), so that only the
+    pulsars and columns that are used are read from disk."""
+
+    indexfile = "index.json"
+
+    def __init__(self, path, lazy=True):
+        self.path = path
+        self.lazy = lazy
+
+        with open(os.path.join(path, PulsarDataset.indexfile), "r") as f:
+            self._index = json.load(f)
+
+        self._psrs = {}
+
+    def __getitem__(self, name):
+        if name not in self._psrs:
+            filename = os.path.join(self.path, self._index["pulsars"][name]["file"])
+            self._psrs[name] = FeatherPulsar.read_feather(filename, lazy=self.lazy)
+
+        return self._psrs[name]
+
+    def __iter__(self):
+        return iter(self._index["pulsars"])
+
+    def __len__(self):
+        return len(self._index["pulsars"])
+
+    def __repr__(self):
+        return f"<PulsarDataset {self.path}: {len(self)} pulsars>"
+
+    @property
+    def ntoas(self):
+        """Return dictionary of the number of TOAs of each pulsar."""
+        return {name: entry["ntoas"] for name, entry in self._index["pulsars"].items()}
+
+    @property
+    def noisedict(self):
+        """Return the noise dictionaries of all pulsars, merged."""
+
+        ret = {}
+        for entry in self._index["pulsars"].values():
+            ret.update(entry.get("noisedict", {}))
+
+        return ret
+
+    def pulsars(self, names=None):
+        """Return list of pulsars, all of them or those in ``names``."""
+        return [self[name] for name in (self if names is None else names)]
+
+
+def save_dataset(psrs, path, noisedict=None, planets=True):
+    """Save a list of pulsars as a ``PulsarDataset`` in directory ``path``.
+    As for ``FeatherPulsar.save_feather``, the noise dictionary of each pulsar
+    is taken from ``noisedict`` (keeping the entries that start with the
+    pulsar name) or from its ``noisedict`` attribute, and the ephemerides are
+    omitted if ``planets=False``."""
+
+    os.makedirs(path, exist_ok=True)
+
+    index = {"format": 1, "pulsars": {}}
+    for psr in psrs:
+        filename = f"{psr.name}.feather"
+        FeatherPulsar.save_feather(psr, os.path.join(path, filename), noisedict=noisedict, planets=planets)
+
+        entry = {"file": filename, "ntoas": len(psr.toas)}
+        psrdict = getattr(psr, "noisedict", None) if noisedict is None else noisedict
+        if psrdict:
+            entry["noisedict"] = {par: val for par, val in psrdict.items() if par.startswith(psr.name)}
+
+        index["pulsars"][psr.name] = entry
+
+    with open(os.path.join(path, PulsarDataset.indexfile), "w") as f:
+        json.dump(index, f)
+
+
+def open_dataset(path, lazy=True):
+    """Open a ``PulsarDataset`` saved in directory ``path``."""
+    return PulsarDataset(path, lazy=lazy)
 
 
 def Pulsar(*args, **kwargs):
+    planets = kwargs.get("planets", True)
+
     featherfile = [x for x in args if isinstance(x, str) and x.endswith(".feather")]
     if featherfile:
-        return FeatherPulsar.read_feather(featherfile[0])
+        return FeatherPulsar.read_feather(featherfile[0], planets=planets)
     featherfile = kwargs.get("filepath", None)
     if featherfile:
-        return FeatherPulsar.read_feather(featherfile)
+        return FeatherPulsar.read_feather(featherfile, planets=planets)
 
     ephem = kwargs.get("ephem", None)
     clk = kwargs.get("clk", None)
     bipm_version = kwargs.get("bipm_version", None)
-    planets = kwargs.get("planets", True)
+    planetopts = {
+        "planets_dtype": kwargs.get("planets_dtype", np.float64),
+        "planets_dt": kwargs.get("planets_dt", None),
+    }
     sort = kwargs.get("sort", True)
+    presort = kwargs.get("presort", False)
     drop_t2pulsar = kwargs.get("drop_t2pulsar", True)
     drop_pintpsr = kwargs.get("drop_pintpsr", True)
     timing_package = kwargs.get("timing_package", None)
     if timing_package is not None:
         timing_package = timing_package.lower()
 
+    # only import the timing packages to check objects that are not filenames
+    objects = [x for x in args if not isinstance(x, str)]
+
     if pint is not None:
-        toas = [x for x in args if isinstance(x, TOAs)]
-        model = [x for x in args if isinstance(x, TimingModel)]
+        toas = [x for x in objects if isinstance(x, pint_toa.TOAs)]
+        model = [x for x in objects if isinstance(x, pint_models.TimingModel)]
 
     if t2 is not None:
-        t2pulsar = [x for x in args if isinstance(x, t2.tempopulsar)]
+        t2pulsar = [x for x in objects if isinstance(x, t2.tempopulsar)]
 
     parfile = [x for x in args if isinstance(x, str) and x.split(".")[-1] == "par"]
     timfile = [x for x in args if isinstance(x, str) and x.split(".")[-1] in ["tim", "toa"]]
 
     if pint and toas and model:
-        return PintPulsar(toas[0], model[0], sort=sort, drop_pintpsr=drop_pintpsr, planets=planets)
+        return PintPulsar(
+            toas[0], model[0], sort=sort, drop_pintpsr=drop_pintpsr, planets=planets, presort=presort, **planetopts
+        )
     elif t2 and t2pulsar:
-        return Tempo2Pulsar(t2pulsar[0], sort=sort, drop_t2pulsar=drop_t2pulsar, planets=planets)
+        return Tempo2Pulsar(
+            t2pulsar[0], sort=sort, drop_t2pulsar=drop_t2pulsar, planets=planets, presort=presort, **planetopts
+        )
     elif parfile and timfile:
         # Check whether the two files exist
         if not os.path.isfile(parfile[0]) or not os.path.isfile(timfile[0]):
@@ -851,19 +1361,132 @@ def Pulsar(*args, **kwargs):
                     planets=planets,
                     par_name=relparfile,
                     tim_name=reltimfile,
+                    presort=presort,
+                    **planetopts,
                 )
             elif timing_package.lower() == "pint":
                 if pint is None:  # pragma: no cover
                     raise ValueError("PINT requested but PINT is not available")
                 if (clk is not None) and (bipm_version is None):
                     bipm_version = clk.split("(")[1][:-1]
-                model, toas = get_model_and_toas(
-                    relparfile, reltimfile, ephem=ephem, bipm_version=bipm_version, planets=planets
+                model, toas = pint_models.get_model_and_toas(
+                    relparfile, reltimfile, ephem=ephem, bipm_version=bipm_version, planets=bool(planets)
                 )
                 os.chdir(cwd)
-                return PintPulsar(toas, model, sort=sort, drop_pintpsr=drop_pintpsr, planets=planets)
+                return PintPulsar(
+                    toas, model, sort=sort, drop_pintpsr=drop_pintpsr, planets=planets, presort=presort, **planetopts
+                )
             else:
                 raise ValueError(f"Unknown timing package {timing_package}")
         finally:
             os.chdir(cwd)
     raise ValueError("Pulsar (par/tim) not specified in {args} or {kwargs}")
+
+
+def _get_includes(timfile, dirname):
+    """Return the files INCLUDEd (recursively) by ``timfile``. As in
+    ``get_maxobs``, INCLUDE paths are relative to the directory ``dirname``
+    of the base tim file."""
+
+    ret = []
+    with open(timfile) as tfile:
+        for line in tfile:
+            if not line.startswith("C") and "INCLUDE" in line:
+                include = os.path.join(dirname, line.split()[-1])
+                ret += [include] + _get_includes(include, dirname)
+
+    return ret
+
+
+def pulsar_hash(parfile, timfile, **kwargs):
+    """Return a hash of the contents of ``parfile``, ``timfile`` and of the
+    files it INCLUDEs, of the keyword arguments that determine how ``Pulsar``
+    loads them (``ephem``, ``clk``, ``bipm_version``, ``planets`` and the
+    ephemeris storage options), and of the
+    name and version of the timing package and of ``enterprise``."""
+
+    timing_package = kwargs.get("timing_package", None)
+    if timing_package is None:
+        timing_package = "tempo2" if t2 is not None else "pint"
+    timing_package = timing_package.lower()
+
+    module = t2 if timing_package == "tempo2" else pint
+    options = {
+        "ephem": kwargs.get("ephem", None),
+        "clk": kwargs.get("clk", None),
+        "bipm_version": kwargs.get("bipm_version", None),
+        "planets": kwargs.get("planets", True),
+        "planets_dtype": np.dtype(kwargs.get("planets_dtype", np.float64)).name,
+        "planets_dt": kwargs.get("planets_dt", None),
+        "timing_package": timing_package,
+        "timing_version": getattr(module, "__version__", None),
+        "enterprise_version": enterprise.__version__,
+    }
+
+    h = hashlib.sha256(json.dumps(options, sort_keys=True).encode())
+    for filename in [parfile, timfile] + _get_includes(timfile, os.path.dirname(timfile)):
+        with open(filename, "rb") as f:
+            h.update(hashlib.sha256(f.read()).digest())
+
+    return h.hexdigest()
+
+
+def _load_pulsar(parfile, timfile, kwargs, cachefile, picklable=True):
+    """Load a pulsar (in a worker process, if ``picklable``); if ``cachefile``
+    is given, save the pulsar there and return the file name."""
+
+    psr = Pulsar(parfile, timfile, **kwargs)
+
+    if cachefile is None:
+        if picklable:
+            psr.drop_not_picklable()
+        return psr
+
+    # write to a temporary file first, so that other processes never see partial files
+    tmpfile = f"{cachefile}.{os.getpid()}.tmp"
+    FeatherPulsar.save_feather(psr, tmpfile)
+    os.replace(tmpfile, cachefile)
+
+    return cachefile
+
+
+def load_pulsars(pairs, workers=None, cachedir=None, **kwargs):
+    """Load pulsars from a list of (parfile, timfile) pairs, in parallel over
+    ``workers`` processes (by default, serially in this process). Keyword
+    arguments (e.g., ``ephem``, ``clk``, ``bipm_version``, ``timing_package``,
+    ``planets``) are passed to ``Pulsar``.
+
+    If ``cachedir`` is given, each pulsar is saved there as a feather file
+    named by its ``pulsar_hash``, and read back (as a ``FeatherPulsar``) when
+    the par and tim files, the options, and the timing package have not
+    changed.
+
+    :param pairs: list of (parfile, timfile) tuples
+    :param workers: number of worker processes
+    :param cachedir: directory of cached feather files
+    :return: list of pulsars, in the order of ``pairs``
+    """
+
+    pairs = [tuple(pair) for pair in pairs]
+
+    cachefiles = [None] * len(pairs)
+    if cachedir is not None:
+        os.makedirs(cachedir, exist_ok=True)
+        cachefiles = [os.path.join(cachedir, pulsar_hash(par, tim, **kwargs) + ".feather") for par, tim in pairs]
+
+    tasks = [
+        (par, tim, kwargs, cachefile)
+        for (par, tim), cachefile in zip(pairs, cachefiles)
+        if cachefile is None or not os.path.isfile(cachefile)
+    ]
+
+    if workers is None or workers <= 1 or len(tasks) <= 1:
+        results = [_load_pulsar(*task, picklable=False) for task in tasks]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_load_pulsar, *zip(*tasks)))
+
+    if cachedir is None:
+        return results
+
+    return [FeatherPulsar.read_feather(cachefile, planets=kwargs.get("planets", True)) for cachefile in cachefiles]
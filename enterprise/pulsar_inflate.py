@@ -1,7 +1,8 @@
 # pulsar_inflate.py
 """Defines PulsarInflater class: instances copy a numpy array to shared memory,
 and (after pickling) will reinflate to a numpy array that refers to the shared
-data.
+data. The DeflateMixin class adds deflate/inflate/destroy methods to pulsar
+(and other) classes.
 """
 
 import numpy as np
@@ -58,3 +59,54 @@ class PulsarInflater:
     def destroy(self):
         shm = shared_memory.SharedMemory(self.shmname)
         shm.unlink()
+
+
+class DeflateMixin(object):
+    """Mixin that moves the arrays named in `_todeflate` (numpy arrays, or
+    dictionaries of numpy arrays) to shared memory. Arrays of Python objects
+    and empty arrays are left alone. Further attributes (e.g., model-level
+    precomputed bases) can be given to `deflate`."""
+
+    _todeflate = []
+    _deflated = "pristine"
+
+    @staticmethod
+    def _map(value, func, cls):
+        if isinstance(value, cls):
+            return func(value)
+        elif isinstance(value, dict):
+            return {key: DeflateMixin._map(val, func, cls) for key, val in value.items()}
+        else:
+            return value
+
+    @staticmethod
+    def _deflate(array):
+        return PulsarInflater(array) if array.dtype != object and array.nbytes > 0 else array
+
+    def _apply(self, func, cls, replace=True):
+        for attr in self._deflatedattrs:
+            if attr in self.__dict__:
+                value = DeflateMixin._map(self.__dict__[attr], func, cls)
+                if replace:
+                    setattr(self, attr, value)
+
+    def deflate(self, attrs=()):  # pragma: py-lt-38
+        if self._deflated == "pristine":
+            self._deflatedattrs = list(self._todeflate) + list(attrs)
+
+            # load any lazily computed attributes
+            for attr in self._deflatedattrs:
+                getattr(self, attr, None)
+
+            self._apply(DeflateMixin._deflate, np.ndarray)
+            self._deflated = "deflated"
+
+    def inflate(self):  # pragma: py-lt-38
+        if self._deflated == "deflated":
+            self._apply(PulsarInflater.inflate, PulsarInflater)
+            self._deflated = "inflated"
+
+    def destroy(self):  # pragma: py-lt-38
+        if self._deflated == "deflated":
+            self._apply(PulsarInflater.destroy, PulsarInflater, replace=False)
+            self._deflated = "destroyed"
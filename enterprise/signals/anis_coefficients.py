@@ -1,9 +1,12 @@
 # anis_coefficients.py
 
-import healpy as hp
 import numpy as np
 import scipy.special as ss
 
+from enterprise.lazy import LazyModule
+
+hp = LazyModule("healpy")
+
 
 """
 Script to compute the correlation basis-functions for various anisotropic
@@ -27,6 +27,7 @@ def Deterministic(waveform, selection=Selection(selections.no_selection), name="
             sel = selection(psr)
             self._keys = sorted(sel.masks.keys())
             self._masks = [sel.masks[key] for key in self._keys]
+            self._indices = [sel.indices[key] for key in self._keys]
             self._ntoas = len(psr.toas)
             self._wf, self._params = {}, {}
             for key, mask in zip(self._keys, self._masks):
@@ -46,8 +47,8 @@ def Deterministic(waveform, selection=Selection(selections.no_selection), name="
         def get_delay(self, params):
             """Return signal delay."""
             delay = np.zeros(self._ntoas)
-            for key, mask in zip(self._keys, self._masks):
-                delay[mask] = self._wf[key](params=params, mask=mask)
+            for key, idx in zip(self._keys, self._indices):
+                delay[idx] = self._wf[key](params=params, mask=idx)
             return delay
 
     return Deterministic
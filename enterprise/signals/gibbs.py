@@ -0,0 +1,296 @@
+# gibbs.py
+"""Blocked Gibbs sampler for PTA models with Gaussian-process signals.
+
+The sampler alternates between
+
+- the GP coefficients, drawn from their joint Gaussian conditional
+  (the same Sigma = TNT + phiinv used by ``LogLikelihood``);
+- the ``log10_rho`` parameters of ``free_spectrum`` priors, drawn exactly
+  from their (truncated inverse-gamma) conditionals given the coefficients;
+- all other GP hyperparameters (e.g., powerlaw amplitudes and indices),
+  updated by Metropolis steps on the Gaussian density of the coefficients;
+- white-noise, deterministic and basis parameters, updated by Metropolis
+  steps on the likelihood of the residuals given the coefficients.
+
+As for ``utils.ConditionalGP``, GPs should be set up with ``combine=False``.
+"""
+
+import logging
+
+import numpy as np
+import scipy.linalg as sl
+import scipy.special as ss
+
+from enterprise.signals import gp_priors, parameter, utils
+
+logger = logging.getLogger(__name__)
+
+
+def _is_free_spectrum(prior):
+    return getattr(prior._func, "__wrapped__", None) is gp_priors.free_spectrum.__wrapped__
+
+
+def truncated_invgamma(alpha, beta, lo, hi):
+    """Draw tau ~ InvGamma(alpha, beta) truncated to [lo, hi] (vectorized), by
+    inverting the CDF of x = beta / tau ~ Gamma(alpha)."""
+
+    alpha, beta, lo, hi = np.broadcast_arrays(alpha, np.maximum(beta, np.finfo(float).tiny), lo, hi)
+
+    xlo, xhi = beta / hi, beta / lo
+    u = np.random.uniform(size=alpha.shape)
+
+    # invert the lower CDF in the lower tail, the upper CDF in the upper tail
+    plo, phi = ss.gammainc(alpha, xlo), ss.gammainc(alpha, xhi)
+    qlo, qhi = ss.gammaincc(alpha, xlo), ss.gammaincc(alpha, xhi)
+
+    upper = plo > 0.5
+    with np.errstate(invalid="ignore"):
+        x = np.where(
+            upper,
+            ss.gammainccinv(alpha, qlo - u * (qlo - qhi)),
+            ss.gammaincinv(alpha, plo + u * (phi - plo)),
+        )
+
+    # if the interval holds no numerical mass, the density peaks at its near edge
+    empty = np.where(upper, qlo - qhi, phi - plo) <= 0
+    x = np.where(empty, np.where(upper, xlo, xhi), x)
+
+    return beta / np.clip(np.nan_to_num(x, nan=xlo), xlo, xhi)
+
+
+class BlockedGibbs(object):
+    def __init__(self, pta, phiinv_method="cliques", nmetropolis=10, stepsize=0.1):
+        """Blocked Gibbs sampler for ``pta``.
+
+        :param pta: ``PTA`` object, with ``combine=False`` GPs
+        :param phiinv_method: method used by ``PTA.get_phiinv``
+        :param nmetropolis: number of Metropolis steps per Gibbs iteration
+            for each of the non-analytic blocks
+        :param stepsize: initial proposal scale, in units of the prior width
+            of each parameter; it is adapted to target ~25% acceptance
+        """
+
+        self.pta = pta
+        self.phiinv_method = phiinv_method
+        self.nmetropolis = nmetropolis
+
+        self._cgp = utils.ConditionalGP(pta, phiinv_method=phiinv_method)
+
+        # positions of each parameter in the flat parameter vector
+        self._idx, ct = {}, 0
+        for p in pta.params:
+            n = p.size if p.size else 1
+            self._idx[p.name] = np.arange(ct, ct + n)
+            ct += n
+        self.ndim = ct
+
+        self._rho = self._get_free_spectra()
+
+        noise = set()
+        for sc in pta._signalcollections:
+            noise.update(sc.white_params + sc.delay_params + sc.basis_params)
+
+        # everything else (GP prior and ORF parameters) only affects phi
+        names = [p.name for p in pta.params if p.name not in self._rho]
+        self._blocks = {
+            "noise": np.array(sum([list(self._idx[n]) for n in names if n in noise], []), dtype=int),
+            "hyper": np.array(sum([list(self._idx[n]) for n in names if n not in noise], []), dtype=int),
+        }
+
+        # proposal scales from the spread of prior draws
+        draws = np.array([self._tovector(parameter.sample(pta.params)) for _ in range(100)])
+        self._scale = stepsize * np.std(draws, axis=0)
+        self._accepted = {block: [0, 0] for block in self._blocks}
+
+        self.coefficients = None
+
+    def _tovector(self, params):
+        x = np.zeros(self.ndim)
+        for name, idx in self._idx.items():
+            x[idx] = params[name]
+        return x
+
+    def _get_free_spectra(self):
+        """Find the free-spectrum ``log10_rho`` parameters with (numeric) uniform
+        priors, which can be drawn from their analytic conditionals."""
+
+        ret = {}
+        params = {p.name: p for p in self.pta.params}
+
+        for model in self.pta.pulsarmodels:
+            for sig in model._signals:
+                if sig.signal_type == "basis":
+                    priors = sig._prior.items()
+                elif sig.signal_type == "common basis":
+                    priors = [("", sig._prior)]
+                else:
+                    continue
+
+                for key, prior in priors:
+                    if not _is_free_spectrum(prior) or "log10_rho" not in prior._params:
+                        continue
+
+                    par = prior._params["log10_rho"]
+                    if par.name not in params or par.type != "uniform":
+                        continue
+
+                    pmin, pmax = par.prior._defaults.get("pmin"), par.prior._defaults.get("pmax")
+                    if pmin is None or pmax is None:
+                        continue
+
+                    if par.name not in ret:
+                        bounds = (np.asarray(pmin, dtype=float), np.asarray(pmax, dtype=float))
+                        ret[par.name] = {"bounds": bounds, "entries": []}
+                    ret[par.name]["entries"].append((sig, key))
+
+        return ret
+
+    def _get_gamma(self, entries, params):
+        """ORF matrix among the signals sharing a free spectrum."""
+
+        Gamma = np.identity(len(entries))
+        for i, (sig1, _) in enumerate(entries):
+            for j, (sig2, _) in enumerate(entries):
+                if i != j and sig1.signal_type == "common basis" and type(sig1) is type(sig2):
+                    Gamma[i, j] = sig1._orf(sig1._psrpos, sig2._psrpos, params=params)
+        return Gamma
+
+    def draw_coefficients(self, params):
+        """Draw all GP coefficients from their joint Gaussian conditional."""
+
+        ch, mn = self._cgp._make_conditional(params)
+        return self._cgp._draw(ch, mn, 1, True)[0]
+
+    def draw_free_spectra(self, x, b):
+        """Draw the free-spectrum ``log10_rho`` from their conditionals given the
+        coefficients ``b``: with a log-uniform prior, rho^2 has a truncated
+        inverse-gamma distribution."""
+
+        params = self.pta.map_params(x)
+        signals, _, _ = self._cgp._get_columns(params)
+        columns = {sig: slc for sig, _, slc in signals}
+
+        for name, rho in self._rho.items():
+            coeffs = []
+            for sig, key in rho["entries"]:
+                slc = columns[sig]
+                if sig.signal_type == "basis":
+                    slc = slice(slc.start + sig._slices[key].start, slc.start + sig._slices[key].stop)
+                coeffs.append(b[slc])
+            A = np.array(coeffs)
+
+            if A.shape[1] != 2 * len(self._idx[name]):
+                raise ValueError("Free spectrum {} does not have two basis columns per frequency.".format(name))
+
+            # quadratic forms a^T Gamma^-1 a for each column, summed over sin/cos pairs
+            Gamma = self._get_gamma(rho["entries"], params)
+            q = np.sum(A * sl.cho_solve(sl.cho_factor(Gamma), A), axis=0)
+            s = q[::2] + q[1::2]
+
+            pmin, pmax = rho["bounds"]
+            tau = truncated_invgamma(A.shape[0], s / 2, 10 ** (2 * pmin), 10 ** (2 * pmax))
+
+            x[self._idx[name]] = 0.5 * np.log10(tau)
+
+        return x
+
+    def _lnhyper(self, x, b):
+        """Log density of the coefficients given the GP hyperparameters."""
+
+        params = self.pta.map_params(x)
+        phiinvs = self.pta.get_phiinv(params, logdet=True, method=self.phiinv_method)
+
+        if self.pta._commonsignals:
+            phiinv, logdet = phiinvs
+            return -0.5 * (np.dot(b, phiinv.dot(b)) + logdet)
+
+        ret, ntot = 0, 0
+        for pl in phiinvs:
+            if pl is None:
+                continue
+
+            phiinv, logdet = pl
+            nb = phiinv.shape[0]
+            bp = b[ntot : ntot + nb]
+
+            ret += -0.5 * ((np.dot(bp, bp * phiinv) if phiinv.ndim == 1 else np.dot(bp, np.dot(phiinv, bp))) + logdet)
+            ntot += nb
+
+        return ret
+
+    def _lnnoise(self, x, b):
+        """Log likelihood of the residuals given the GP coefficients."""
+
+        params = self.pta.map_params(x)
+
+        ret, ntot = 0, 0
+        for model in self.pta.pulsarmodels:
+            y = model.get_detres(params)
+
+            T = model.get_basis(params)
+            if T is not None:
+                y = y - T.dot(b[ntot : ntot + T.shape[1]])
+                ntot += T.shape[1]
+
+            rNr, logdet = model.get_ndiag(params).solve(y, left_array=y, logdet=True)
+            ret += -0.5 * (rNr + logdet)
+
+        return ret
+
+    def _metropolis(self, block, x, b, lnfunc):
+        idx = self._blocks[block]
+        if len(idx) == 0:
+            return x
+
+        lnp = lnfunc(x, b) + self.pta.get_lnprior(x)
+        for _ in range(self.nmetropolis):
+            y = x.copy()
+            y[idx] += self._scale[idx] * np.random.randn(len(idx))
+
+            lnprior = self.pta.get_lnprior(y)
+            lnq = lnfunc(y, b) + lnprior if np.isfinite(lnprior) else -np.inf
+
+            accepted = np.log(np.random.uniform()) < lnq - lnp
+            if accepted:
+                x, lnp = y, lnq
+
+            # adapt the proposal scale towards ~25% acceptance
+            self._accepted[block][0] += accepted
+            self._accepted[block][1] += 1
+            self._scale[idx] *= np.exp(0.01 * (accepted - 0.25))
+
+        return x
+
+    def step(self, x):
+        """Run one Gibbs iteration from the parameter vector ``x``."""
+
+        x = np.array(x, dtype=float)
+
+        b = self.draw_coefficients(self.pta.map_params(x))
+        x = self.draw_free_spectra(x, b)
+        x = self._metropolis("hyper", x, b, self._lnhyper)
+        x = self._metropolis("noise", x, b, self._lnnoise)
+
+        self.coefficients = b
+        return x
+
+    def sample(self, x0=None, niter=1000, save_coefficients=False):
+        """Run ``niter`` Gibbs iterations, starting from ``x0`` (by default, a
+        draw from the prior). Return the (niter, ndim) chain, and the
+        (niter, ncoefficients) coefficient chain if ``save_coefficients``."""
+
+        x = self._tovector(parameter.sample(self.pta.params)) if x0 is None else np.array(x0, dtype=float)
+
+        chain, bchain = np.zeros((niter, self.ndim)), []
+        for i in range(niter):
+            x = chain[i] = self.step(x)
+
+            if save_coefficients:
+                bchain.append(self.coefficients)
+
+        return (chain, np.array(bchain)) if save_coefficients else chain
+
+    @property
+    def acceptance(self):
+        """Metropolis acceptance rate for each block."""
+        return {block: acc / max(tot, 1) for block, (acc, tot) in self._accepted.items()}
@@ -3,9 +3,12 @@
 functions for use in other modules.
 """
 
+import collections
+
 import numpy as np
 from enterprise.signals.parameter import function
 import scipy.interpolate as sint
+import scipy.sparse as sps
 
 ######################################
 # Fourier-basis signal functions #####
@@ -26,28 +29,175 @@ __all__ = [
 ]
 
 
-@function
-def createfourierdesignmatrix_red(
-    toas, nmodes=30, Tspan=None, logf=False, fmin=None, fmax=None, pshift=False, modes=None, pseed=None
-):
-    """
-    Construct fourier design matrix from eq 11 of Lentati et al, 2013
-    :param toas: vector of time series in seconds
-    :param nmodes: number of fourier coefficients to use
-    :param freq: option to output frequencies
-    :param Tspan: option to some other Tspan
-    :param logf: use log frequency spacing
-    :param fmin: lower sampling frequency
-    :param fmax: upper sampling frequency
-    :param pshift: option to add random phase shift
-    :param pseed: option to provide phase shift seed
-    :param modes: option to provide explicit list or array of
-                  sampling frequencies
+# recently computed Fourier design matrices, keyed on TOAs, frequencies and phases,
+# so that the red, DM, chromatic, etc. bases of a pulsar share the trigonometric work
+_fourier_cache = collections.OrderedDict()
+_fourier_cache_size = 16
 
-    :return: F: fourier design matrix
-    :return: f: Sampling frequencies
+# number of harmonics between exact re-evaluations of sin/cos in the recurrence
+_fourier_reseed = 32
+
+
+def _fourier_sincos(toas, f, ranphase):
+    """Evaluate the sine/cosine modes sin(2 pi f t + phase), cos(2 pi f t + phase).
+    If the frequencies are equally spaced (as for harmonics of 1/Tspan), all modes
+    follow from one sin/cos pair per TOA by the angle-addition recurrence."""
+
+    N, nmodes = len(toas), len(f)
+    F = np.zeros((N, 2 * nmodes))
+
+    df = np.diff(f)
+    if nmodes > 1 and np.allclose(df, df[0], rtol=1e-12, atol=0):
+        sd, cd = np.sin(2 * np.pi * toas * df[0]), np.cos(2 * np.pi * toas * df[0])
+
+        for j in range(nmodes):
+            if j % _fourier_reseed == 0:
+                sn, cn = np.sin(2 * np.pi * toas * f[j]), np.cos(2 * np.pi * toas * f[j])
+            else:
+                sn, cn = sn * cd + cn * sd, cn * cd - sn * sd
+
+            F[:, 2 * j] = sn
+            F[:, 2 * j + 1] = cn
+
+        if np.any(ranphase):
+            sp, cp = np.sin(ranphase), np.cos(ranphase)
+            sn, cn = F[:, ::2].copy(), F[:, 1::2].copy()
+            F[:, ::2] = sn * cp + cn * sp
+            F[:, 1::2] = cn * cp - sn * sp
+    else:
+        F[:, ::2] = np.sin(2 * np.pi * toas[:, None] * f[None, :] + ranphase[None, :])
+        F[:, 1::2] = np.cos(2 * np.pi * toas[:, None] * f[None, :] + ranphase[None, :])
+
+    return F
+
+
+def _weighted_exp_sums(toas, weights, nu0, dnu, count):
+    """Evaluate sum_t weights_t exp(2 pi i nu_m t) for the equally spaced
+    frequencies nu_m = nu0 + m dnu, m = 0, ..., count - 1, by recurrence."""
+
+    sums = np.empty(count, dtype=complex)
+    step = np.exp(2j * np.pi * dnu * toas)
+
+    for m in range(count):
+        if m % _fourier_reseed == 0:
+            z = weights * np.exp(2j * np.pi * (nu0 + m * dnu) * toas)
+        else:
+            z *= step
+        sums[m] = z.sum()
+
+    return sums
+
+
+class FourierBasis(np.ndarray):
+    """
+    Sine/cosine design matrix (an ``np.ndarray``) that remembers its TOAs,
+    frequencies and phases. If the frequencies are equally spaced and there
+    are no phase shifts, the weighted products F1^T W F2 needed by white-noise
+    solves follow from the sums of w_t exp(2 pi i nu t) over the O(nmodes)
+    frequencies nu = f_i +- f_j, at a cost O(ntoa nmodes + nmodes^2) rather
+    than O(ntoa nmodes^2) (see ``gram``). Arrays derived from a FourierBasis
+    (by slicing, arithmetic, etc.) do not carry this information.
     """
 
+    # closed-form products are used from this many modes (on both sides)
+    min_modes = 40
+
+    def __new__(cls, F, toas=None, f=None, ranphase=None):
+        obj = np.asarray(F).view(cls)
+        obj.toas, obj.f, obj.ranphase = toas, f, ranphase
+        return obj
+
+    def __array_finalize__(self, obj):
+        self.toas = self.f = self.ranphase = None
+
+    def __array_wrap__(self, arr, context=None, return_scalar=False):
+        arr = arr.view(np.ndarray)
+        return arr[()] if return_scalar else arr
+
+    @property
+    def linear(self):
+        """Whether the basis has equally spaced frequencies and no phase shifts."""
+
+        if self.f is None or len(self.f) < 2 or self.shape != (len(self.toas), 2 * len(self.f)):
+            return False
+
+        df = np.diff(self.f)
+        return not np.any(self.ranphase) and np.allclose(df, df[0], rtol=1e-12, atol=0)
+
+    def gram(self, other, weights, sums=None):
+        """Return self^T diag(weights) other in closed form, or None if the two
+        bases do not have common TOAs and commensurate (linear) frequencies.
+
+        With a_i = 2 pi f_i t and b_j = 2 pi g_j t, the products follow from
+        P_ij = sum w exp(i (a_i + b_j)) and D_ij = sum w exp(i (a_i - b_j)),
+        which depend only on i + j and i - j respectively. The optional dict
+        ``sums`` stores these sums for reuse with the same ``weights``.
+        """
+
+        if not (self.linear and other.linear) or min(len(self.f), len(other.f)) < self.min_modes:
+            return None
+
+        dnu = self.f[1] - self.f[0]
+        if not np.isclose(other.f[1] - other.f[0], dnu, rtol=1e-12, atol=0):
+            return None
+
+        if self.toas is not other.toas and not np.array_equal(self.toas, other.toas):
+            return None
+
+        weights = np.asarray(weights, dtype=float)
+        toaskey = hash(self.toas.tobytes()) if sums is not None else None
+
+        def expsums(nu0, count):
+            key = (toaskey, nu0, dnu)
+            if sums is None or key not in sums or len(sums[key]) < count:
+                ret = _weighted_exp_sums(self.toas, weights, nu0, dnu, count)
+                if sums is None:
+                    return ret
+                sums[key] = ret
+            return sums[key][:count]
+
+        n1, n2 = len(self.f), len(other.f)
+        i, j = np.arange(n1)[:, None], np.arange(n2)[None, :]
+
+        P = expsums(self.f[0] + other.f[0], n1 + n2 - 1)[i + j]
+        if self.f[0] == other.f[0]:
+            # the weights are real, so D depends only on |i - j|, up to conjugation
+            D = expsums(0.0, max(n1, n2))[np.abs(i - j)]
+            D = np.where(i >= j, D, np.conj(D))
+        else:
+            D = expsums(self.f[0] - other.f[0] - (n2 - 1) * dnu, n1 + n2 - 1)[i - j + n2 - 1]
+
+        G = np.empty((2 * n1, 2 * n2))
+        G[::2, ::2] = 0.5 * (D.real - P.real)
+        G[::2, 1::2] = 0.5 * (P.imag + D.imag)
+        G[1::2, ::2] = 0.5 * (P.imag - D.imag)
+        G[1::2, 1::2] = 0.5 * (D.real + P.real)
+
+        return G
+
+
+def _get_fourier_basis(toas, f, ranphase):
+    """Return the (read-only, cached) sine/cosine design matrix."""
+
+    toas, f, ranphase = np.asarray(toas, dtype=float), np.asarray(f, dtype=float), np.asarray(ranphase, dtype=float)
+    key = (toas.tobytes(), f.tobytes(), ranphase.tobytes())
+
+    if key in _fourier_cache:
+        _fourier_cache.move_to_end(key)
+    else:
+        F = FourierBasis(_fourier_sincos(toas, f, ranphase), toas, f, ranphase)
+        F.flags.writeable = False
+
+        _fourier_cache[key] = F
+        if len(_fourier_cache) > _fourier_cache_size:
+            _fourier_cache.popitem(last=False)
+
+    return _fourier_cache[key]
+
+
+def _createfourierdesignmatrix_red(
+    toas, nmodes=30, Tspan=None, logf=False, fmin=None, fmax=None, pshift=False, modes=None, pseed=None
+):
     T = Tspan if Tspan is not None else toas.max() - toas.min()
 
     # define sampling frequencies
@@ -85,16 +235,200 @@ def createfourierdesignmatrix_red(
 
     Ffreqs = np.repeat(f, 2)
 
-    N = len(toas)
-    F = np.zeros((N, 2 * nmodes))
-
     # The sine/cosine modes
-    F[:, ::2] = np.sin(2 * np.pi * toas[:, None] * f[None, :] + ranphase[None, :])
-    F[:, 1::2] = np.cos(2 * np.pi * toas[:, None] * f[None, :] + ranphase[None, :])
+    F = _get_fourier_basis(toas, f, ranphase)
 
     return F, Ffreqs
 
 
+@function
+def createfourierdesignmatrix_red(
+    toas, nmodes=30, Tspan=None, logf=False, fmin=None, fmax=None, pshift=False, modes=None, pseed=None
+):
+    """
+    Construct fourier design matrix from eq 11 of Lentati et al, 2013
+    :param toas: vector of time series in seconds
+    :param nmodes: number of fourier coefficients to use
+    :param freq: option to output frequencies
+    :param Tspan: option to some other Tspan
+    :param logf: use log frequency spacing
+    :param fmin: lower sampling frequency
+    :param fmax: upper sampling frequency
+    :param pshift: option to add random phase shift
+    :param pseed: option to provide phase shift seed
+    :param modes: option to provide explicit list or array of
+                  sampling frequencies
+
+    :return: F: fourier design matrix
+    :return: f: Sampling frequencies
+    """
+
+    F, Ffreqs = _createfourierdesignmatrix_red(
+        toas, nmodes=nmodes, Tspan=Tspan, logf=logf, fmin=fmin, fmax=fmax, pshift=pshift, modes=modes, pseed=pseed
+    )
+
+    return FourierBasis(F.copy(), F.toas, F.f, F.ranphase), Ffreqs
+
+
+def linear_interp_matrix(x, t):
+    """
+    Sparse (CSR) matrix of linear-interpolation weights, such that
+    ``B @ y`` interpolates the values ``y`` at the sorted nodes ``x``
+    to the times ``t``. Each row has (at most) two non-zero entries.
+
+    :param x: sorted interpolation nodes
+    :param t: times at which to interpolate, within [x[0], x[-1]]
+
+    :return B: (len(t), len(x)) CSR interpolation matrix
+    """
+    t = np.asarray(t, dtype=float)
+    j = np.clip(np.searchsorted(x, t, side="right") - 1, 0, len(x) - 2)
+    w = (t - x[j]) / (x[j + 1] - x[j])
+
+    indices = np.stack([j, j + 1], axis=1).ravel()
+    data = np.stack([1.0 - w, w], axis=1).ravel()
+    indptr = np.arange(0, 2 * len(t) + 1, 2)
+
+    Bmat = sps.csr_matrix((data, indices, indptr), shape=(len(t), len(x)))
+    Bmat.eliminate_zeros()
+
+    return Bmat
+
+
+class LazyBasis(object):
+    """
+    Base class for bases that are kept in a structured form, which white-noise
+    solves can exploit, and that are only formed explicitly on request.
+    Indexing and numpy functions act on the materialized (dense) matrix.
+    """
+
+    ndim = 2
+
+    @property
+    def size(self):
+        return self.shape[0] * self.shape[1]
+
+    def materialize(self):
+        """Return the basis as a dense array or CSR matrix."""
+        return self.toarray()
+
+    @property
+    def T(self):
+        return self.toarray().T
+
+    def __getitem__(self, key):
+        return self.toarray()[key]
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self.toarray(), dtype=dtype)
+
+
+class ScaledBasis(LazyBasis):
+    """
+    Lazily row-scaled basis ``scale[:, None] * base``, where ``base`` is a
+    dense or sparse matrix, as used by DM and chromatic signals. White-noise
+    solves fold ``scale`` into the noise weights, so the scaled copy is never
+    formed, and signals with the same base (e.g., the red-noise and DM Fourier
+    bases of a pulsar) share its memory.
+
+    If the scale is constant over a few groups of TOAs (e.g., observing
+    frequencies, for a chromatic index that is being sampled), ``groups``
+    labels them; white-noise solves can then reuse per-group products of
+    the base when only the scale changes.
+
+    :param base: ntoa x nb dense or sparse basis
+    :param scale: vector of ntoa per-TOA scale factors
+    :param groups: optional integer labels (0, 1, ...) of TOAs that share
+        their scale factor, whatever the value of the signal parameters
+    """
+
+    # per-group products are not worth it for more groups than this
+    max_groups = 64
+
+    def __init__(self, base, scale, groups=None):
+        self.base = base
+        self.scale = np.asarray(scale, dtype=float)
+        self.groups = groups
+
+    @classmethod
+    def group_labels(cls, *columns):
+        """Label the TOAs by the distinct combinations of values in ``columns``
+        (e.g., their radio frequencies), or return None if there are more
+        than ``max_groups`` of them."""
+
+        labels = np.zeros(len(columns[0]), dtype=int)
+        for column in columns:
+            values, inverse = np.unique(column, return_inverse=True)
+            labels = labels * len(values) + inverse.ravel()
+
+        groups, labels = np.unique(labels, return_inverse=True)
+        return labels.ravel() if len(groups) <= cls.max_groups else None
+
+    @property
+    def shape(self):
+        return self.base.shape
+
+    def materialize(self):
+        if sps.issparse(self.base):
+            return sps.csr_matrix(self.base.multiply(self.scale[:, None]))
+        else:
+            return np.asarray(self.base) * self.scale[:, None]
+
+    def toarray(self):
+        Bmat = self.base.toarray() if sps.issparse(self.base) else np.asarray(self.base)
+        return Bmat * self.scale[:, None]
+
+    def dot(self, other):
+        ret = self.base.dot(other)
+        return self.scale * ret if ret.ndim == 1 else self.scale[:, None] * ret
+
+
+class BlockBasis(LazyBasis):
+    """
+    Basis made of dense blocks that each cover a subset of TOAs (rows) and a
+    range of columns, and is zero elsewhere, as for GP signals with a selection
+    (e.g., by backend). White-noise solves multiply each block only over the
+    TOAs it touches, so disjoint selections give block-diagonal products.
+
+    :param shape: (ntoa, nb) shape of the full basis
+    :param blocks: list of (rows, cols, block) tuples, with ``rows`` a sorted
+        index array, ``cols`` a slice, and ``block`` a dense len(rows) x
+        (number of columns) array
+    """
+
+    def __init__(self, shape, blocks):
+        self.shape = shape
+        self.blocks = blocks
+
+        rows = np.concatenate([rows for rows, _, _ in blocks]) if blocks else np.zeros(0, dtype=int)
+        self.disjoint = len(np.unique(rows)) == len(rows)
+
+    def toarray(self):
+        ret = np.zeros(self.shape)
+        for rows, cols, block in self.blocks:
+            ret[rows, cols] += block
+        return ret
+
+    def dot(self, other):
+        other = np.asarray(other)
+        ret = np.zeros((self.shape[0],) + other.shape[1:])
+        for rows, cols, block in self.blocks:
+            ret[rows] += np.dot(block, other[cols])
+        return ret
+
+
+def _scaled_basis(base, scale, lazy, *columns):
+    """Return the row-scaled basis ``scale[:, None] * base``: as a lazy
+    ``ScaledBasis`` if ``lazy`` (with TOAs grouped by the values in
+    ``columns``, if any), or else as a dense array or CSR matrix."""
+
+    if not lazy:
+        return ScaledBasis(base, scale).materialize()
+
+    groups = ScaledBasis.group_labels(*columns) if columns else None
+    return ScaledBasis(base, scale, groups=groups)
+
+
 @function
 def create_fft_time_basis(toas, nknots=30, Tspan=None, start_time=None, order=1):
     """
@@ -105,7 +439,7 @@ def create_fft_time_basis(toas, nknots=30, Tspan=None, start_time=None, order=1)
     :param start_time: option to set some other start epoch of basis
     :param order: order of the interpolation (1 = linear)
 
-    :return B: coarse time-domain design matrix
+    :return B: coarse time-domain design matrix (sparse CSR for order = 1)
     :return t_coarse: timestamps of coarse time grid
     """
     if start_time is None:
@@ -122,14 +456,28 @@ def create_fft_time_basis(toas, nknots=30, Tspan=None, start_time=None, order=1)
 
     t_fine = toas
     t_coarse = np.linspace(start_time, start_time + Tspan, nknots)
-    Bmat = sint.interp1d(t_coarse, np.identity(nknots), kind=order)(t_fine).T
+
+    if order == 1:
+        Bmat = linear_interp_matrix(t_coarse, t_fine)
+    else:
+        Bmat = sint.interp1d(t_coarse, np.identity(nknots), kind=order)(t_fine).T
 
     return Bmat, t_coarse
 
 
 @function
 def createfourierdesignmatrix_dm(
-    toas, freqs, nmodes=30, Tspan=None, pshift=False, fref=1400, logf=False, fmin=None, fmax=None, modes=None
+    toas,
+    freqs,
+    nmodes=30,
+    Tspan=None,
+    pshift=False,
+    fref=1400,
+    logf=False,
+    fmin=None,
+    fmax=None,
+    modes=None,
+    lazy=False,
 ):
     """
     Construct DM-variation fourier design matrix. Current
@@ -147,24 +495,25 @@ def createfourierdesignmatrix_dm(
     :param fmax: upper sampling frequency
     :param modes: option to provide explicit list or array of
                   sampling frequencies
+    :param lazy: return a lazily scaled ``ScaledBasis`` rather than the scaled matrix
 
     :return: F: DM-variation fourier design matrix
     :return: f: Sampling frequencies
     """
 
     # get base fourier design matrix and frequencies
-    F, Ffreqs = createfourierdesignmatrix_red(
+    F, Ffreqs = _createfourierdesignmatrix_red(
         toas, nmodes=nmodes, Tspan=Tspan, logf=logf, fmin=fmin, fmax=fmax, pshift=pshift, modes=modes
     )
 
     # compute the DM-variation vectors
     Dm = (fref / freqs) ** 2
 
-    return F * Dm[:, None], Ffreqs
+    return _scaled_basis(F, Dm, lazy), Ffreqs
 
 
 @function
-def create_fft_time_basis_dm(toas, freqs, nknots=30, Tspan=None, start_time=None, fref=1400, order=1):
+def create_fft_time_basis_dm(toas, freqs, nknots=30, Tspan=None, start_time=None, fref=1400, order=1, lazy=False):
     """
     Construct DM-variation linear interpolation design matrix. Current
     normalization expresses DM signal as a deviation [seconds]
@@ -177,6 +526,7 @@ def create_fft_time_basis_dm(toas, freqs, nknots=30, Tspan=None, start_time=None
     :param start_time: option to set some other start epoch of basis
     :param fref: reference frequency [MHz]
     :param order: order of the interpolation (1 = linear)
+    :param lazy: return a lazily scaled ``ScaledBasis`` rather than the scaled matrix
 
     :return B: coarse time-domain design matrix
     :return t_coarse: timestamps of coarse time grid
@@ -188,12 +538,23 @@ def create_fft_time_basis_dm(toas, freqs, nknots=30, Tspan=None, start_time=None
     # compute the DM-variation vectors
     Dm = (fref / freqs) ** 2
 
-    return Bmat * Dm[:, None], t_coarse
+    return _scaled_basis(Bmat, Dm, lazy), t_coarse
 
 
 @function
 def createfourierdesignmatrix_dm_tn(
-    toas, freqs, nmodes=30, Tspan=None, pshift=False, fref=1400, logf=False, fmin=None, fmax=None, idx=2, modes=None
+    toas,
+    freqs,
+    nmodes=30,
+    Tspan=None,
+    pshift=False,
+    fref=1400,
+    logf=False,
+    fmin=None,
+    fmax=None,
+    idx=2,
+    modes=None,
+    lazy=False,
 ):
     """
     Construct DM-variation fourier design matrix. Current
@@ -212,13 +573,14 @@ def createfourierdesignmatrix_dm_tn(
     :param idx: index of the radio frequency dependence
     :param modes: option to provide explicit list or array of
                   sampling frequencies
+    :param lazy: return a lazily scaled ``ScaledBasis`` rather than the scaled matrix
 
     :return: F: DM-variation fourier design matrix
     :return: f: Sampling frequencies
     """
 
     # get base fourier design matrix and frequencies
-    F, Ffreqs = createfourierdesignmatrix_red(
+    F, Ffreqs = _createfourierdesignmatrix_red(
         toas, nmodes=nmodes, Tspan=Tspan, logf=logf, fmin=fmin, fmax=fmax, pshift=pshift, modes=modes
     )
 
@@ -226,7 +588,7 @@ def createfourierdesignmatrix_dm_tn(
     # amplitude normalization: sqrt(12)*pi, scaling to 1 MHz from 1400 MHz, DM constant: 2.41e-4
     Dm = (fref / freqs) ** idx * np.sqrt(12) * np.pi / 1400 / 1400 / 2.41e-4
 
-    return F * Dm[:, None], Ffreqs
+    return _scaled_basis(F, Dm, lazy, freqs), Ffreqs
 
 
 @function
@@ -264,7 +626,7 @@ def createfourierdesignmatrix_env(
     """
 
     # get base fourier design matrix and frequencies
-    F, Ffreqs = createfourierdesignmatrix_red(
+    F, Ffreqs = _createfourierdesignmatrix_red(
         toas, nmodes=nmodes, Tspan=Tspan, logf=logf, fmin=fmin, fmax=fmax, modes=modes
     )
 
@@ -299,7 +661,7 @@ def createfourierdesignmatrix_ephem(toas, pos, nmodes=30, Tspan=None):
     :return: f: Sampling frequencies (6*nmodes)
     """
 
-    F0, F0f = createfourierdesignmatrix_red(toas, nmodes=nmodes, Tspan=Tspan)
+    F0, F0f = _createfourierdesignmatrix_red(toas, nmodes=nmodes, Tspan=Tspan)
 
     F1 = np.zeros((len(toas), nmodes, 2, 3), "d")
     F1[:, :, 0, :] = F0[:, 0::2, np.newaxis]
@@ -324,7 +686,7 @@ def createfourierdesignmatrix_eph(
 
 @function
 def createfourierdesignmatrix_chromatic(
-    toas, freqs, nmodes=30, Tspan=None, logf=False, fmin=None, fmax=None, idx=4, modes=None
+    toas, freqs, nmodes=30, Tspan=None, logf=False, fmin=None, fmax=None, idx=4, modes=None, lazy=False
 ):
     """
     Construct Scattering-variation fourier design matrix.
@@ -340,24 +702,27 @@ def createfourierdesignmatrix_chromatic(
     :param idx: Index of chromatic effects
     :param modes: option to provide explicit list or array of
                   sampling frequencies
+    :param lazy: return a lazily scaled ``ScaledBasis`` rather than the scaled matrix
 
     :return: F: Chromatic-variation fourier design matrix
     :return: f: Sampling frequencies
     """
 
     # get base fourier design matrix and frequencies
-    F, Ffreqs = createfourierdesignmatrix_red(
+    F, Ffreqs = _createfourierdesignmatrix_red(
         toas, nmodes=nmodes, Tspan=Tspan, logf=logf, fmin=fmin, fmax=fmax, modes=modes
     )
 
     # compute the DM-variation vectors
     Dm = (1400 / freqs) ** idx
 
-    return F * Dm[:, None], Ffreqs
+    return _scaled_basis(F, Dm, lazy, freqs), Ffreqs
 
 
 @function
-def create_fft_time_basis_chromatic(toas, freqs, nknots=30, Tspan=None, start_time=None, fref=1400, idx=4, order=1):
+def create_fft_time_basis_chromatic(
+    toas, freqs, nknots=30, Tspan=None, start_time=None, fref=1400, idx=4, order=1, lazy=False
+):
     """
     Construct scattering linear interpolation design matrix. Current
     normalization expresses DM signal as a deviation [seconds]
@@ -371,6 +736,7 @@ def create_fft_time_basis_chromatic(toas, freqs, nknots=30, Tspan=None, start_ti
     :param fref: reference frequency [MHz]
     :param idx: Index of chromatic effects
     :param order: order of the interpolation (1 = linear)
+    :param lazy: return a lazily scaled ``ScaledBasis`` rather than the scaled matrix
 
     :return B: coarse time-domain design matrix
     :return t_coarse: timestamps of coarse time grid
@@ -382,7 +748,7 @@ def create_fft_time_basis_chromatic(toas, freqs, nknots=30, Tspan=None, start_ti
     # compute the DM-variation vectors
     Dm = (fref / freqs) ** idx
 
-    return Bmat * Dm[:, None], t_coarse
+    return _scaled_basis(Bmat, Dm, lazy, freqs), t_coarse
 
 
 @function
@@ -403,6 +769,7 @@ def createfourierdesignmatrix_general(
     modes=None,
     pshift=None,
     pseed=None,
+    lazy=False,
 ):
     """
     Construct fourier design matrix with possibility of adding selection and/or chromatic index envelope.
@@ -420,6 +787,7 @@ def createfourierdesignmatrix_general(
     :param idx: Index of chromatic effects
     :param modes: option to provide explicit list or array of
                   sampling frequencies
+    :param lazy: return a lazily scaled ``ScaledBasis`` rather than the scaled matrix
 
     :return: F: fourier design matrix
     :return: f: Sampling frequencies
@@ -429,20 +797,24 @@ def createfourierdesignmatrix_general(
         Tspan = sel_toas.max() - sel_toas.min()
 
     # get base fourier design matrix and frequencies
-    F, Ffreqs = createfourierdesignmatrix_red(
+    F, Ffreqs = _createfourierdesignmatrix_red(
         toas, nmodes=nmodes, Tspan=Tspan, logf=logf, fmin=fmin, fmax=fmax, modes=modes, pshift=pshift, pseed=pseed
     )
 
+    if not idx and not flagval:
+        return FourierBasis(F.copy(), F.toas, F.f, F.ranphase), Ffreqs
+
     # compute the chromatic-variation vectors
+    scale = np.ones(len(toas))
     if idx:
         if tndm:
-            chrom_fac = (1400 / freqs) ** idx * np.sqrt(12) * np.pi / 1400 / 1400 / 2.41e-4
+            scale = (1400 / freqs) ** idx * np.sqrt(12) * np.pi / 1400 / 1400 / 2.41e-4
         else:
-            chrom_fac = (1400 / freqs) ** idx
-        F *= chrom_fac[:, None]
+            scale = (1400 / freqs) ** idx
 
     # compute the mask for the selection
     if flagval:
-        F *= np.array([flags[flagname] == flagval] * F.shape[1]).T
+        scale = scale * np.asarray(flags[flagname] == flagval)
 
-    return F, Ffreqs
+    columns = (freqs, scale != 0) if idx else ()
+    return _scaled_basis(F, scale, lazy, *columns), Ffreqs
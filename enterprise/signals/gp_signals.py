@@ -9,10 +9,12 @@ import itertools
 import logging
 
 import numpy as np
+import scipy.linalg as sl
 import scipy.sparse as sps
 from sksparse.cholmod import cholesky
 
 from enterprise.signals import parameter, selections, signal_base, utils
+from enterprise.signals.gp_bases import BlockBasis, FourierBasis, LazyBasis, ScaledBasis
 from enterprise.signals.parameter import function
 from enterprise.signals.selections import Selection
 from enterprise.signals.utils import KernelMatrix
@@ -48,6 +50,8 @@ def BasisGP(
 
             self._keys = sorted(sel.masks.keys())
             self._masks = [sel.masks[key] for key in self._keys]
+            self._indices = [sel.indices[key] for key in self._keys]
+            self._ntoas = len(psr.toas)
             self._prior, self._bases = {}, {}
             self._params, self._coefficients = {}, {}
 
@@ -104,24 +108,89 @@ def BasisGP(
         @signal_base.cache_call("basis_params", limit=1)
         def _construct_basis(self, params={}):
             basis, self._labels = {}, {}
-            for key, mask in zip(self._keys, self._masks):
-                basis[key], self._labels[key] = self._bases[key](params=params, mask=mask)
+            for key, idx in zip(self._keys, self._indices):
+                # DM and chromatic bases can be returned lazily scaled
+                basis[key], self._labels[key] = self._bases[key](params=params, mask=idx, lazy=True)
 
             nc = sum(F.shape[1] for F in basis.values())
-            self._basis = np.zeros((len(self._masks[0]), nc))
 
             # TODO: should this be defined here? it will cache phi
             self._phi = KernelMatrix(nc)
 
             self._slices = {}
             nctot = 0
-            for key, mask in zip(self._keys, self._masks):
-                Fmat = basis[key]
-                nn = Fmat.shape[1]
-                self._basis[mask, nctot : nn + nctot] = Fmat
+            for key in self._keys:
+                nn = basis[key].shape[1]
                 self._slices.update({key: slice(nctot, nn + nctot)})
                 nctot += nn
 
+            # keep lazily-scaled (DM, chromatic) bases lazy, as long as
+            # every TOA has a single scale factor
+            scaled = all(isinstance(Fmat, ScaledBasis) for Fmat in basis.values())
+            if scaled and np.sum(self._masks, axis=0).max() <= 1:
+                if len(self._keys) == 1 and np.all(self._masks[0]):
+                    self._basis = basis[self._keys[0]]
+                else:
+                    self._basis = self._scaled_basis(basis, nc)
+            else:
+                bases = {key: F.materialize() if isinstance(F, LazyBasis) else F for key, F in basis.items()}
+                self._basis = self._embed_basis(bases, nc)
+
+        def _scaled_basis(self, basis, nc):
+            # TOAs outside all masks form group 0, with zero scale
+            ntoa = self._ntoas
+            scale, groups, ngroups = np.zeros(ntoa), np.zeros(ntoa, dtype=int), 1
+            for key, idx in zip(self._keys, self._indices):
+                scale[idx] = basis[key].scale
+                if groups is not None and basis[key].groups is not None:
+                    groups[idx] = basis[key].groups + ngroups
+                    ngroups += basis[key].groups.max() + 1
+                else:
+                    groups = None
+
+            if groups is not None and ngroups > ScaledBasis.max_groups:
+                groups = None
+
+            # reuse the embedded base if only the scales have changed
+            bases = [basis[key].base for key in self._keys]
+            cached = getattr(self, "_embedded", None)
+            if cached is None or len(cached[0]) != len(bases) or any(b1 is not b2 for b1, b2 in zip(cached[0], bases)):
+                self._embedded = (bases, self._embed_basis(dict(zip(self._keys, bases)), nc))
+
+            return ScaledBasis(self._embedded[1], scale, groups=groups)
+
+        def _embed_basis(self, basis, nc):
+            # keep a Fourier basis over all TOAs as is, for its closed-form products
+            if len(self._keys) == 1 and np.all(self._masks[0]) and isinstance(basis[self._keys[0]], FourierBasis):
+                return basis[self._keys[0]]
+
+            # keep sparse (e.g., interpolation) bases sparse
+            if all(sps.issparse(Fmat) for Fmat in basis.values()):
+                return self._sparse_basis(basis, nc)
+
+            # keep the dense bases of a selection (e.g., by backend) as blocks
+            dense = not any(sps.issparse(Fmat) for Fmat in basis.values())
+            if dense and (len(self._keys) > 1 or not np.all(self._masks[0])):
+                rows = np.arange(self._ntoas)
+                blocks = [(rows[idx], self._slices[key], basis[key]) for key, idx in zip(self._keys, self._indices)]
+                return BlockBasis((self._ntoas, nc), blocks)
+
+            Tmat = np.zeros((self._ntoas, nc))
+            for key, idx in zip(self._keys, self._indices):
+                Tmat[idx, self._slices[key]] = basis[key].toarray() if sps.issparse(basis[key]) else basis[key]
+            return Tmat
+
+        def _sparse_basis(self, basis, nc):
+            rows, cols, data = [], [], []
+            for key, idx in zip(self._keys, self._indices):
+                Fmat = basis[key].tocoo()
+                rows.append(np.arange(self._ntoas)[idx][Fmat.row])
+                cols.append(Fmat.col + self._slices[key].start)
+                data.append(Fmat.data)
+
+            shape = (self._ntoas, nc)
+            return sps.csr_matrix((np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))), shape=shape)
+
         @signal_base.cache_call("prior_params")
         def _construct_prior(self, params):
             for key, slc in self._slices.items():
@@ -160,7 +229,7 @@ def BasisGP(
                     p = self._coefficients[key]
                     c[slc] = params[p.name] if p.name in params else p.value
 
-                return np.dot(self._basis, c)
+                return self._basis.dot(c)
 
             def get_basis(self, params={}):
                 return None
@@ -467,7 +536,7 @@ def BasisCommonGP(priorFunction, basisFunction, orfFunction, coefficients=False,
 
                 p = self._coefficients[""]
                 c = params[p.name] if p.name in params else p.value
-                return np.dot(self._basis, c)
+                return self._basis.dot(c)
 
             def get_basis(self, params={}):
                 return None
@@ -772,11 +841,13 @@ def WidebandTimingModel(
             dm_select = selection(psr)
             self._dm_keys = list(sorted(dm_select.masks.keys()))
             self._dm_masks = [dm_select.masks[key] for key in self._dm_keys]
+            self._dm_indices = [dm_select.indices[key] for key in self._dm_keys]
 
             # make selection for DMJUMPs
             dmjump_select = dmjump_selection(psr)
             self._dmjump_keys = list(sorted(dmjump_select.masks.keys()))
             self._dmjump_masks = [dmjump_select.masks[key] for key in self._dmjump_keys]
+            self._dmjump_indices = [dmjump_select.indices[key] for key in self._dmjump_keys]
 
             if self._dmjump_keys == [""] and dmjump is not None:
                 raise ValueError("WidebandTimingModel: can only do DMJUMP with more than one selection.")
@@ -897,28 +968,23 @@ def WidebandTimingModel(
         def get_dm(self, params):
             """Return DMJUMP-adjusted DM measurements."""
 
-            return (
-                sum(
-                    (params[jump.name] if jump.name in params else jump.value) * mask
-                    for jump, mask in zip(self._dmjumps, self._dmjump_masks)
-                )
-                + self._dm
-            )
+            dm = self._dm.copy()
+            for jump, idx in zip(self._dmjumps, self._dmjump_indices):
+                dm[idx] += params[jump.name] if jump.name in params else jump.value
+            return dm
 
         @signal_base.cache_call(["delay_params"])
         def get_dme(self, params):
             """Return EFAC- and EQUAD-weighted DM errors."""
 
-            efac_vec = sum(
-                (params[efac.name] if efac.name in params else efac.value) * mask
-                for efac, mask in zip(self._dmefacs, self._dm_masks)
-            )
+            efac_vec = np.zeros(self._ntoas)
+            for efac, idx in zip(self._dmefacs, self._dm_indices):
+                efac_vec[idx] += params[efac.name] if efac.name in params else efac.value
 
             if self._log10_dmequads:
-                equad_vec = sum(
-                    10 ** (params[equad.name] if equad.name in params else equad.value) * mask
-                    for equad, mask in zip(self._log10_dmequads, self._dm_masks)
-                )
+                equad_vec = np.zeros(self._ntoas)
+                for equad, idx in zip(self._log10_dmequads, self._dm_indices):
+                    equad_vec[idx] += 10 ** (params[equad.name] if equad.name in params else equad.value)
 
                 return np.sqrt(efac_vec**2 * (self._dmerr**2 + equad_vec**2))
             else:
@@ -1022,6 +1088,10 @@ def MarginalizingTimingModel(name="marginalizing_linear_timing_model", use_svd=F
 
             self._params = {}
 
+            # factorizations of M^T N^-1 M, shared by all the MarginalizingNmat
+            # objects built for this pulsar, one per white-noise parameter set
+            self._factors = MarginalizingFactorCache()
+
         @property
         def ndiag_params(self):
             return []
@@ -1029,21 +1099,135 @@ def MarginalizingTimingModel(name="marginalizing_linear_timing_model", use_svd=F
         # there are none, but to be general...
         @signal_base.cache_call("ndiag_params")
         def get_ndiag(self, params):
-            return MarginalizingNmat(self.Mmat()[0])
+            return MarginalizingNmat(self.Mmat()[0], cache=self._factors)
+
+    return TimingModel
+
+
+def ProjectedTimingModel(name="projected_linear_timing_model", use_svd=False, normed=True):
+    """Class factory for projected linear timing model signals.
+
+    The timing model is marginalized analytically, as in
+    ``MarginalizingTimingModel``, but by projecting the whitened residuals and
+    GP bases onto the orthogonal complement of the whitened design matrix
+    (the G-matrix formalism). The projection is computed once per pulsar and
+    white-noise setting, so it is best suited to runs with fixed white noise;
+    the remaining likelihood then contains no timing-model columns in TNT or
+    Sigma. Only diagonal white noise is supported; ECORR should be modeled
+    with ``EcorrBasisModel``."""
+
+    basisFunction = get_timing_model_basis(use_svd, normed)
+
+    class TimingModel(signal_base.Signal):
+        signal_type = "white noise"
+        signal_name = "projected linear timing model"
+        signal_id = name
+
+        def __init__(self, psr):
+            super(TimingModel, self).__init__(psr)
+            self.name = self.psrname + "_" + self.signal_id
+
+            pname = "_".join([psr.name, name])
+            self.Mmat = basisFunction(pname, psr=psr)
+
+            self._params = {}
+            self._projections = MarginalizingFactorCache()
+
+        @property
+        def ndiag_params(self):
+            return []
+
+        @signal_base.cache_call("ndiag_params")
+        def get_ndiag(self, params):
+            return ProjectedNmat(self.Mmat()[0], cache=self._projections)
 
     return TimingModel
 
 
+class DenseCholeskyFactor(object):
+    """Dense (LAPACK) Cholesky factor of a symmetric positive-definite matrix,
+    with the same call/logdet interface as a CHOLMOD ``Factor``."""
+
+    def __init__(self, A):
+        self.cf = sl.cho_factor(A, lower=True)
+
+    def __call__(self, other):
+        return sl.cho_solve(self.cf, other)
+
+    def logdet(self):
+        return 2.0 * np.sum(np.log(np.diag(self.cf[0])))
+
+    def solve_Lt(self, other, use_LDLt_decomposition=False):
+        return sl.solve_triangular(self.cf[0], other, lower=True, trans="T")
+
+    def apply_Pt(self, other):
+        return other
+
+
+class MarginalizingFactorCache(object):
+    """Bounded cache of the timing-model factorizations :math:`M^T N^{-1} M`.
+
+    Entries are keyed on the identity of the white-noise matrix they were
+    computed for. Since ``SignalCollection.get_ndiag`` is cached on the
+    white-noise parameters, this amounts to one entry per white-noise
+    parameter set; only the last ``limit`` of them are kept alive.
+    (``MarginalizingNmat`` also uses it for its products with the bases and
+    the residuals, keyed on tuples of objects that are matched by identity.)
+    Since the cache holds on to its keys, their identities cannot be reused."""
+
+    def __init__(self, limit=2):
+        self.limit = limit
+        self._keys, self._factors = [], []
+
+    def __len__(self):
+        return len(self._keys)
+
+    @staticmethod
+    def _match(key1, key2):
+        if isinstance(key1, tuple) and isinstance(key2, tuple):
+            return len(key1) == len(key2) and all(k1 is k2 for k1, k2 in zip(key1, key2))
+        else:
+            return key1 is key2
+
+    def get(self, Nmat, factorize):
+        for key, factor in zip(self._keys, self._factors):
+            if self._match(key, Nmat):
+                return factor
+
+        factor = factorize()
+
+        self._keys.append(Nmat)
+        self._factors.append(factor)
+        if len(self._keys) > self.limit:
+            del self._keys[0], self._factors[0]
+
+        return factor
+
+
 class MarginalizingNmat(object):
-    def __init__(self, Mmat, Nmat=0):
+    # timing models with more columns than this are factorized with CHOLMOD,
+    # smaller (dense) ones with LAPACK
+    sparse_threshold = 1000
+
+    def __init__(self, Mmat, Nmat=0, cache=None):
         self.Mmat, self.Nmat = Mmat, Nmat
         self.Mprior = Mmat.shape[1] * np.log(1e40)
+        self._cache = MarginalizingFactorCache() if cache is None else cache
+
+        # products with each of the signal bases, which are all needed
+        # when TNT is computed blockwise (see SignalCollection.get_TNT),
+        # and with the residuals
+        self._products = {
+            "MNF": MarginalizingFactorCache(limit=16),
+            "MNMMNF": MarginalizingFactorCache(limit=16),
+            "MNr": MarginalizingFactorCache(limit=4),
+        }
 
     def __add__(self, other):
         if isinstance(other, MarginalizingNmat):
             raise ValueError("Cannot combine multiple MarginalizingNmat objects.")
         elif isinstance(other, np.ndarray) or hasattr(other, "solve"):
-            return MarginalizingNmat(self.Mmat, self.Nmat + other)
+            return type(self)(self.Mmat, self.Nmat + other, cache=self._cache)
         elif other == 0:
             return self
         else:
@@ -1052,24 +1236,30 @@ class MarginalizingNmat(object):
     def __radd__(self, other):
         return self.__add__(other)
 
-    # in Python 3.8: @functools.cached_property
     @property
-    @functools.lru_cache()
+    def structured_solve(self):
+        return getattr(self.Nmat, "structured_solve", False)
+
+    @property
     def cf(self):
-        MNM = sps.csc_matrix(self.Nmat.solve(self.Mmat, left_array=self.Mmat))
-        return cholesky(MNM)
+        return self._cache.get(self.Nmat, self._factorize)
+
+    def _factorize(self):
+        MNM = self.Nmat.solve(self.Mmat, left_array=self.Mmat)
+
+        if MNM.shape[0] > self.sparse_threshold:
+            return cholesky(sps.csc_matrix(MNM))
+        else:
+            return DenseCholeskyFactor(MNM)
 
-    @signal_base.simplememobyid
     def MNr(self, res):
-        return self.Nmat.solve(res, left_array=self.Mmat)
+        return self._products["MNr"].get((self.Nmat, res), lambda: self.Nmat.solve(res, left_array=self.Mmat))
 
-    @signal_base.simplememobyid
     def MNF(self, T):
-        return self.Nmat.solve(T, left_array=self.Mmat)
+        return self._products["MNF"].get(T, lambda: self.Nmat.solve(T, left_array=self.Mmat))
 
-    @signal_base.simplememobyid
     def MNMMNF(self, T):
-        return self.cf(self.MNF(T))
+        return self._products["MNMMNF"].get(T, lambda: self.cf(self.MNF(T)))
 
     # we're ignoring logdet = True for two-dimensional cases, but OK
     def solve(self, right, left_array=None, logdet=False):
@@ -1100,3 +1290,61 @@ class MarginalizingNmat(object):
             return LNT - np.tensordot(self.MNF(L), self.MNMMNF(T), (0, 0))
         else:
             raise ValueError("Incorrect arguments given to MarginalizingNmat.solve.")
+
+
+class ProjectedNmat(MarginalizingNmat):
+    """Timing-model marginalizing noise matrix that works in the whitened,
+    projected space :math:`W = (I - Q Q^T) N^{-1/2}`, where :math:`Q` is an
+    orthonormal basis of :math:`N^{-1/2} M`. Then :math:`x^T W^T W y` equals
+    the timing-model marginalized product computed by ``MarginalizingNmat``."""
+
+    def __init__(self, Mmat, Nmat=0, cache=None):
+        super(ProjectedNmat, self).__init__(Mmat, Nmat, cache=cache)
+        self._products["WT"] = MarginalizingFactorCache(limit=16)
+        self._products["Wr"] = MarginalizingFactorCache(limit=4)
+
+    @property
+    def projection(self):
+        return self._cache.get(self.Nmat, self._project)
+
+    def _project(self):
+        if not isinstance(self.Nmat, np.ndarray) or self.Nmat.ndim != 1:
+            raise TypeError("ProjectedTimingModel requires diagonal white noise; use EcorrBasisModel for ECORR.")
+
+        isqrtN = 1.0 / np.sqrt(self.Nmat)
+        Q, R = sl.qr(isqrtN[:, None] * self.Mmat, mode="economic")
+        logdet = np.sum(np.log(self.Nmat)) + 2.0 * np.sum(np.log(np.abs(np.diag(R)))) + self.Mprior
+
+        return isqrtN, Q, logdet
+
+    def _whiten(self, x):
+        isqrtN, Q, _ = self.projection
+
+        if isinstance(x, LazyBasis):
+            x = x.materialize()
+
+        if sps.issparse(x):
+            Wx = x.multiply(isqrtN[:, None]).toarray()
+        else:
+            Wx = isqrtN * x if x.ndim == 1 else isqrtN[:, None] * x
+        return Wx - np.dot(Q, np.dot(Q.T, Wx))
+
+    # separate caches, so that residuals and bases do not evict each other
+    def Wr(self, res):
+        return self._products["Wr"].get((self.Nmat, res), lambda: self._whiten(res))
+
+    def WT(self, T):
+        return self._products["WT"].get(T, lambda: self._whiten(T))
+
+    def _projected(self, x):
+        return self.Wr(x) if x.ndim == 1 else self.WT(x)
+
+    def solve(self, right, left_array=None, logdet=False):
+        if left_array is None or right.ndim > 2 or left_array.ndim > 2:
+            raise ValueError("Incorrect arguments given to ProjectedNmat.solve.")
+
+        Wright = self._projected(right)
+        Wleft = Wright if left_array is right else self._projected(left_array)
+
+        ret = np.dot(Wleft.T, Wright)
+        return (ret, self.projection[2]) if logdet else ret
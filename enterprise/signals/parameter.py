@@ -5,10 +5,13 @@ import functools
 import inspect
 
 import numpy as np
+import scipy.linalg as sl
 from scipy.special import erf as _erf
+from scipy.special import ndtr as _ndtr
+from scipy.special import ndtri as _ndtri
 import scipy.stats as sstats
 
-from enterprise.signals.selections import selection_func
+from enterprise.signals.selections import apply_mask, call_me_maybe, selection_func
 
 
 def sample(parlist):
@@ -320,12 +323,11 @@ def TruncNormalSampler(mu, sigma, pmin, pmax, norm=None, size=None):
     """
     samp = np.random.normal(mu, sigma, size)
     if isinstance(samp, np.ndarray):
+        # any of the arguments may be a vector (e.g., a batch of hyperparameter values)
+        mu, sigma, pmin, pmax = (np.broadcast_to(arg, samp.shape) for arg in (mu, sigma, pmin, pmax))
         mask = np.logical_or(samp > pmax, samp < pmin)
         while np.any(mask):
-            if isinstance(mu, np.ndarray):
-                samp[mask] = np.random.normal(mu[mask], sigma[mask], size=sum(mask))
-            else:
-                samp[mask] = np.random.normal(mu, sigma, size=sum(mask))
+            samp[mask] = np.random.normal(mu[mask], sigma[mask], size=sum(mask))
             mask = np.logical_or(samp > pmax, samp < pmin)
     else:
         while samp > pmax or samp < pmin:
@@ -416,6 +418,259 @@ def LinearExp(pmin, pmax, size=None):
     return LinearExp
 
 
+def _prior_family(par):
+    """Return the name of the built-in prior family of ``par``, or None if its
+    prior is user-defined or depends on other parameters."""
+
+    prior = getattr(par, "prior", None)
+    if prior is None or prior._params or prior._funcs:
+        return None
+
+    # the sampler and PPF must also be those of the family
+    funcs = (
+        getattr(prior._func, "__wrapped__", None),
+        par._sampler,
+        None if par.ppf is None else getattr(par.ppf._func, "__wrapped__", None),
+    )
+    families = {
+        (UniformPrior, UniformSampler, UniformPPF): "uniform",
+        (NormalPrior, NormalSampler, NormalPPF): "normal",
+        (TruncNormalPrior, TruncNormalSampler, None): "truncnormal",
+        (LinearExpPrior, LinearExpSampler, LinearExpPPF): "linearexp",
+    }
+
+    return families.get(funcs)
+
+
+class PriorBundle(object):
+    """Log-prior and PPF for a list of Parameters, evaluated on flat parameter
+    vectors (or on 2D arrays of them, one vector per row). Parameters with
+    numeric Uniform, Normal, TruncNormal and LinearExp priors are grouped by
+    family, with their arguments stored in arrays indexed by vector position;
+    all other parameters (user-defined priors, hyperparameters) fall back to
+    ``Parameter.get_logpdf`` and ``Parameter.get_ppf``."""
+
+    _keys = {
+        "uniform": ["pmin", "pmax"],
+        "normal": ["mu", "sigma"],
+        "truncnormal": ["mu", "sigma", "pmin", "pmax"],
+        "linearexp": ["pmin", "pmax"],
+    }
+
+    def __init__(self, params):
+        self.params = list(params)
+
+        entries = {family: [] for family in self._keys}
+        self._mvnormal, self._other, self._slices = [], [], []
+
+        ct = 0
+        for par in self.params:
+            n = par.size if par.size else 1
+            idx, slc = np.arange(ct, ct + n), slice(ct, ct + n)
+            self._slices.append((par, slc))
+            ct += n
+
+            family = _prior_family(par)
+            if family is None:
+                self._other.append((par, slc))
+                continue
+
+            defaults = par.prior._defaults
+            if family == "normal" and np.ndim(defaults["sigma"]) == 2:
+                try:
+                    mu = np.broadcast_to(np.asarray(defaults["mu"], dtype=float), (n,))
+                    cf = sl.cho_factor(np.broadcast_to(defaults["sigma"], (n, n)).astype(float), lower=True)
+                except (TypeError, ValueError, np.linalg.LinAlgError):
+                    self._other.append((par, slc))
+                else:
+                    logdet = 2 * np.sum(np.log(np.diag(cf[0]))) + n * np.log(2 * np.pi)
+                    self._mvnormal.append((idx, mu, cf, logdet))
+                continue
+
+            try:
+                args = [np.broadcast_to(np.asarray(defaults[key], dtype=float), (n,)) for key in self._keys[family]]
+            except (TypeError, ValueError):
+                self._other.append((par, slc))
+                continue
+
+            if family in ["uniform", "linearexp"] and np.any(args[0] >= args[1]):
+                self._other.append((par, slc))
+                continue
+
+            entries[family].append([idx] + args)
+
+        self.ndim = ct
+
+        # parameters drawn by their own samplers, after their hyperparameters
+        params = set(self.params)
+        done = params - set(par for par, _ in self._other)
+        self._sampling_order, pending = [], list(self._other)
+        while pending:
+            ready = [(par, slc) for par, slc in pending if all(p in done for p in par.params[1:] if p in params)]
+            ready = ready or pending
+
+            self._sampling_order += ready
+            done.update(par for par, _ in ready)
+            pending = [entry for entry in pending if entry not in ready]
+
+        # stack each family into arrays over all of its vector positions
+        self._groups = {}
+        for family, entry in entries.items():
+            if entry:
+                self._groups[family] = [np.concatenate(arg) for arg in zip(*entry)]
+
+        if "uniform" in self._groups:
+            idx, pmin, pmax = self._groups["uniform"]
+            self._groups["uniform"].append(-np.log(pmax - pmin))
+
+        if "normal" in self._groups:
+            idx, mu, sigma = self._groups["normal"]
+            self._groups["normal"].append(-np.log(sigma) - 0.5 * np.log(2 * np.pi))
+
+        if "truncnormal" in self._groups:
+            idx, mu, sigma, pmin, pmax = self._groups["truncnormal"]
+            a, b = (pmin - mu) / sigma, (pmax - mu) / sigma
+
+            # invert the upper tail through the survival function, for precision
+            upper = a > 0
+            cdf = np.where(upper, _ndtr(-a), _ndtr(a)), np.where(upper, _ndtr(-b), _ndtr(b))
+            lognorm = np.log(2 / np.sqrt(2 * np.pi) / sigma / (_erf(b / np.sqrt(2)) - _erf(a / np.sqrt(2))))
+            self._groups["truncnormal"] += [lognorm, upper, cdf]
+
+        if "linearexp" in self._groups:
+            idx, pmin, pmax = self._groups["linearexp"]
+            self._groups["linearexp"].append(np.log(np.log(10)) - np.log(10**pmax - 10**pmin))
+
+    def map_params(self, x):
+        """Map a parameter vector to a dictionary, as ``PTA.map_params``."""
+
+        return {par.name: x[slc] if slc.stop - slc.start > 1 else float(x[slc.start]) for par, slc in self._slices}
+
+    def tovector(self, params):
+        """Map a parameter dictionary to a vector."""
+
+        return np.hstack([params[par.name] for par in self.params]).astype(float)
+
+    def get_logpdf(self, x):
+        """Log-prior of parameter vector ``x``, or of each row of 2D ``x``."""
+
+        xs = np.atleast_2d(np.asarray(x, dtype=float))
+        ret = np.zeros(xs.shape[0])
+
+        if "uniform" in self._groups:
+            idx, pmin, pmax, logp = self._groups["uniform"]
+            v = xs[:, idx]
+            ret += np.sum(np.where((v >= pmin) & (v <= pmax), logp, -np.inf), axis=1)
+
+        if "normal" in self._groups:
+            idx, mu, sigma, lognorm = self._groups["normal"]
+            ret += np.sum(lognorm - 0.5 * ((xs[:, idx] - mu) / sigma) ** 2, axis=1)
+
+        if "truncnormal" in self._groups:
+            idx, mu, sigma, pmin, pmax, lognorm, _, _ = self._groups["truncnormal"]
+            v = xs[:, idx]
+            logp = lognorm - 0.5 * ((v - mu) / sigma) ** 2
+            ret += np.sum(np.where((v > pmin) & (v < pmax), logp, -np.inf), axis=1)
+
+        if "linearexp" in self._groups:
+            idx, pmin, pmax, lognorm = self._groups["linearexp"]
+            v = xs[:, idx]
+            ret += np.sum(np.where((v >= pmin) & (v <= pmax), lognorm + np.log(10) * v, -np.inf), axis=1)
+
+        for idx, mu, cf, logdet in self._mvnormal:
+            dx = xs[:, idx] - mu
+            ret -= 0.5 * (np.sum(dx * sl.cho_solve(cf, dx.T).T, axis=1) + logdet)
+
+        if self._other:
+            for row, v in enumerate(xs):
+                params = self.map_params(v)
+                ret[row] += np.sum([par.get_logpdf(params=params) for par, _ in self._other])
+
+        return ret if np.ndim(x) == 2 else ret[0]
+
+    def _group_ppf(self, us):
+        """Apply the family PPFs to the rows of ``us``, leaving NaNs in the
+        positions of the other parameters."""
+
+        ret = np.full_like(us, np.nan)
+
+        with np.errstate(invalid="ignore"):
+            inside = (us >= 0) & (us <= 1)
+
+        if "uniform" in self._groups:
+            idx, pmin, pmax, _ = self._groups["uniform"]
+            ret[:, idx] = np.where(inside[:, idx], pmin + us[:, idx] * (pmax - pmin), np.nan)
+
+        if "normal" in self._groups:
+            idx, mu, sigma, _ = self._groups["normal"]
+            ret[:, idx] = mu + sigma * _ndtri(us[:, idx])
+
+        if "truncnormal" in self._groups:
+            idx, mu, sigma, _, _, _, upper, (ca, cb) = self._groups["truncnormal"]
+            z = _ndtri(ca + us[:, idx] * (cb - ca))
+            ret[:, idx] = mu + sigma * np.where(upper, -z, z)
+
+        if "linearexp" in self._groups:
+            idx, pmin, pmax, _ = self._groups["linearexp"]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                ev = np.log10(10**pmin + us[:, idx] * (10**pmax - 10**pmin))
+            ret[:, idx] = np.where(inside[:, idx], ev, np.nan)
+
+        for idx, mu, cf, _ in self._mvnormal:
+            ret[:, idx] = mu + np.dot(_ndtri(us[:, idx]), np.tril(cf[0]).T)
+
+        return ret
+
+    def get_ppf(self, u):
+        """Map unit-hypercube vector ``u`` (or each row of 2D ``u``) to the
+        prior domain, by applying the PPF of every parameter. Normal
+        parameters with covariance-matrix ``sigma`` are mapped through the
+        Cholesky factor of ``sigma``."""
+
+        us = np.atleast_2d(np.asarray(u, dtype=float))
+        ret = self._group_ppf(us)
+
+        if self._other:
+            for row, v in enumerate(us):
+                params = self.map_params(v)
+                for par, slc in self._other:
+                    ret[row, slc] = par.get_ppf(params=params)
+
+        return ret if np.ndim(u) == 2 else ret[0]
+
+    def sample(self, n=None):
+        """Draw ``n`` parameter vectors from the prior, as an (n, ndim) array
+        (or a single vector if ``n`` is None). Family priors are sampled by
+        their PPFs; other parameters are drawn after their hyperparameters,
+        for all vectors at once if their sampler accepts vector arguments,
+        otherwise vector by vector."""
+
+        ret = self._group_ppf(np.random.uniform(size=(n or 1, self.ndim)))
+
+        for par, slc in self._sampling_order:
+            if par._sampler is None:
+                raise AttributeError("No sampler was provided for {}.".format(par.name))
+
+            prior = par.prior if hasattr(par, "prior") else par.logprior
+
+            # try drawing all values for scalar parameters together
+            if par.size is None and n is not None:
+                params = {p.name: ret[:, s] if s.stop - s.start > 1 else ret[:, s.start] for p, s in self._slices}
+                try:
+                    value = np.asarray(prior(func=par._sampler, size=n, params=params), dtype=float)
+                except (TypeError, ValueError, IndexError):
+                    value = None
+
+                if value is not None and value.shape == (n,):
+                    ret[:, slc.start] = value
+                    continue
+
+            for row in ret:
+                row[slc] = prior(func=par._sampler, size=par.size, params=self.map_params(row))
+
+        return ret if n is not None else ret[0]
+
+
 class ConstantParameter(object):
     """Constant Parameter base class."""
 
@@ -509,7 +764,84 @@ def Function(func, name="", **func_kwargs):
                 else:
                     self._defaults[kw] = arg
 
+            # call plans, by positional-argument count and keyword names
+            self._plans = {}
+
+        def _compile(self, nargs, kwnames, mask):
+            """Resolve once where each argument of `func` comes from, for calls
+            with `nargs` positional arguments and keyword arguments `kwnames`,
+            following the rules of `__call__` and `selection_func`. Return a
+            function of (args, kwargs) that makes such calls, or None if the
+            resolution depends on which parameters are given at runtime.
+            Pulsar attributes are read again at every call, so that plans keep
+            no copies of them; plans are recompiled when the pulsar changes."""
+
+            if "func" in kwnames or "psr" in kwnames or self._funcs:
+                return None
+
+            keep = set(self.func_kwargs) | set(self.func_args) | {"size"}
+            explicit = tuple(kw for kw in kwnames if kw in keep)
+
+            # parameters (with Constants falling back to their value) and fixed values
+            pars, fixed = [], {}
+            for kw in self.func_kwargs:
+                if kw in explicit:
+                    continue
+                elif kw in self._params:
+                    par = self._params[kw]
+                    pars.append((kw, par.name, par if hasattr(par, "value") else None))
+                elif kw in self._defaults:
+                    fixed[kw] = self._defaults[kw]
+
+            if self._psr is not None and "psr" in self.func_args:
+                fixed["psr"] = self._psr
+
+            # pulsar attributes for the trailing positional arguments, and whether
+            # they are masked (i.e., they are per-TOA arrays)
+            psr, extras = self._psr, []
+            if psr is not None and nargs < len(self.func_args):
+                given = set(explicit) | set(fixed) | {kw for kw, _, const in pars if const is not None} | {"psr"}
+                for funcarg in self.func_args[nargs:]:
+                    if funcarg in given or not hasattr(psr, funcarg):
+                        continue
+                    elif any(funcarg == kw for kw, _, _ in pars):
+                        return None
+
+                    attr = call_me_maybe(getattr(psr, funcarg))
+                    extras.append((funcarg, apply_mask(attr, mask, psr) is not attr))
+            extras = tuple(extras)
+
+            def call(args, kwargs):
+                params = kwargs.get("params", {})
+
+                attrs = [call_me_maybe(getattr(psr, funcarg)) for funcarg, _ in extras]
+                attrs = [attr[mask] if masked else attr for attr, (_, masked) in zip(attrs, extras)]
+
+                fkwargs = fixed.copy()
+                for kw, name, const in pars:
+                    if name in params:
+                        fkwargs[kw] = params[name]
+                    elif const is not None:
+                        fkwargs[kw] = const.value
+                for kw in explicit:
+                    fkwargs[kw] = kwargs[kw]
+
+                return func(*args, *attrs, **fkwargs)
+
+            return call
+
         def __call__(self, *args, **kwargs):
+            # use the call plan for this call signature, if there is one
+            key = (len(args),) + tuple(kwargs)
+            mask = kwargs.get("mask", Ellipsis)
+            version = getattr(self._psr, "_version", 0)
+            if key not in self._plans or self._plans[key][0] is not mask or self._plans[key][1] != version:
+                self._plans[key] = (mask, version, self._compile(len(args), kwargs, mask))
+
+            plan = self._plans[key][2]
+            if plan is not None:
+                return plan(args, kwargs)
+
             # we call self._func (or possibly the `func` given in kwargs)
             # by passing it args, kwargs, after augmenting kwargs (see below)
 
@@ -572,6 +904,7 @@ def Function(func, name="", **func_kwargs):
 
         def add_kwarg(self, **kwargs):
             self._defaults.update(kwargs)
+            self._plans = {}
 
         @property
         def params(self):
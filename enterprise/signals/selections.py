@@ -5,9 +5,13 @@ time-intervals, etc."""
 
 import functools
 import inspect
+import weakref
 
 import numpy as np
 
+# selection results, by pulsar and by selection function
+_cache = weakref.WeakKeyDictionary()
+
 
 def call_me_maybe(obj):
     """See `here`_ for description.
@@ -17,6 +21,41 @@ def call_me_maybe(obj):
     return obj() if hasattr(obj, "__call__") else obj
 
 
+def as_index(mask):
+    """Return the positions selected by the boolean `mask`, as a slice if
+    they form a contiguous range (e.g., a time segment of sorted TOAs), or
+    as an index array otherwise."""
+
+    idx = np.flatnonzero(mask)
+    if len(idx) == 0:
+        return slice(0, 0)
+    elif idx[-1] - idx[0] + 1 == len(idx):
+        return slice(int(idx[0]), int(idx[-1]) + 1)
+    else:
+        return idx
+
+
+def apply_mask(attr, mask, psr):
+    """Select the TOAs in `mask` (a boolean mask, or a slice or index array
+    of TOA positions) from the pulsar attribute `attr`, if it is a per-TOA
+    array; return any other `attr` unchanged."""
+
+    if not isinstance(attr, np.ndarray) or attr.ndim == 0:
+        return attr
+    elif isinstance(mask, slice) or (isinstance(mask, np.ndarray) and mask.dtype.kind in "iu"):
+        return attr[mask] if len(attr) == len(psr.toas) else attr
+    else:
+        return attr[mask] if getattr(mask, "shape", [0])[0] == len(attr) else attr
+
+
+def _get_cache(psr):
+    """Return the dictionary of selection results for `psr`. Keeping this at
+    module level lets pickling (e.g., with cloudpickle) of the dynamically
+    created `Selection` classes refer to the cache rather than copy it."""
+
+    return _cache.setdefault(psr, {})
+
+
 def selection_func(func):
     try:
         funcargs = inspect.getfullargspec(func).args
@@ -37,11 +76,7 @@ def selection_func(func):
 
             for funcarg in funcargs[len(args) :]:
                 if funcarg not in kwargs and hasattr(psr, funcarg):
-                    attr = call_me_maybe(getattr(psr, funcarg))
-                    if isinstance(attr, np.ndarray) and getattr(mask, "shape", [0])[0] == len(attr):
-                        targs.append(attr[mask])
-                    else:
-                        targs.append(attr)
+                    targs.append(apply_mask(call_me_maybe(getattr(psr, funcarg)), mask, psr))
 
         if "psr" in kwargs and "psr" not in funcargs:
             del kwargs["psr"]
@@ -63,9 +98,58 @@ def Selection(func):
         def __init__(self, psr):
             self._psr = psr
 
+        def _lookup(self):
+            # selections are computed once per pulsar, and shared by all the
+            # signals that use them; pulsars bump `_version` when their data change
+            try:
+                cache = _get_cache(self._psr)
+            except TypeError:
+                cache = self.__dict__.setdefault("_cache", {})
+
+            version = getattr(self._psr, "_version", 0)
+            if func not in cache or cache[func]["version"] != version:
+                # flag selections work on the integer-coded flags, if available
+                sfunc = func
+                coded = getattr(func, "coded", None)
+                if coded is not None and all(hasattr(self._psr, arg) for arg in inspect.getfullargspec(coded).args):
+                    sfunc = coded
+
+                masks = {}
+                for key, mask in selection_func(sfunc)(psr=self._psr).items():
+                    masks[key] = np.asarray(mask, dtype=bool).view()
+                    masks[key].flags.writeable = False
+
+                cache[func] = {"version": version, "masks": masks}
+
+            return cache[func]
+
         @property
         def masks(self):
-            return selection_func(func)(psr=self._psr)
+            """Return the boolean masks of the selection (read-only)."""
+            return self._lookup()["masks"]
+
+        @property
+        def indices(self):
+            """Return the positions of the selected TOAs, as slices for
+            contiguous ranges and as index arrays otherwise."""
+
+            entry = self._lookup()
+            if "indices" not in entry:
+                entry["indices"] = {key: as_index(mask) for key, mask in entry["masks"].items()}
+
+            return entry["indices"]
+
+        @property
+        def groups(self):
+            """Return the names of the selected groups, and an integer array
+            with the group of each TOA (-1 for TOAs in no group)."""
+
+            masks = self.masks
+            ids = np.full(len(self._psr.toas), -1, dtype=np.int32)
+            for ii, mask in enumerate(masks.values()):
+                ids[mask] = ii
+
+            return list(masks), ids
 
         def _get_masked_array_dict(self, masks, arr):
             return {key: val * arr for key, val in masks.items()}
@@ -88,6 +172,28 @@ def Selection(func):
     return Selection
 
 
+def split_codes(codes, names, keep=None):
+    """Return masks for the values (given as integer `codes` into the list of
+    `names`) that occur in the data; if `keep` is given, only for the values
+    that contain one of the strings in `keep`."""
+
+    present = np.flatnonzero(np.bincount(codes, minlength=len(names)))
+    return {names[i]: codes == i for i in present if keep is None or any(b in names[i] for b in keep)}
+
+
+def with_codes(coded):
+    """Decorator that attaches to a selection function of flag values an
+    equivalent function `coded` of the integer-coded flags (as given by the
+    pulsar attributes `backend_codes`, `flag_codes`, etc.; see `split_codes`).
+    `Selection` uses `coded` for pulsars that provide these attributes."""
+
+    def decorator(func):
+        func.coded = coded
+        return func
+
+    return decorator
+
+
 # SELECTION FUNCTIONS
 
 
@@ -97,6 +203,7 @@ def cut_half(toas):
     return dict(zip(["t1", "t2"], [toas <= midpoint, toas > midpoint]))
 
 
+@with_codes(lambda flag_codes, flag_names: split_codes(flag_codes["B"], flag_names["B"]))
 def by_band(flags):
     """Selection function to split by PPTA frequency band under -B flag"""
     flagvals = np.unique(flags["B"])
@@ -121,23 +228,28 @@ def by_freq_band(bands=None):
     return backends
 
 
+@with_codes(lambda flag_codes, flag_names: split_codes(flag_codes["fe"], flag_names["fe"]))
 def by_frontend(flags):
     """Selection function to split by frontend under -fe flag"""
     flagvals = np.unique(flags["fe"])
     return {val: flags["fe"] == val for val in flagvals}
 
 
+@with_codes(lambda backend_codes, backend_names: split_codes(backend_codes, backend_names))
 def by_backend(backend_flags):
     """Selection function to split by backend flags."""
     flagvals = np.unique(backend_flags)
     return {val: backend_flags == val for val in flagvals}
 
 
+NANOGRAV_BACKENDS = ["ASP", "GASP", "GUPPI", "PUPPI", "YUPPI", "CHIME", "VEGAS"]
+
+
+@with_codes(lambda backend_codes, backend_names: split_codes(backend_codes, backend_names, keep=NANOGRAV_BACKENDS))
 def nanograv_backends(backend_flags):
     """Selection function to split by NANOGRav backend flags only."""
     flagvals = np.unique(backend_flags)
-    ngb = ["ASP", "GASP", "GUPPI", "PUPPI", "YUPPI", "CHIME", "VEGAS"]
-    flagvals = [val for val in flagvals if any([b in val for b in ngb])]
+    flagvals = [val for val in flagvals if any([b in val for b in NANOGRAV_BACKENDS])]
     return {val: backend_flags == val for val in flagvals}
 
 
@@ -161,6 +273,9 @@ def no_selection(toas):
 
 
 def custom_backends(cb):
+    keep = None if cb is None else list(np.atleast_1d(cb))
+
+    @with_codes(lambda backend_codes, backend_names: split_codes(backend_codes, backend_names, keep=keep))
     def backends(backend_flags):
         """Selection function to split by custom backend flags only.
         cb : list of str of the backends
@@ -180,6 +295,22 @@ def custom_backends(cb):
 
 
 def custom_backends_dict(cb):
+    def coded(backend_codes, backend_names, flag_codes, flag_names, toas):
+        if isinstance(cb, str) or isinstance(cb, list):
+            return split_codes(backend_codes, backend_names, keep=list(np.atleast_1d(cb)))
+        elif isinstance(cb, dict):
+            flagdict = {}
+            for flagname in cb.keys():
+                keep = None if cb[flagname] is None else list(np.atleast_1d(cb[flagname]))
+                if flagname == "backend":
+                    flagdict.update(split_codes(backend_codes, backend_names, keep=keep))
+                else:
+                    flagdict.update(split_codes(flag_codes[flagname], flag_names[flagname], keep=keep))
+            return flagdict
+        else:
+            return {"": np.ones_like(toas, dtype=bool)}
+
+    @with_codes(coded)
     def backends(backend_flags, flags, toas):
         """Selection function to split by custom flags dictionary only.
         cb : str, list or dict of flags and names
@@ -23,11 +23,13 @@ from sksparse.cholmod import cholesky, CholmodError
 # in various places from signal_base.py
 from enterprise.signals.parameter import Function  # noqa: F401
 from enterprise.signals.parameter import function  # noqa: F401
-from enterprise.signals.parameter import ConstantParameter
+from enterprise.signals.parameter import ConstantParameter, PriorBundle
+from enterprise.signals.gp_bases import BlockBasis, FourierBasis, LazyBasis, ScaledBasis
 from enterprise.signals.utils import KernelMatrix
 from enterprise.signals.utils import indices_from_slice
 
 from enterprise import __version__
+from enterprise.pulsar_inflate import DeflateMixin
 from sys import version
 
 _py_version = version.split(" ")[0]
@@ -677,19 +679,28 @@ class PTA(object):
             return phis
 
     def map_params(self, xs):
-        ret = {}
-        ct = 0
-        for p in self.params:
-            n = p.size if p.size else 1
-            ret[p.name] = xs[ct : ct + n] if n > 1 else float(xs[ct])
-            ct += n
-        return ret
+        return self.priors.map_params(xs)
+
+    @property
+    def priors(self):
+        """``PriorBundle`` evaluating the priors of all PTA parameters."""
+
+        if "_priors" not in self.__dict__:
+            self._priors = PriorBundle(self.params)
+        return self._priors
 
     def get_lnprior(self, params):
-        # map parameter vector if needed
-        params = params if isinstance(params, dict) else self.map_params(params)
+        # map parameter dictionary to vector if needed;
+        # a 2D array is evaluated row by row
+        params = self.priors.tovector(params) if isinstance(params, dict) else params
+
+        return self.priors.get_logpdf(params)
 
-        return np.sum([p.get_logpdf(params=params) for p in self.params])
+    def sample_prior(self, n=None):
+        """Draw ``n`` parameter vectors from the prior, as an (n, ndim) array
+        (or a single vector if ``n`` is None)."""
+
+        return self.priors.sample(n)
 
     @property
     def pulsars(self):
@@ -697,10 +708,11 @@ class PTA(object):
 
     def get_hypercube_transform(self, params):
         # transform from unit cube to prior cube for nested sampling using PPFs
-        # map parameter vector if needed
-        params = params if isinstance(params, dict) else self.map_params(params)
+        # map parameter dictionary to vector if needed;
+        # a 2D array is transformed row by row
+        params = self.priors.tovector(params) if isinstance(params, dict) else params
 
-        return np.hstack([p.get_ppf(params=params) for p in self.params])
+        return self.priors.get_ppf(params)
 
     def _set_signal_dict(self):
         """Set signal dictionary"""
@@ -781,9 +793,16 @@ def SignalCollection(metasignals):  # noqa: C901
     """Class factory for ``SignalCollection`` objects."""
 
     @six.add_metaclass(MetaCollection)
-    class SignalCollection(object):
+    class SignalCollection(DeflateMixin):
         _metasignals = metasignals
 
+        # combined bases with sparse parts are kept sparse if at most
+        # this fraction of their entries is non-zero
+        sparse_density = 0.25
+
+        # precomputed arrays that deflate() moves to shared memory
+        _todeflate = ["_Fmat"]
+
         def __init__(self, psr):
             self.psrname = psr.name
             # instantiate all the signals with a pulsar
@@ -900,7 +919,8 @@ def SignalCollection(metasignals):  # noqa: C901
                     if not signal.basis_params:
                         idx[signal] = []
 
-                        for i, column in enumerate(Fmat.T):
+                        columns = Fmat.T.toarray() if sps.issparse(Fmat) else Fmat.T
+                        for i, column in enumerate(columns):
                             colhash = hash(column.tobytes())
 
                             if signal.basis_combine and colhash in hashlist:
@@ -958,14 +978,70 @@ def SignalCollection(metasignals):  # noqa: C901
             if self._Fmat is None:
                 return None
 
+            bases = [(signal, _materialize(F)) for signal, F in self._get_bases(params)]
+
+            if any(sps.issparse(F) for _, F in bases):
+                nnz = sum(F.nnz if sps.issparse(F) else F.size for _, F in bases)
+                if nnz <= self.sparse_density * self._Fmat.size:
+                    return self._sparse_basis(bases)
+
             Fmat = np.zeros_like(self._Fmat)
 
-            for signal in self._signals:
-                if signal in self._idx:
-                    Fmat[:, self._idx[signal]] = signal.get_basis(params)
+            for signal, F in bases:
+                Fmat[:, self._idx[signal]] = F.toarray() if sps.issparse(F) else F
 
             return Fmat
 
+        def _sparse_basis(self, bases):
+            """Assemble the combined basis as a CSR matrix, taking each
+            (possibly shared) column from the first signal that has it."""
+
+            filled = np.zeros(self._Fmat.shape[1], dtype=bool)
+            rows, cols, data = [], [], []
+
+            for signal, F in bases:
+                idx = self._idx[signal]
+
+                # repeated columns within a signal are also stored only once
+                first = np.zeros(len(idx), dtype=bool)
+                first[np.unique(idx, return_index=True)[1]] = True
+
+                F = sps.coo_matrix(F)
+                keep = (first & ~filled[idx])[F.col]
+                rows.append(F.row[keep])
+                cols.append(idx[F.col[keep]])
+                data.append(F.data[keep])
+
+                filled[idx] = True
+
+            ijs = (np.concatenate(rows), np.concatenate(cols))
+            return sps.csr_matrix((np.concatenate(data), ijs), shape=self._Fmat.shape)
+
+        # white-noise solves that cannot handle sparse bases get a dense copy
+        @simplememobyid
+        def _dense_basis(self, T):
+            return T.toarray()
+
+        def _solve_basis(self, Nvec, T):
+            if sps.issparse(T) and not getattr(Nvec, "structured_solve", False):
+                return self._dense_basis(T)
+            return T
+
+        def _get_bases(self, params):
+            return [(signal, signal.get_basis(params)) for signal in self._signals if signal in self._idx]
+
+        def _get_structured_bases(self, Nvec, params):
+            """Return the individual signal bases if any of them is a lazy
+            (scaled or block) basis or a FourierBasis with closed-form products, and Nvec
+            can solve against them, so that TNr and TNT can be computed
+            blockwise without materializing the combined basis."""
+
+            if not getattr(Nvec, "structured_solve", False):
+                return None
+
+            bases = self._get_bases(params)
+            return bases if any(_is_structured(F) for _, F in bases) else None
+
         def get_phiinv(self, params):
             return self.get_phi(params).inv()
 
@@ -984,19 +1060,38 @@ def SignalCollection(metasignals):  # noqa: C901
 
         @cache_call(["basis_params", "white_params", "delay_params"])
         def get_TNr(self, params):
-            T = self.get_basis(params)
-            if T is None:
+            if self._Fmat is None:
                 return None
             Nvec = self.get_ndiag(params)
             res = self.get_detres(params)
-            return Nvec.solve(res, left_array=T)
+
+            bases = self._get_structured_bases(Nvec, params)
+            if bases is not None:
+                TNr = np.zeros(self._Fmat.shape[1])
+                for signal, F in bases:
+                    TNr[self._idx[signal]] = Nvec.solve(res, left_array=F)
+                return TNr
+
+            T = self.get_basis(params)
+            return Nvec.solve(res, left_array=self._solve_basis(Nvec, T))
 
         @cache_call(["basis_params", "white_params"])
         def get_TNT(self, params):
-            T = self.get_basis(params)
-            if T is None:
+            if self._Fmat is None:
                 return None
             Nvec = self.get_ndiag(params)
+
+            bases = self._get_structured_bases(Nvec, params)
+            if bases is not None:
+                TNT = np.zeros((self._Fmat.shape[1], self._Fmat.shape[1]))
+                for i, (signal1, F1) in enumerate(bases):
+                    for signal2, F2 in bases[i:]:
+                        idx1, idx2 = self._idx[signal1], self._idx[signal2]
+                        TNT[np.ix_(idx1, idx2)] = block = Nvec.solve(F2, left_array=F1)
+                        TNT[np.ix_(idx2, idx1)] = block.T
+                return TNT
+
+            T = self._solve_basis(Nvec, self.get_basis(params))
             return Nvec.solve(T, left_array=T)
 
         @cache_call(["white_params", "delay_params"])
@@ -1092,6 +1187,16 @@ def cache_call(attrs, limit=2):
     return cache_decorator
 
 
+def _materialize(F):
+    return F.materialize() if isinstance(F, LazyBasis) else F
+
+
+def _is_structured(F):
+    if isinstance(F, LazyBasis):
+        return True
+    return isinstance(F, FourierBasis) and F.linear and len(F.f) >= F.min_modes
+
+
 class csc_matrix_alt(sps.csc_matrix):
     """Sub-class of ``scipy.sparse.csc_matrix`` with custom ``add`` and
     ``solve`` methods.
@@ -1127,6 +1232,9 @@ class csc_matrix_alt(sps.csc_matrix):
 class ndarray_alt(np.ndarray):
     """Sub-class of ``np.ndarray`` with custom ``solve`` method."""
 
+    # solve accepts scipy.sparse, lazy (ScaledBasis, BlockBasis) and FourierBasis bases
+    structured_solve = True
+
     def __new__(cls, inputarr):
         if inputarr.ndim != 1:
             raise NotImplementedError("ndarray_alt does not support non-diagonal arrays")
@@ -1142,13 +1250,154 @@ class ndarray_alt(np.ndarray):
             ret = other + self
         return ret
 
+    def _group_products(self, Lbase, Rbase, groups):
+        """Per-group products :math:`L_g^T N_g^{-1} R_g`, and the index of
+        one TOA in each group."""
+
+        Nvec = np.asarray(self)
+        Lbase, Rbase = [_materialize(F) if isinstance(F, BlockBasis) else F for F in (Lbase, Rbase)]
+        order = np.argsort(groups, kind="stable")
+        bounds = np.searchsorted(groups[order], np.arange(groups.max() + 2))
+
+        first, products = [], []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            rows = order[start:stop]
+            first.append(rows[0] if len(rows) else 0)
+
+            Rg = Rbase[rows]
+            if sps.issparse(Rg):
+                Rg = Rg.multiply(1.0 / Nvec[rows, None])
+            else:
+                Rg = Rg / Nvec[rows] if Rg.ndim == 1 else Rg / Nvec[rows, None]
+
+            prod = Lbase[rows].T @ Rg
+            products.append(prod.toarray() if sps.issparse(prod) else np.asarray(prod))
+
+        return np.array(first), np.array(products)
+
+    def _solve_groups(self, other, left_array):
+        """Compute ``left_array^T N^-1 other`` as a weighted sum of per-group
+        products, if the ScaledBasis arguments have grouped scales (e.g., by
+        radio frequency) and their bases were already solved against with
+        this noise, so that presumably only the scales are changing (as when
+        sampling a chromatic index). Return None otherwise."""
+
+        sides = [left_array, other]
+        scaled = [F for F in sides if isinstance(F, ScaledBasis)]
+        if not scaled or any(F.groups is None for F in scaled):
+            return None
+
+        groups = scaled[0].groups
+        if any(F.groups is not groups and not np.array_equal(F.groups, groups) for F in scaled[1:]):
+            return None
+
+        Lbase, Rbase = [F.base if isinstance(F, ScaledBasis) else F for F in sides]
+
+        grams = self.__dict__.setdefault("_grams", {})
+        key = (id(Lbase), id(Rbase))
+        entry = grams.get(key)
+        if entry is None or entry[0] is not Lbase or entry[1] is not Rbase or not np.array_equal(entry[2], groups):
+            grams[key] = [Lbase, Rbase, groups, None]
+            if len(grams) > 16:
+                del grams[next(iter(grams))]
+            return None
+
+        if entry[3] is None:
+            entry[3] = self._group_products(Lbase, Rbase, groups)
+        first, products = entry[3]
+
+        weights = np.ones(len(first))
+        for F in scaled:
+            weights = weights * F.scale[first]
+
+        return np.tensordot(weights, products, axes=1)
+
+    def _solve_fourier(self, other, left_array):
+        """Compute ``left_array^T N^-1 other`` from weighted trigonometric sums,
+        if both are (possibly scaled) FourierBasis matrices with closed-form
+        products. Without scales, the sums are kept for the other products
+        with this noise. Return None otherwise."""
+
+        sides = [left_array, other]
+        Lbase, Rbase = [F.base if isinstance(F, ScaledBasis) else F for F in sides]
+        if not (isinstance(Lbase, FourierBasis) and isinstance(Rbase, FourierBasis)):
+            return None
+
+        weights = 1.0 / np.asarray(self)
+        scaled = [F for F in sides if isinstance(F, ScaledBasis)]
+        for F in scaled:
+            weights = weights * F.scale
+
+        sums = None if scaled else self.__dict__.setdefault("_trigsums", {})
+        return Lbase.gram(Rbase, weights, sums=sums)
+
+    @staticmethod
+    def _solve_blocks(Nvec, other, left_array):
+        """Compute ``left_array^T N^-1 other``, where either is a BlockBasis,
+        multiplying each block only over the TOAs that it touches."""
+
+        if not isinstance(left_array, BlockBasis):
+            return ndarray_alt._solve_blocks(Nvec, left_array, other).T
+
+        Nvec = np.asarray(Nvec)
+        shape = left_array.shape[1:] + other.shape[1:]
+        mult = np.zeros(shape)
+
+        for i, (rows, cols, block) in enumerate(left_array.blocks):
+            if not isinstance(other, BlockBasis):
+                mult[cols] += ndarray_alt(Nvec[rows]).solve(other[rows], left_array=block)
+                continue
+
+            for j, (rows2, cols2, block2) in enumerate(other.blocks):
+                if rows2 is rows:
+                    L, R, common = block, block2, rows
+                elif other is left_array and left_array.disjoint:
+                    continue
+                else:
+                    common, ia, ib = np.intersect1d(rows, rows2, assume_unique=True, return_indices=True)
+                    if len(common) == 0:
+                        continue
+                    L, R = block[ia], block2[ib]
+
+                mult[cols, cols2] += ndarray_alt(Nvec[common]).solve(R, left_array=L)
+
+        return mult
+
     def solve(self, other, left_array=None, logdet=False):
-        if other.ndim == 1:
-            mult = np.array(other / self)
+        mult = None
+        if left_array is not None:
+            mult = self._solve_groups(other, left_array)
+            if mult is None:
+                mult = self._solve_fourier(other, left_array)
+        if mult is not None:
+            return (mult, float(np.sum(np.log(self)))) if logdet else mult
+
+        # fold the scales of lazily-scaled bases into the noise weights
+        Nvec = self
+        with np.errstate(divide="ignore"):
+            if isinstance(other, ScaledBasis):
+                other, Nvec = other.base, Nvec / other.scale
+            if isinstance(left_array, ScaledBasis):
+                left_array, Nvec = left_array.base, Nvec / left_array.scale
+
+        if left_array is None and isinstance(other, BlockBasis):
+            other = other.toarray()
+        elif isinstance(other, BlockBasis) or isinstance(left_array, BlockBasis):
+            mult = self._solve_blocks(Nvec, other, left_array)
+            return (mult, float(np.sum(np.log(self)))) if logdet else mult
+
+        if sps.issparse(other):
+            mult = sps.csr_matrix(other.multiply(1.0 / np.asarray(Nvec)[:, None]))
+        elif other.ndim == 1:
+            mult = np.array(other / Nvec)
         elif other.ndim == 2:
-            mult = np.array(other / self[:, None])
+            mult = np.array(other / Nvec[:, None])
         if left_array is not None:
-            mult = np.dot(left_array.T, mult)
+            if sps.issparse(left_array) or sps.issparse(mult):
+                mult = left_array.T @ mult
+                mult = mult.toarray() if sps.issparse(mult) else np.asarray(mult)
+            else:
+                mult = np.dot(left_array.T, mult)
 
         ret = (mult, float(np.sum(np.log(self)))) if logdet else mult
         return ret
@@ -4,13 +4,13 @@ Utilities module containing various useful
 functions for use in other modules.
 """
 
+import collections
 import logging
 
 import numpy as np
 import scipy.linalg as sl
 import scipy.sparse as sps
 import scipy.special as ss
-from pkg_resources import Requirement, resource_filename
 from scipy.integrate import odeint
 from scipy.interpolate import interp1d
 from sksparse.cholmod import cholesky
@@ -18,6 +18,7 @@ from sksparse.cholmod import cholesky
 import enterprise
 from enterprise import constants as const
 from enterprise import signals as sigs  # noqa: F401
+from enterprise.lazy import LazyModule
 from enterprise.signals.gp_bases import (  # noqa: F401
     createfourierdesignmatrix_red,
     create_fft_time_basis,
@@ -30,20 +31,26 @@ from enterprise.signals.gp_bases import (  # noqa: F401
     createfourierdesignmatrix_chromatic,
     create_fft_time_basis_chromatic,
     createfourierdesignmatrix_general,
+    linear_interp_matrix,
 )
 from enterprise.signals.gp_priors import powerlaw, turnover  # noqa: F401
 from enterprise.signals.parameter import function
 
 logger = logging.getLogger(__name__)
 
+# pkg_resources is imported on first use
+pkg_resources = LazyModule("pkg_resources")
+
 
 class ConditionalGP:
     def __init__(self, pta, phiinv_method="cliques", tm_params=[], psr=None):
         """This class allows the computation of conditional means and
         random draws for all GP coefficients/realizations in a model,
         given a vector of hyperparameters. It currently requires combine=False
-        for all GPs (or otherwise distinct bases) and does not
-        work with MarginalizingTimingModel (fast new-style likelihood)."""
+        for all GPs (or otherwise distinct bases). Draws are made in batches,
+        reusing a single factorization of Sigma. Timing models marginalized
+        with MarginalizingTimingModel are drawn from their conditional
+        distribution given the GP coefficients."""
 
         self.pta = pta
         self.phiinv_method = phiinv_method
@@ -55,8 +62,6 @@ class ConditionalGP:
         TNTs = self.pta.get_TNT(params)
         phiinvs = self.pta.get_phiinv(params, logdet=False, method=self.phiinv_method)
 
-        # TO DO: all this could be more efficient
-        #        also it's unclear if it works with MarginalizingTimingModel
         if self.pta._commonsignals:
             TNr = np.concatenate(TNrs)
             Sigma = sps.block_diag(TNTs, "csc") + sps.csc_matrix(phiinvs)
@@ -76,160 +81,225 @@ class ConditionalGP:
 
             return chs, mns
 
-    def _sample_conditional(self, params, n=1, gp=False, variance=True):
-        ch, mn = self._make_conditional(params)
+    def _draw(self, ch, mn, n, variance):
+        """Return an (n, nb) matrix of coefficient draws, with a single
+        triangular solve per factor. Since Sigma = L L^T, Sigma^-1 = L^-T L^-1
+        and L^-T x has variance L^-T L^-1 for normal x."""
 
-        ret = []
-        for j in range(n):
-            # since Sigma = L L^T, Sigma^-1 = L^-T L^-1
-            # and L^-T x has variance L^-T L^-1 for normal x
-            if self.pta._commonsignals:
-                b = mn
-                if variance:
-                    b = b + ch.apply_Pt(ch.solve_Lt(np.random.randn(mn.shape[0]), use_LDLt_decomposition=False))
-            else:
-                b = np.concatenate(mn)
-                if variance:
-                    b = b + np.concatenate(
-                        [sl.solve_triangular(c.T, np.random.randn(c.shape[0]), lower=False) for c in ch]
-                    )
+        if self.pta._commonsignals:
+            b = np.tile(mn, (n, 1))
+            if variance:
+                x = np.random.randn(mn.shape[0], n)
+                b += ch.apply_Pt(ch.solve_Lt(x, use_LDLt_decomposition=False)).T
+        else:
+            b = np.tile(np.concatenate(mn), (n, 1))
+            if variance:
+                b += np.hstack([sl.solve_triangular(c.T, np.random.randn(c.shape[0], n), lower=False).T for c in ch])
+
+        return b
+
+    def _get_columns(self, params):
+        """Map every GP signal to its basis and its columns in the global
+        coefficient vector, and every pulsar to its range of columns."""
+
+        signals, psrslices, ntot = [], [], 0
+        for model in self.pta.pulsarmodels:
+            start = ntot
+            for sig in model._signals:
+                if sig.signal_type not in ["basis", "common basis"]:
+                    continue
+
+                sb = sig.get_basis(params=params)
+                nb = sb.shape[1]
+
+                signals.append((sig, sb, slice(ntot, nb + ntot)))
+                ntot += nb
+
+            psrslices.append(slice(start, ntot))
 
-            pardict, ntot = {}, 0
-            for i, model in enumerate(self.pta.pulsarmodels):
-                for sig in model._signals:
-                    if sig.signal_type not in ["basis", "common basis"]:
-                        continue
+        return signals, psrslices, ntot
 
-                    sb = sig.get_basis(params=params)
-                    nb = sb.shape[1]
+    def _get_marginalized_tm(self, params, model, b, variance):
+        """Draw the coefficients of a marginalized timing model from their
+        conditional distribution given the GP coefficients ``b``, or return
+        None if the timing model is not marginalized."""
+
+        Nmat = model.get_ndiag(params)
+        if not hasattr(Nmat, "Mmat"):
+            return None
+
+        M, N = Nmat.Mmat, Nmat.Nmat
+        T = model.get_basis(params)
+        if sps.issparse(T) and not getattr(N, "structured_solve", False):
+            T = T.toarray()
+
+        # with a flat prior, eps | b ~ N[(M^T N^-1 M)^-1 M^T N^-1 (r - T b), (M^T N^-1 M)^-1];
+        # the factorization of M^T N^-1 M and the products are cached by Nmat
+        MNr = Nmat.MNr(model.get_detres(params))
+        y = np.tile(MNr[:, None], (1, b.shape[0]))
+        if T is not None and b.shape[1] > 0:
+            y -= np.dot(Nmat.MNF(T), b.T)
+
+        cf = Nmat.cf
+        eps = cf(y)
+        if variance:
+            eps += cf.apply_Pt(cf.solve_Lt(np.random.randn(*eps.shape), use_LDLt_decomposition=False))
+
+        tmsig = [sig for sig in model._signals if hasattr(sig, "Mmat") and sig.signal_type == "white noise"][0]
+
+        return tmsig, M, eps.T
+
+    def _add_tm_params(self, ret, sig, sb, coeffs, gp):
+        if self.psr is None:
+            raise ValueError("Need to input psr to get timing model param names")
+
+        for tm_par in self.tm_params:
+            tm_idx = list(self.psr.fitpars).index(tm_par)
+            save_name = sig.name.split("_")[0] + "_" + tm_par
+            key = save_name if gp else f"{save_name}_coefficients"
+            ret[key] = np.outer(coeffs[:, tm_idx], sb[:, tm_idx]) if gp else coeffs[:, tm_idx]
+
+    def _sample_conditional(self, params, n=1, gp=False, variance=True):
+        """Return a dictionary of (n, ...) arrays of conditional draws,
+        keyed by coefficient (gp=False) or process (gp=True) name."""
+
+        ch, mn = self._make_conditional(params)
+        b = self._draw(ch, mn, n, variance)
 
-                    if nb + ntot > len(b):
-                        raise IndexError("Missing parameters! You need to set combine=False in your GPs.")
+        signals, psrslices, ntot = self._get_columns(params)
+        if ntot > b.shape[1]:
+            raise IndexError("Missing parameters! You need to set combine=False in your GPs.")
 
-                    if "timing_model" in sig.name and len(self.tm_params) > 0:
-                        if self.psr is None:
-                            raise ValueError("Need to input psr to get timing model param names")
+        ret = {}
+        for sig, sb, slc in signals:
+            coeffs = b[:, slc]
 
-                        for tm_par in self.tm_params:
+            if "timing_model" in sig.name and len(self.tm_params) > 0:
+                self._add_tm_params(ret, sig, sb, coeffs, gp)
 
-                            tm_idx = list(self.psr.fitpars).index(tm_par)
-                            save_name = sig.name.split("_")[0] + "_" + tm_par
-                            key = save_name if gp else f"{save_name}_coefficients"
-                            pardict[key] = np.dot(sb[:, tm_idx], b[ntot + tm_idx]) if gp else b[ntot + tm_idx]
+            if gp:
+                ret[sig.name] = sb.dot(coeffs.T).T
+            else:
+                ret[sig.name + "_coefficients"] = coeffs
 
-                    if gp:
-                        pardict[sig.name] = np.dot(sb, b[ntot : nb + ntot])
-                    else:
-                        pardict[sig.name + "_coefficients"] = b[ntot : nb + ntot]
+        for model, slc in zip(self.pta.pulsarmodels, psrslices):
+            tm = self._get_marginalized_tm(params, model, b[:, slc], variance)
+            if tm is None:
+                continue
 
-                    ntot += nb
+            sig, M, coeffs = tm
+            if len(self.tm_params) > 0:
+                self._add_tm_params(ret, sig, M, coeffs, gp)
 
-            ret.append(pardict)
+            if gp:
+                ret[sig.name] = np.dot(coeffs, M.T)
+            else:
+                ret[sig.name + "_coefficients"] = coeffs
 
         return ret
 
+    def _unbatch(self, ret, n):
+        return [{key: val[j] for key, val in ret.items()} for j in range(n)]
+
     def get_mean_coefficients(self, params):
-        return self._sample_conditional(params, n=1, gp=False, variance=False)[0]
+        return self._unbatch(self._sample_conditional(params, n=1, gp=False, variance=False), 1)[0]
 
-    def sample_coefficients(self, params, n=1):
-        return self._sample_conditional(params, n, gp=False, variance=True)
+    def sample_coefficients(self, params, n=1, batch=False):
+        """Draw n realizations of the GP coefficients. By default, return a list
+        of n dictionaries; with batch=True, return a single dictionary of
+        (n, ncoefficients) arrays."""
+        ret = self._sample_conditional(params, n, gp=False, variance=True)
+        return ret if batch else self._unbatch(ret, n)
 
     def get_mean_processes(self, params):
-        return self._sample_conditional(params, n=1, gp=True, variance=False)[0]
+        return self._unbatch(self._sample_conditional(params, n=1, gp=True, variance=False), 1)[0]
 
-    def sample_processes(self, params, n=1):
-        return self._sample_conditional(params, n, gp=True, variance=True)
+    def sample_processes(self, params, n=1, batch=False):
+        """Draw n realizations of the GP time series. By default, return a list
+        of n dictionaries; with batch=True, return a single dictionary of
+        (n, ntoas) arrays."""
+        ret = self._sample_conditional(params, n, gp=True, variance=True)
+        return ret if batch else self._unbatch(ret, n)
 
 
-def get_coefficients(pta, params, n=1, phiinv_method="cliques", variance=True, common_sparse=False):
-    ret = []
-
-    TNrs = pta.get_TNr(params)
-    TNTs = pta.get_TNT(params)
-    phiinvs = pta.get_phiinv(params, logdet=False, method=phiinv_method)
+def _draw_conditional(Sigma, TNr, n=1, variance=True):
+    """Return an (n, nb) array of draws from N(Sigma^-1 TNr, Sigma^-1).
 
-    # ...repeated code in the two if branches... refactor at will!
-    if pta._commonsignals:
-        if common_sparse:
-            Sigma = sps.block_diag(TNTs, "csc") + sps.csc_matrix(phiinvs)
-            TNr = np.concatenate(TNrs)
+    Since Sigma = L L^T, L^-T x has covariance Sigma^-1 for normal x, so the
+    draws only need triangular solves with the Cholesky factor of Sigma
+    (CHOLMOD for sparse Sigma, LAPACK for dense). An SVD is used only
+    if the dense factorization fails."""
 
-            ch = cholesky(Sigma)
-            mn = ch(TNr)
-            Li = sps.linalg.inv(ch.L()).toarray().T
-        else:
-            Sigma = sl.block_diag(*TNTs) + phiinvs
-            TNr = np.concatenate(TNrs)
+    x = np.random.randn(TNr.shape[0], n) if variance else None
 
+    if sps.issparse(Sigma):
+        ch = cholesky(Sigma)
+        mn = ch(TNr)
+        dev = ch.apply_Pt(ch.solve_Lt(x, use_LDLt_decomposition=False)) if variance else 0
+    else:
+        try:
+            cf = sl.cho_factor(Sigma, lower=True)
+            mn = sl.cho_solve(cf, TNr)
+            dev = sl.solve_triangular(cf[0], x, lower=True, trans="T") if variance else 0
+        except np.linalg.LinAlgError:
             u, s, _ = sl.svd(Sigma)
             mn = np.dot(u, np.dot(u.T, TNr) / s)
-            Li = u * np.sqrt(1 / s)
+            dev = np.dot(u * np.sqrt(1 / s), x) if variance else 0
 
-        for j in range(n):
-            b = mn + (np.dot(Li, np.random.randn(Li.shape[0])) if variance else 0)
+    b = np.tile(mn, (n, 1))
+    if variance:
+        b += dev.T
 
-            pardict, ntot = {}, 0
-            for i, model in enumerate(pta.pulsarmodels):
-                for sig in model._signals:
-                    if sig.signal_type in ["basis", "common basis"]:
-                        nb = sig.get_basis(params=params).shape[1]
+    return b
 
-                        if nb + ntot > len(b):
-                            raise IndexError(
-                                "Missing some parameters! " "You need to disable GP " "basis column reuse."
-                            )
 
-                        pardict[sig.name + "_coefficients"] = b[ntot : nb + ntot]
-                        ntot += nb
+def _set_coefficients(ret, models, signal_types, b, params):
+    ntot = 0
+    for model in models:
+        for sig in model._signals:
+            if sig.signal_type in signal_types:
+                nb = sig.get_basis(params=params).shape[1]
 
-            if len(ret) <= j:
-                ret.append(params.copy())
+                if nb + ntot > b.shape[1]:
+                    raise IndexError("Missing some parameters! " "You need to disable GP " "basis column reuse.")
 
-            ret[j].update(pardict)
-
-        return ret[0] if n == 1 else ret
-    else:
-        for i, model in enumerate(pta.pulsarmodels):
-            phiinv, d, TNT = phiinvs[i], TNrs[i], TNTs[i]
-
-            Sigma = TNT + (np.diag(phiinv) if phiinv.ndim == 1 else phiinv)
+                for pardict, bj in zip(ret, b):
+                    pardict[sig.name + "_coefficients"] = bj[ntot : nb + ntot]
+                ntot += nb
 
-            try:
-                u, s, _ = sl.svd(Sigma)
-                mn = np.dot(u, np.dot(u.T, d) / s)
-                Li = u * np.sqrt(1 / s)
-            except np.linalg.LinAlgError:
-                Q, R = sl.qr(Sigma)
-                Sigi = sl.solve(R, Q.T)
-                mn = np.dot(Sigi, d)
-                u, s, _ = sl.svd(Sigi)
-                Li = u * np.sqrt(1 / s)
 
-            for j in range(n):
-                b = mn + (np.dot(Li, np.random.randn(Li.shape[0])) if variance else 0)
+def get_coefficients(pta, params, n=1, phiinv_method="cliques", variance=True, common_sparse=False):
+    ret = [params.copy() for j in range(n)]
 
-                pardict, ntot = {}, 0
-                for sig in model._signals:
-                    if sig.signal_type == "basis":
-                        nb = sig.get_basis(params=params).shape[1]
+    TNrs = pta.get_TNr(params)
+    TNTs = pta.get_TNT(params)
+    phiinvs = pta.get_phiinv(params, logdet=False, method=phiinv_method)
 
-                        if nb + ntot > len(b):
-                            raise IndexError(
-                                "Missing some parameters! " "You need to disable GP " "basis column reuse."
-                            )
+    if pta._commonsignals:
+        if common_sparse:
+            Sigma = sps.block_diag(TNTs, "csc") + sps.csc_matrix(phiinvs)
+        else:
+            Sigma = sl.block_diag(*TNTs) + phiinvs
+        TNr = np.concatenate(TNrs)
 
-                        pardict[sig.name + "_coefficients"] = b[ntot : nb + ntot]
-                        ntot += nb
+        b = _draw_conditional(Sigma, TNr, n=n, variance=variance)
+        _set_coefficients(ret, pta.pulsarmodels, ["basis", "common basis"], b, params)
+    else:
+        for i, model in enumerate(pta.pulsarmodels):
+            phiinv, d, TNT = phiinvs[i], TNrs[i], TNTs[i]
 
-                if len(ret) <= j:
-                    ret.append(params.copy())
+            Sigma = TNT + (np.diag(phiinv) if phiinv.ndim == 1 else phiinv)
 
-                ret[j].update(pardict)
+            b = _draw_conditional(Sigma, d, n=n, variance=variance)
+            _set_coefficients(ret, [model], ["basis"], b, params)
 
-        return ret[0] if n == 1 else ret
+    return ret[0] if n == 1 else ret
 
 
 class KernelMatrix(np.ndarray):
+    # Toeplitz blocks at least this large are inverted in O(n^2) operations
+    toeplitz_size = 256
+
     def __new__(cls, init):
         if isinstance(init, int):
             ret = np.zeros(init, "d").view(cls)
@@ -287,6 +357,47 @@ class KernelMatrix(np.ndarray):
 
         return self
 
+    def _blocks(self):
+        """Return the index arrays of the cliques (the independent dense blocks),
+        and of the remaining diagonal entries, or None if the matrix is not
+        block diagonal along its cliques or has non-positive diagonal entries."""
+
+        cliques = getattr(self, "_cliques", None)
+        if cliques is None:
+            return None
+
+        matrix = np.asarray(self)
+        labels = np.where(cliques == -1, -1 - np.arange(len(cliques)), cliques)
+        if np.any(matrix[labels[:, None] != labels[None, :]]):
+            return None
+
+        diag = np.flatnonzero(cliques == -1)
+        if np.any(matrix[diag, diag] <= 0):
+            return None
+
+        return [np.flatnonzero(cliques == cl) for cl in np.unique(cliques[cliques != -1])], diag
+
+    @classmethod
+    def _inv_block(cls, block):
+        """Inverse and log-determinant of a dense block, using the Toeplitz
+        structure of (large) stationary covariances, such as FFT GP priors."""
+
+        if len(block) >= cls.toeplitz_size and _is_toeplitz(block):
+            ret = toeplitz_inv(block[:, 0])
+            if ret is not None:
+                return ret
+
+        try:
+            cf = sl.cho_factor(block)
+            inv = sl.cho_solve(cf, np.identity(cf[0].shape[0]))
+            ld = 2.0 * np.sum(np.log(np.diag(cf[0])))
+        except np.linalg.LinAlgError:
+            u, s, v = np.linalg.svd(block)
+            inv = np.dot(u / s, u.T)
+            ld = np.sum(np.log(s))
+
+        return inv, ld
+
     def inv(self, logdet=False):
         if self.ndim == 1:
             inv = 1.0 / self
@@ -296,22 +407,79 @@ class KernelMatrix(np.ndarray):
             else:
                 return inv
         else:
-            try:
-                cf = sl.cho_factor(self)
-                inv = sl.cho_solve(cf, np.identity(cf[0].shape[0]))
-                if logdet:
-                    ld = 2.0 * np.sum(np.log(np.diag(cf[0])))
-            except np.linalg.LinAlgError:
-                u, s, v = np.linalg.svd(self)
-                inv = np.dot(u / s, u.T)
-                if logdet:
-                    ld = np.sum(np.log(s))
+            # invert the cliques separately, if the diagonal entries
+            # are the only non-zero elements outside of them
+            blocks = self._blocks()
+
+            if blocks is None:
+                inv, ld = self._inv_block(np.asarray(self))
+            else:
+                cliques, diag = blocks
+                matrix = np.asarray(self)
+
+                inv, ld = np.zeros(self.shape), 0.0
+                for idx in cliques:
+                    idx2 = np.ix_(idx, idx)
+                    inv[idx2], blockld = self._inv_block(matrix[idx2])
+                    ld += blockld
+
+                inv[diag, diag] = 1.0 / matrix[diag, diag]
+                ld += np.sum(np.log(matrix[diag, diag]))
+
             if logdet:
                 return inv, ld
             else:
                 return inv
 
 
+def _is_toeplitz(matrix):
+    return np.array_equal(matrix[1:, 1:], matrix[:-1, :-1]) and np.array_equal(matrix[0], matrix[:, 0])
+
+
+def toeplitz_inv(c):
+    """
+    Inverse and log-determinant of the symmetric positive-definite Toeplitz
+    matrix with first column ``c``, in O(n^2) operations: the Durbin recursion
+    yields the first column of the inverse and the log-determinant, from which
+    the Trench recursion fills in the rest of the inverse.
+
+    :param c: first column of the Toeplitz matrix
+
+    :return: inverse matrix and log-determinant, or None if the matrix
+             is not (numerically) positive definite
+    """
+
+    c = np.asarray(c, dtype=float)
+    n = len(c)
+
+    # Durbin recursion for the prediction coefficients phi and errors E
+    phi, E = np.zeros(max(n - 1, 0)), c[0]
+    if not E > 0:
+        return None
+
+    ld = np.log(E)
+    for k in range(1, n):
+        kappa = (c[k] - np.dot(phi[: k - 1], c[k - 1 : 0 : -1])) / E
+        phi[: k - 1] -= kappa * phi[: k - 1][::-1]
+        phi[k - 1] = kappa
+
+        E *= 1.0 - kappa**2
+        if not E > 0:
+            return None
+        ld += np.log(E)
+
+    # Trench recursion along the diagonals, from the first column y
+    y = np.concatenate([[1.0], -phi]) / E
+
+    inv = np.empty((n, n))
+    inv[0] = y
+    for i in range(n - 1):
+        inv[i + 1, 0] = y[i + 1]
+        inv[i + 1, 1:] = inv[i, :-1] + (y[i + 1] * y[1:] - y[n - 1 - i] * y[n - 1 : 0 : -1]) / y[0]
+
+    return inv, ld
+
+
 def create_stabletimingdesignmatrix(designmat, fastDesign=True):
     """
     Stabilize the timing-model design matrix.
@@ -351,7 +519,7 @@ def make_ecc_interpolant():
     :returns: interpolant
     """
 
-    pth = resource_filename(Requirement.parse("libstempo"), "libstempo/ecc_vs_nharm.txt")
+    pth = pkg_resources.resource_filename(pkg_resources.Requirement.parse("libstempo"), "libstempo/ecc_vs_nharm.txt")
 
     fil = np.loadtxt(pth)
 
@@ -823,25 +991,27 @@ def linear_interp_basis(toas, dt=30 * 86400):
     :param toas: Pulsar TOAs in seconds
     :param dt: Linear interpolation step size in seconds.
 
-    :returns: Linear interpolation basis and nodes
+    :returns: Linear interpolation basis (sparse CSR) and nodes
     """
 
     # evenly spaced points
     x = np.arange(toas.min(), toas.max() + dt, dt)
-    M = np.zeros((len(toas), len(x)))
 
     # make linear interpolation basis
-    for ii in range(len(x) - 1):
-        idx = np.logical_and(toas >= x[ii], toas <= x[ii + 1])
-        M[idx, ii] = (toas[idx] - x[ii + 1]) / (x[ii] - x[ii + 1])
-        M[idx, ii + 1] = (toas[idx] - x[ii]) / (x[ii + 1] - x[ii])
+    M = linear_interp_matrix(x, toas)
 
     # only return non-zero columns
-    idx = M.sum(axis=0) != 0
+    idx = np.unique(M.indices)
 
     return M[:, idx], x[idx]
 
 
+# recently computed FFT GP covariances, keyed on the knot count and PSD,
+# so that pulsars sharing a knot grid and spectrum reuse the IFFT
+_psd2cov_cache = collections.OrderedDict()
+_psd2cov_cache_size = 16
+
+
 def psd2cov(t_knots, psd, fmax_factor=1):
     """
     Convert a power spectral density function, defined by (freqs, psd), to a covariance matrix.
@@ -851,15 +1021,15 @@ def psd2cov(t_knots, psd, fmax_factor=1):
                 (assumes *delta_f in psd, so units of [s^2]).
     :param fmax_factor: Integer factor to scale up fmax.
 
-    :return covmat: Covariance matrix at the coarse time grid.
+    :return covmat: (Read-only, Toeplitz) covariance matrix at the coarse time grid.
     """
 
-    def toeplitz(c):
-        c = np.asarray(c)
-        n = len(c)
-        i = np.arange(n).reshape(-1, 1)
-        j = np.arange(n).reshape(1, -1)
-        return c[np.abs(i - j)]
+    psd = np.asarray(psd, dtype=float)
+    key = (len(t_knots), fmax_factor, psd.tobytes())
+
+    if key in _psd2cov_cache:
+        _psd2cov_cache.move_to_end(key)
+        return _psd2cov_cache[key]
 
     # Create the full symmetric PSD (excluding duplicate Nyquist term)
     fullpsd = np.concatenate([psd, psd[-2:0:-1]])
@@ -870,7 +1040,15 @@ def psd2cov(t_knots, psd, fmax_factor=1):
 
     # With fmax_factor > 1, the IFFT time grid is finer by that factor.
     # Slice out every fmax_factor-th sample to match the coarse grid.
-    return toeplitz(Ctau[::fmax_factor][: len(t_knots)])
+    c = Ctau[::fmax_factor][: len(t_knots)]
+    covmat = c[np.abs(np.arange(len(c))[:, None] - np.arange(len(c))[None, :])]
+    covmat.flags.writeable = False
+
+    _psd2cov_cache[key] = covmat
+    if len(_psd2cov_cache) > _psd2cov_cache_size:
+        _psd2cov_cache.popitem(last=False)
+
+    return covmat
 
 
 def knots_to_freqs(t_knots, oversample=3, fmax_factor=1):
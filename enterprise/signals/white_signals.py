@@ -42,6 +42,8 @@ def WhiteNoise(varianceFunction, selection=Selection(selections.no_selection), n
             sel = selection(psr)
             self._keys = sorted(sel.masks.keys())
             self._masks = [sel.masks[key] for key in self._keys]
+            self._indices = [sel.indices[key] for key in self._keys]
+            self._ntoas = len(psr.toas)
             self._ndiag, self._params = {}, {}
             for key, mask in zip(self._keys, self._masks):
                 pnames = [psr.name, name, key]
@@ -57,9 +59,19 @@ def WhiteNoise(varianceFunction, selection=Selection(selections.no_selection), n
 
         @signal_base.cache_call("ndiag_params")
         def get_ndiag(self, params):
-            ret = 0
-            for key, mask in zip(self._keys, self._masks):
-                ret += self._ndiag[key](params=params) * mask
+            ret = np.zeros(self._ntoas)
+            for key, idx in zip(self._keys, self._indices):
+                # parameter Functions evaluate only the selected TOAs, but custom
+                # variance functions may still return values for all the TOAs
+                ndiag = self._ndiag[key]
+                if isinstance(ndiag, parameter.FunctionBase):
+                    val = ndiag(params=params, mask=idx)
+                else:
+                    val = ndiag(params=params)
+
+                if np.ndim(val) and len(val) == self._ntoas:
+                    val = val[idx]
+                ret[idx] += val
             return signal_base.ndarray_alt(ret)
 
     return WhiteNoise
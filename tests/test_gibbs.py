@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_gibbs
+----------------------------------
+
+Tests for the blocked Gibbs sampler.
+"""
+
+import unittest
+
+import numpy as np
+import scipy.stats
+
+from enterprise.pulsar import Pulsar
+from enterprise.signals import gibbs, gp_priors, gp_signals, parameter, signal_base, utils, white_signals
+from tests.enterprise_test_data import datadir
+
+
+class TestGibbs(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Setup the Pulsar objects."""
+
+        cls.psrs = [
+            Pulsar(datadir + "/B1855+09_NANOGrav_9yv1.t2.feather"),
+            Pulsar(datadir + "/J1909-3744_NANOGrav_9yv1.t2.feather"),
+        ]
+
+    def test_truncated_invgamma(self):
+        """Check truncated inverse-gamma draws against scipy quantiles."""
+
+        alpha, beta, lo, hi = 5, 2.0, 0.1, 1.0
+        tau = gibbs.truncated_invgamma(np.full(100000, alpha), beta, lo, hi)
+
+        dist = scipy.stats.invgamma(alpha, scale=beta)
+        clo, chi = dist.cdf(lo), dist.cdf(hi)
+        expected = dist.ppf(clo + np.array([0.25, 0.5, 0.75]) * (chi - clo))
+
+        assert np.all((tau >= lo) & (tau <= hi))
+        assert np.allclose(np.quantile(tau, [0.25, 0.5, 0.75]), expected, rtol=1e-2)
+
+    def test_free_spectrum_gibbs(self):
+        """Run the sampler on a common free-spectrum process."""
+
+        ef = white_signals.MeasurementNoise(efac=parameter.Uniform(0.5, 1.5))
+        tm = gp_signals.TimingModel()
+        pl = utils.powerlaw(log10_A=parameter.Uniform(-18, -12), gamma=parameter.Uniform(1, 7))
+        rn = gp_signals.FourierBasisGP(pl, components=10, combine=False)
+        fs = gp_priors.free_spectrum(log10_rho=parameter.Uniform(-10, -4, size=10))
+        crn = gp_signals.FourierBasisCommonGP(fs, utils.hd_orf(), components=10, combine=False, name="gw")
+
+        pta = signal_base.PTA([(tm + ef + rn + crn)(psr) for psr in self.psrs])
+        sampler = gibbs.BlockedGibbs(pta, nmetropolis=5)
+
+        assert list(sampler._rho) == ["gw_log10_rho"]
+        assert len(sampler._blocks["noise"]) == 2 and len(sampler._blocks["hyper"]) == 4
+
+        chain, bchain = sampler.sample(niter=20, save_coefficients=True)
+        assert chain.shape == (20, len(pta.param_names))
+        assert bchain.shape[0] == 20
+
+        # every draw lies within the prior, and the free spectrum is updated at every step
+        assert np.all(np.isfinite([pta.get_lnprior(x) for x in chain]))
+        rho = chain[:, sampler._idx["gw_log10_rho"]]
+        assert np.all(np.diff(rho, axis=0) != 0)
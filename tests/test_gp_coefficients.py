@@ -274,6 +274,35 @@ class TestGPCoefficients(unittest.TestCase):
         msg = "Marginal and hierarchical likelihoods should be different."
         assert l1 != l2, msg
 
+    def test_get_coefficients_common(self):
+        ef = white_signals.MeasurementNoise(efac=parameter.Uniform(0.1, 5.0))
+        tm = gp_signals.TimingModel()
+        pl = utils.powerlaw(log10_A=parameter.Uniform(-18, -12), gamma=parameter.Uniform(1, 7))
+        crn = gp_signals.FourierBasisCommonGP(spectrum=pl, orf=utils.hd_orf(), components=10, combine=False)
+
+        model = ef + tm + crn
+        pta = signal_base.PTA([model(self.psr), model(self.psr2)])
+
+        p0 = {"B1855+09_efac": 1.1, "B1937+21_efac": 0.9, "common_fourier_gamma": 4.33, "common_fourier_log10_A": -14.5}
+
+        TNr = np.concatenate(pta.get_TNr(p0))
+        Sigma = sps.block_diag(pta.get_TNT(p0), "csc") + sps.csc_matrix(pta.get_phiinv(p0, logdet=False))
+        mn = cholesky(Sigma)(TNr)
+
+        par = "B1937+21_common_fourier_coefficients"
+        for common_sparse in [True, False]:
+            # means from factor solves agree with the reference
+            psc = utils.get_coefficients(pta, p0, variance=False, common_sparse=common_sparse)
+            sigs = [sig for sig in pta.pulsarmodels[0]._signals if sig.signal_type in ["basis", "common basis"]]
+            coeffs = np.concatenate([psc[sig.name + "_coefficients"] for sig in sigs])
+            msg = "get_coefficients mean does not match (common_sparse={})".format(common_sparse)
+            assert np.allclose(coeffs, mn[: len(coeffs)], atol=1e-4, rtol=1e-4), msg
+
+            # several draws are made at once
+            pscs = utils.get_coefficients(pta, p0, n=5, common_sparse=common_sparse)
+            assert len(pscs) == 5 and all(len(ps[par]) == 20 for ps in pscs)
+            assert not np.allclose(pscs[0][par], pscs[1][par])
+
     def test_conditional_gp(self):
         ef = white_signals.MeasurementNoise(efac=parameter.Uniform(0.1, 5.0))
         tm = gp_signals.TimingModel()
@@ -378,6 +407,44 @@ class TestGPCoefficients(unittest.TestCase):
         for c_name, v in cmean.items():
             assert np.allclose(mn[idx[c_name]], v)
 
+    def test_conditional_gp_batch_marginalizing(self):
+        ef = white_signals.MeasurementNoise(efac=parameter.Uniform(0.1, 5.0))
+        pl = utils.powerlaw(log10_A=parameter.Uniform(-18, -12), gamma=parameter.Uniform(1, 7))
+        rn = gp_signals.FourierBasisGP(spectrum=pl, components=10, combine=False)
+
+        p0 = {"B1855+09_efac": 1.2, "B1855+09_red_noise_gamma": 4.0, "B1855+09_red_noise_log10_A": -14.0}
+
+        model = ef + gp_signals.TimingModel() + rn
+        c = utils.ConditionalGP(signal_base.PTA([model(self.psr)]))
+
+        modelm = ef + gp_signals.MarginalizingTimingModel() + rn
+        cm = utils.ConditionalGP(signal_base.PTA([modelm(self.psr)]))
+
+        # marginalized timing models yield the same conditional means
+        p1, p2 = c.get_mean_processes(p0), cm.get_mean_processes(p0)
+        msg = "Conditional GP time series does not match for marginalized timing model"
+        assert np.allclose(p1["B1855+09_red_noise"], p2["B1855+09_red_noise"], atol=1e-4, rtol=1e-4), msg
+        assert np.allclose(
+            p1["B1855+09_linear_timing_model"],
+            p2["B1855+09_marginalizing_linear_timing_model"],
+            atol=1e-4,
+            rtol=1e-4,
+        ), msg
+
+        # batched draws come back as (n, ...) arrays
+        ntoas, nmodes = len(self.psr.toas), 20
+        bc = cm.sample_coefficients(p0, n=50, batch=True)
+        assert bc["B1855+09_red_noise_coefficients"].shape == (50, nmodes)
+        assert bc["B1855+09_marginalizing_linear_timing_model_coefficients"].shape == (50, self.psr.Mmat.shape[1])
+
+        bp = cm.sample_processes(p0, n=50, batch=True)
+        assert bp["B1855+09_red_noise"].shape == (50, ntoas)
+
+        # and the mean of many draws matches the conditional mean
+        bp = cm.sample_processes(p0, n=1000, batch=True)
+        msg = "Mean of batched conditional GP processes does not match"
+        assert np.allclose(np.mean(bp["B1855+09_red_noise"], axis=0), p2["B1855+09_red_noise"], atol=1e-4), msg
+
 
 @pytest.mark.skipif(not PINT_INSTALLED, reason="Skipping tests that require PINT because it isn't installed")
 class TestGPCoefficientsPint(TestGPCoefficients):
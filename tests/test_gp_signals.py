@@ -13,9 +13,10 @@ import pytest
 
 import numpy as np
 import scipy.linalg as sl
+import scipy.sparse as sps
 
 from enterprise.pulsar import Pulsar
-from enterprise.signals import gp_signals, parameter, selections, signal_base, utils, white_signals
+from enterprise.signals import gp_bases, gp_signals, parameter, selections, signal_base, utils, white_signals
 from enterprise.signals.selections import Selection
 from tests.enterprise_test_data import datadir
 from tests.enterprise_test_data import LIBSTEMPO_INSTALLED, PINT_INSTALLED
@@ -359,6 +360,7 @@ class TestGPSignals(unittest.TestCase):
 
         msg = "F matrix incorrect for GP Fourier backend signal."
         assert np.allclose(F, rnm.get_basis(params)), msg
+        assert isinstance(rnm.get_basis(params), gp_bases.BlockBasis), msg
 
         # spectrum test
         msg = "Spectrum incorrect for GP Fourier backend signal."
@@ -397,9 +399,9 @@ class TestGPSignals(unittest.TestCase):
         B1, _ = utils.create_fft_time_basis(self.psr.toas, nknots=31, Tspan=Tspan, start_time=start_time)
 
         msg = "B matrix incorrect for GP FFT signal."
-        assert np.allclose(B, rnm0.get_basis(params)), msg
-        assert np.allclose(B1, rnm1.get_basis(params)), msg
-        assert np.allclose(np.sum(B, axis=1), np.ones(B.shape[0])), msg
+        assert np.allclose(B.toarray(), rnm0.get_basis(params).toarray()), msg
+        assert np.allclose(B1.toarray(), rnm1.get_basis(params).toarray()), msg
+        assert np.allclose(np.sum(B.toarray(), axis=1), np.ones(B.shape[0])), msg
 
         # spectrum test
         tau = np.abs(tc[:, None] - tc[None, :])
@@ -447,6 +449,83 @@ class TestGPSignals(unittest.TestCase):
         assert np.allclose(phi_1, phi_2), msg
         assert np.allclose(0.5 * phi_1, phi_12), msg
 
+    def test_fft_sparse_basis(self):
+        """Test that sparse FFT bases are carried through the white-noise solves."""
+        pl = utils.powerlaw(log10_A=parameter.Uniform(-18, -12), gamma=parameter.Uniform(1, 7))
+        ef = white_signals.MeasurementNoise(efac=parameter.Uniform(0.5, 1.5))
+        ec = white_signals.EcorrKernelNoise(log10_ecorr=parameter.Uniform(-10, -5))
+        rn = gp_signals.FFTBasisGP(pl, nknots=31)
+        dm = gp_signals.FFTBasisGP(pl, basis=utils.create_fft_time_basis_dm(nknots=31), name="dm_gp")
+        tm = gp_signals.TimingModel()
+
+        params = parameter.sample((ef + ec + rn + dm)(self.psr).params)
+        res = self.psr.residuals
+
+        # with a dense timing model, the combined basis is dense
+        for model, sparse in [(ef + rn + dm, True), (ef + ec + rn + dm, True), (tm + ef + rn + dm, False)]:
+            m = model(self.psr)
+
+            T = m.get_basis(params)
+            Td = T.toarray() if sparse else T
+
+            msg = "Sparse basis not preserved for FFT GPs."
+            assert sps.issparse(T) == sparse, msg
+
+            Nvec = m.get_ndiag(params)
+            msg = "Sparse TNT/TNr incorrect."
+            assert np.allclose(m.get_TNT(params), Nvec.solve(Td, left_array=Td)), msg
+            assert np.allclose(m.get_TNr(params), Nvec.solve(res, left_array=Td)), msg
+
+    def test_scaled_basis(self):
+        """Test that DM and chromatic bases stay lazy and give the same TNT/TNr."""
+        pl = utils.powerlaw(log10_A=parameter.Uniform(-18, -12), gamma=parameter.Uniform(1, 7))
+        ef = white_signals.MeasurementNoise(efac=parameter.Uniform(0.5, 1.5))
+        rn = gp_signals.FourierBasisGP(pl, components=20)
+        dm = gp_signals.BasisGP(pl, utils.createfourierdesignmatrix_dm(nmodes=20), name="dm_gp")
+        chrom = gp_signals.BasisGP(
+            pl, utils.createfourierdesignmatrix_chromatic(nmodes=20), selection=Selection(selections.by_backend)
+        )
+        fft = gp_signals.FFTBasisGP(pl, basis=utils.create_fft_time_basis_chromatic(nknots=21), name="fft_gp")
+
+        params = parameter.sample((ef + rn + dm + chrom + fft)(self.psr).params)
+        res = self.psr.residuals
+
+        for tm in [gp_signals.TimingModel(), gp_signals.MarginalizingTimingModel()]:
+            m = (tm + ef + rn + dm + chrom + fft)(self.psr)
+
+            msg = "DM and chromatic bases should be lazily scaled."
+            assert all(isinstance(m[sig].get_basis(params), gp_bases.ScaledBasis) for sig in ["dm_gp", "fft_gp"]), msg
+            F, _ = gp_bases._createfourierdesignmatrix_red(self.psr.toas, nmodes=20)
+            assert m["dm_gp"].get_basis(params).base is F, msg
+
+            T = np.asarray(m.get_basis(params))
+            Nvec = m.get_ndiag(params)
+
+            msg = "Blockwise TNT/TNr incorrect."
+            assert np.allclose(m.get_TNT(params), Nvec.solve(T, left_array=T)), msg
+            assert np.allclose(m.get_TNr(params), Nvec.solve(res, left_array=T)), msg
+
+        # called directly, the basis functions return the scaled matrices
+        toas, freqs, flags = self.psr.toas, self.psr.freqs, self.psr.flags
+        F, _ = gp_bases.createfourierdesignmatrix_red(toas, nmodes=20)
+        B, _ = gp_bases.create_fft_time_basis(toas, nknots=21)
+
+        msg = "DM and chromatic basis functions should return plain matrices."
+        for Fmat, scale in [
+            (gp_bases.createfourierdesignmatrix_dm(toas, freqs, nmodes=20)[0], (1400 / freqs) ** 2),
+            (gp_bases.createfourierdesignmatrix_chromatic(toas, freqs, nmodes=20)[0], (1400 / freqs) ** 4),
+            (gp_bases.createfourierdesignmatrix_general(toas, freqs, flags, idx=3, nmodes=20)[0], (1400 / freqs) ** 3),
+        ]:
+            assert type(Fmat) is np.ndarray, msg
+            assert np.allclose(Fmat, np.asarray(F) * scale[:, None]), msg
+
+        for Bmat, scale in [
+            (gp_bases.create_fft_time_basis_dm(toas, freqs, nknots=21)[0], (1400 / freqs) ** 2),
+            (gp_bases.create_fft_time_basis_chromatic(toas, freqs, nknots=21)[0], (1400 / freqs) ** 4),
+        ]:
+            assert sps.isspmatrix_csr(Bmat), msg
+            assert np.allclose(Bmat.toarray(), B.toarray() * scale[:, None]), msg
+
     def test_red_noise_add(self):
         """Test that red noise addition only returns independent columns."""
         # set up signals
@@ -878,3 +957,140 @@ class TestGPSignalsMarginalizingNmat:
         result2 = manual_calc(Nmat, Mmat, left_array, right)
         msg = f"Failed for 2D right and 2D left_array. Expected: {result2}, Got: {result1}"
         assert np.allclose(result1, result2, atol=1e-8), msg
+
+    def test_factor_cache(self):
+        Nmat = signal_base.ndarray_alt(np.array([0.2, 0.1, 0.3]))
+        Mmat = np.array([[0.3, 0.2], [-0.1, 0.3], [0.1, 0.5]])
+        res = np.array([1.0, 3.0, 2.0])
+
+        MNM = Mmat.T @ Nmat.solve(Mmat)
+
+        # small timing models use a dense factorization
+        model = gp_signals.MarginalizingNmat(Mmat) + Nmat
+        assert isinstance(model.cf, gp_signals.DenseCholeskyFactor)
+        assert np.allclose(model.cf.logdet(), np.linalg.slogdet(MNM)[1])
+
+        # large ones use CHOLMOD, with the same results
+        sparse = gp_signals.MarginalizingNmat(Mmat) + Nmat
+        sparse.sparse_threshold = 0
+        assert not isinstance(sparse.cf, gp_signals.DenseCholeskyFactor)
+        assert np.allclose(sparse.cf.logdet(), model.cf.logdet())
+        assert np.allclose(sparse.solve(res, left_array=res), model.solve(res, left_array=res))
+
+        # the factorization is reused for the same white noise, and the cache stays bounded
+        base = gp_signals.MarginalizingNmat(Mmat)
+        first = base + Nmat
+        assert first.cf is first.cf
+        for scale in range(1, 10):
+            (base + signal_base.ndarray_alt(scale * np.array([0.2, 0.1, 0.3]))).cf
+        assert len(base._cache) == base._cache.limit
+
+        # so are the products with the residuals, which are matched by identity
+        MNr = first.MNr(res)
+        assert first.MNr(res) is MNr
+        assert np.allclose(MNr, Mmat.T @ Nmat.solve(res))
+        for _ in range(10):
+            assert first.MNr(res.copy()) is not MNr
+        assert len(first._products["MNr"]) == first._products["MNr"].limit
+
+    def test_grouped_solve(self):
+        toas = np.sort(np.random.uniform(0, 3e8, 500))
+        freqs = np.random.choice([430.0, 820.0, 1400.0, 2100.0], 500)
+        Nmat = signal_base.ndarray_alt(np.random.uniform(0.5, 2.0, 500))
+        Mmat = np.vstack([np.ones(500), toas / 3e8]).T
+        res = np.random.randn(500)
+
+        F, _ = gp_bases.createfourierdesignmatrix_red(toas, nmodes=10)
+        marg = gp_signals.MarginalizingNmat(Mmat) + Nmat
+
+        # the grouped products kick in once the chromatic index changes
+        for idx in [4.0, 3.0, 2.5]:
+            C, _ = gp_bases.createfourierdesignmatrix_chromatic(toas, freqs, nmodes=10, idx=idx, lazy=True)
+            assert C.groups is not None and C.groups.max() == 3
+            Cd = np.asarray(C)
+
+            assert np.allclose(Nmat.solve(C, left_array=C), Cd.T @ (Cd / Nmat[:, None]))
+            assert np.allclose(Nmat.solve(C, left_array=F), F.T @ (Cd / Nmat[:, None]))
+            assert np.allclose(Nmat.solve(res, left_array=C), Cd.T @ (res / Nmat))
+            assert np.allclose(marg.solve(C, left_array=C), marg.solve(Cd, left_array=Cd))
+
+        assert all(entry[3] is not None for entry in Nmat._grams.values())
+
+    def test_fourier_solve(self):
+        toas = np.sort(np.random.uniform(0, 3e8, 2000))
+        freqs = np.random.uniform(400.0, 2000.0, 2000)
+        Nmat = signal_base.ndarray_alt(np.random.uniform(0.5, 2.0, 2000))
+
+        # red noise and a common process with the same Tspan, a chromatic process
+        F1, _ = gp_bases.createfourierdesignmatrix_red(toas, nmodes=60)
+        F2, _ = gp_bases.createfourierdesignmatrix_red(toas, nmodes=45, Tspan=toas.max() - toas.min())
+        C, _ = gp_bases.createfourierdesignmatrix_chromatic(toas, freqs, nmodes=50, lazy=True)
+        assert isinstance(F1, gp_bases.FourierBasis) and F1.linear
+
+        for L, R in [(F1, F1), (F1, F2), (F2, F1), (C, C), (F1, C)]:
+            Ld, Rd = np.asarray(L), np.asarray(R)
+            expected = Ld.T @ (Rd / Nmat[:, None])
+            assert np.allclose(Nmat.solve(R, left_array=L), expected, rtol=1e-10, atol=1e-10 * np.abs(expected).max())
+
+        assert len(Nmat._trigsums) > 0
+
+        # derived arrays lose the frequencies, and are solved directly
+        assert not F1[:, :80].linear and not (2 * F1).__class__ is gp_bases.FourierBasis
+        F3, _ = gp_bases.createfourierdesignmatrix_red(toas, nmodes=60, pshift=True)
+        assert not F3.linear and F1.gram(F3, 1.0 / Nmat) is None
+
+    def test_block_solve(self):
+        toas = np.sort(np.random.uniform(0, 3e8, 400))
+        backends = np.random.choice(["a", "b", "c"], 400)
+        Nmat = signal_base.ndarray_alt(np.random.uniform(0.5, 2.0, 400))
+        Mmat = np.vstack([np.ones(400), toas / 3e8]).T
+        res = np.random.randn(400)
+
+        # disjoint blocks (as by backend), and blocks that overlap them
+        blocks, overlapping = [], []
+        for ct, backend in enumerate(["a", "b", "c"]):
+            rows = np.flatnonzero(backends == backend)
+            F, _ = gp_bases.createfourierdesignmatrix_red(toas[rows], nmodes=5)
+            blocks.append((rows, slice(10 * ct, 10 * ct + 10), F))
+            overlapping.append((rows[::2], slice(4 * ct, 4 * ct + 4), np.random.randn(len(rows[::2]), 4)))
+        B1 = gp_bases.BlockBasis((400, 30), blocks)
+        B2 = gp_bases.BlockBasis((400, 12), overlapping + [(np.arange(0, 400, 3), slice(0, 12), np.ones((134, 12)))])
+        assert B1.disjoint and not B2.disjoint
+
+        marg = gp_signals.MarginalizingNmat(Mmat) + Nmat
+        S1 = gp_bases.ScaledBasis(B1, toas)
+        for L, R in [(B1, B1), (B2, B2), (B1, B2), (B1, Mmat), (Mmat, B2), (B1, res), (S1, B1)]:
+            Ld, Rd = np.asarray(L), np.asarray(R)
+            expected = Ld.T @ (Rd / (Nmat[:, None] if Rd.ndim == 2 else Nmat))
+            assert np.allclose(Nmat.solve(R, left_array=L), expected)
+            if R is not res:
+                assert np.allclose(marg.solve(R, left_array=L), marg.solve(Rd, left_array=Ld))
+
+        c = np.random.randn(30)
+        assert np.allclose(B1.dot(c), np.asarray(B1) @ c)
+
+    def test_projected_nmat(self):
+        Nmat = signal_base.ndarray_alt(np.array([0.2, 0.1, 0.3, 0.4, 0.25]))
+        Mmat = np.array([[1.0, 0.2], [1.0, 0.3], [1.0, 0.5], [1.0, -0.1], [1.0, 0.7]])
+        T = np.array([[1.0, 2.0], [3.0, 4.0], [2.0, 2.0], [0.5, -1.0], [-1.0, 1.5]])
+        res = np.array([1.0, 3.0, 2.0, -1.0, 0.5])
+
+        marg = gp_signals.MarginalizingNmat(Mmat) + Nmat
+        proj = gp_signals.ProjectedNmat(Mmat) + Nmat
+        assert isinstance(proj, gp_signals.ProjectedNmat)
+
+        rNr1, logdet1 = marg.solve(res, left_array=res, logdet=True)
+        rNr2, logdet2 = proj.solve(res, left_array=res, logdet=True)
+        assert np.allclose(rNr1, rNr2)
+        assert np.allclose(logdet1, logdet2)
+
+        assert np.allclose(marg.solve(res, left_array=T), proj.solve(res, left_array=T))
+        assert np.allclose(marg.solve(T, left_array=T), proj.solve(T, left_array=T))
+
+        # the projected basis has no component along the timing model
+        assert np.allclose(proj.solve(Mmat, left_array=T), 0.0)
+
+        # correlated white noise is not supported
+        with pytest.raises(TypeError):
+            ecorr = signal_base.ShermanMorrison(np.array([0.1]), [slice(0, 2)])
+            (gp_signals.ProjectedNmat(Mmat) + (ecorr + Nmat)).solve(res, left_array=res)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_lazy
+----------------------------------
+
+Tests for `lazy` module, and for the import time of enterprise.
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+from enterprise.lazy import LazyModule, lazy_import
+from tests.enterprise_test_data import datadir, testdir
+
+# optional or heavy dependencies that should only be imported on first use
+HEAVY = ["libstempo", "pint", "astropy", "ephem", "pyarrow", "healpy", "pkg_resources"]
+
+# required dependencies, imported before the code under test: the packages
+# they import themselves (e.g., scipy.optimize may import sksparse) are not counted
+REQUIRED = ["numpy", "scipy.constants", "scipy.integrate", "scipy.interpolate", "scipy.linalg"]
+REQUIRED += ["scipy.sparse", "scipy.special", "scipy.stats", "six"]
+
+
+def imported_modules(code):
+    """Run `code` in a fresh interpreter, and return which of the `HEAVY`
+    packages it imported, beyond those imported by the `REQUIRED` packages."""
+
+    check = "import sys\nimport {}\nbefore = set(sys.modules)\n".format(", ".join(REQUIRED))
+    check += code + "\nprint(' '.join(m for m in {} if m in sys.modules and m not in before))".format(HEAVY)
+    ret = subprocess.run(
+        [sys.executable, "-c", check], cwd=os.path.dirname(testdir), capture_output=True, text=True, check=True
+    )
+    return ret.stdout.splitlines()[-1].split()
+
+
+class TestLazy(unittest.TestCase):
+    def test_lazy_module(self):
+        """Check that a lazy module is imported on first attribute access"""
+
+        mod = LazyModule("json")
+        assert mod._module is None
+        assert mod.dumps([1]) == "[1]"
+        assert mod._module is sys.modules["json"]
+
+        assert lazy_import("not_an_installed_package") is None
+        assert isinstance(lazy_import("json"), LazyModule)
+
+    def test_import_enterprise(self):
+        """Check that importing enterprise does not import heavy dependencies"""
+
+        code = "\n".join(
+            [
+                "import enterprise.pulsar",
+                "from enterprise.signals import signal_base, parameter, selections, utils",
+                "from enterprise.signals import white_signals, gp_signals, deterministic_signals",
+                "from enterprise.signals import anis_coefficients",
+            ]
+        )
+        assert imported_modules(code) == []
+
+    def test_import_feather(self):
+        """Check that reading a feather file only imports pyarrow"""
+
+        code = "from enterprise.pulsar import Pulsar\npsr = Pulsar('{}')\npsr.toas, psr.flags".format(
+            os.path.join(datadir, "B1855+09_NANOGrav_9yv1.t2.feather")
+        )
+        assert imported_modules(code) == ["pyarrow"]
@@ -365,6 +365,30 @@ class TestLikelihood(unittest.TestCase):
         msg = "Likelihood mismatch between sparse Cholesky full & inplace"
         assert np.allclose(l1, l2), msg
 
+    def test_projected_timing_model(self):
+        """Compare projected and marginalizing timing models."""
+
+        # find the maximum time span to set GW frequency sampling
+        tmin = [p.toas.min() for p in self.psrs]
+        tmax = [p.toas.max() for p in self.psrs]
+        Tspan = np.max(tmax) - np.min(tmin)
+
+        ef = white_signals.MeasurementNoise(efac=parameter.Constant(1.1))
+        pl = utils.powerlaw(log10_A=parameter.Uniform(-18, -12), gamma=parameter.Uniform(1, 7))
+        rn = gp_signals.FourierBasisGP(pl, components=20)
+        crn = gp_signals.FourierBasisCommonGP(pl, utils.hd_orf(), components=10, name="GW", Tspan=Tspan)
+
+        m1 = gp_signals.MarginalizingTimingModel() + ef + rn + crn
+        m2 = gp_signals.ProjectedTimingModel() + ef + rn + crn
+
+        pta1 = signal_base.PTA([m1(p) for p in self.psrs])
+        pta2 = signal_base.PTA([m2(p) for p in self.psrs])
+
+        for _ in range(3):
+            params = parameter.sample(pta1.params)
+            msg = "Likelihood mismatch between projected and marginalizing timing models"
+            assert np.allclose(pta1.get_lnlikelihood(params), pta2.get_lnlikelihood(params)), msg
+
 
 @pytest.mark.skipif(not PINT_INSTALLED, reason="Skipping tests that require PINT because it isn't installed")
 class TestLikelihoodPint(TestLikelihood):
@@ -13,7 +13,7 @@ import unittest
 import numpy as np
 import scipy.stats
 
-from enterprise.signals.parameter import Parameter, UserParameter, Function
+from enterprise.signals.parameter import Parameter, UserParameter, Function, Constant, PriorBundle, sample
 from enterprise.signals.parameter import UniformPrior, UniformSampler, Uniform, UniformPPF
 from enterprise.signals.parameter import NormalPrior, NormalSampler, Normal, NormalPPF
 from enterprise.signals.parameter import TruncNormalPrior, TruncNormalSampler, TruncNormal
@@ -317,3 +317,122 @@ class TestParameter(unittest.TestCase):
         paramA = TruncNormal(mu, sigma, pmin, pmax)("A")
         xs = np.array([-3.5, 3.5])
         assert np.all(paramA.get_pdf(xs, mu=mu.sample()) == zeros), msg4
+
+    def test_prior_bundle(self):
+        """Test vectorized log-prior and PPF against the per-parameter methods."""
+
+        mu = Uniform(-1, 1)("mean")
+        cov = np.array([[2.0, 0.5], [0.5, 1.0]])
+        params = [
+            Uniform(0.5, 1.5)("efac"),
+            Uniform(np.array([-10, -9, -8]), -4, size=3)("rho"),
+            Normal(0.5, 2)("norm"),
+            Normal(np.zeros(2), cov, size=2)("mvnorm"),
+            TruncNormal(0.1, 2, -2, 3)("trunc"),
+            TruncNormal(2, 0.5, 3.5, 6)("tail"),
+            LinearExp(-18, -12)("amp"),
+            TruncNormal(mu, 2, -3, 3)("hyper"),
+            mu,
+        ]
+
+        bundle = PriorBundle(params)
+        assert bundle.ndim == 12
+        assert [par.name for par, _ in bundle._other] == ["hyper"]
+
+        msg = "Vectorized log-priors do not match"
+        xs = np.array([bundle.tovector(sample(params)) for _ in range(10)])
+        xs[0, 0] = 2.0
+        for x, lnp in zip(xs, bundle.get_logpdf(xs)):
+            p = bundle.map_params(x)
+            assert np.allclose(lnp, np.sum([par.get_logpdf(params=p) for par in params]), rtol=1e-12), msg
+        assert bundle.get_logpdf(xs[1]) == bundle.get_logpdf(xs)[1], msg
+        assert bundle.get_logpdf(xs[0]) == -np.inf, msg
+
+        msg = "Vectorized PPFs do not match"
+        us = np.random.uniform(size=(10, 10))
+        x = PriorBundle(params[:7]).get_ppf(us)
+        assert np.allclose(x[:, 0], UniformPPF(us[:, 0], 0.5, 1.5)), msg
+        assert np.allclose(x[:, 1:4], UniformPPF(us[:, 1:4], np.array([-10, -9, -8]), -4)), msg
+        assert np.allclose(x[:, 4], NormalPPF(us[:, 4], 0.5, 2)), msg
+        assert np.allclose(x[:, 5:7], np.dot(scipy.stats.norm.ppf(us[:, 5:7]), np.linalg.cholesky(cov).T)), msg
+        assert np.allclose(x[:, 7], scipy.stats.truncnorm.ppf(us[:, 7], -1.05, 1.45, 0.1, 2)), msg
+        assert np.allclose(x[:, 8], scipy.stats.truncnorm.ppf(us[:, 8], 3, 8, 2, 0.5)), msg
+        assert np.allclose(x[:, 9], LinearExpPPF(us[:, 9], -18, -12)), msg
+
+    def test_prior_bundle_sample(self):
+        """Test vectorized prior draws, with hyperparameters."""
+
+        def sampler(pmin, pmax, size=None):
+            return 0.5
+
+        mu = Uniform(-1, 1)("mean")
+        params = [
+            Uniform(0.5, 1.5)("efac"),
+            Normal(np.zeros(2), np.array([[2.0, 0.5], [0.5, 1.0]]), size=2)("mvnorm"),
+            TruncNormal(0.1, 2, -2, 3)("trunc"),
+            Normal(mu, 0.1)("hyper"),
+            TruncNormal(mu, 2, -3, 3)("hypertrunc"),
+            UserParameter(prior=Function(UniformPrior, pmin=0, pmax=1), sampler=sampler)("user"),
+            mu,
+        ]
+
+        bundle = PriorBundle(params)
+        assert [par.name for par, _ in bundle._sampling_order] == ["hyper", "hypertrunc", "user"]
+
+        msg = "Prior draws have the wrong shape or lie outside the prior"
+        xs = bundle.sample(1000)
+        assert xs.shape == (1000, 8) and bundle.sample().shape == (8,), msg
+        assert np.all(np.isfinite(bundle.get_logpdf(xs))), msg
+        assert np.all(xs[:, 6] == 0.5), msg
+
+        msg = "Prior draws do not follow the hyperparameters"
+        assert np.allclose(xs[:, 4], xs[:, 7], atol=0.5), msg
+        assert np.all((xs[:, 5] > -3) & (xs[:, 5] < 3)), msg
+        assert np.std(xs[:, 4] - xs[:, 7]) < 0.2, msg
+
+    def test_function_plan(self):
+        """Test that compiled Function calls resolve arguments as the full dispatch."""
+
+        class Psr(object):
+            toas = np.arange(4.0)
+            freqs = np.array([1400.0, 1400.0, 700.0, 700.0])
+
+        def delay(toas, freqs, log10_A=-7, fr=1, scale=1):
+            return scale * 10**log10_A * np.sin(fr * toas) * (1400 / freqs) ** 2
+
+        amp = Uniform(-9, -5)("amp")
+        f = Function(delay, log10_A=amp, fr=Function(lambda x: x, x=2)("c"), scale=3)("d", psr=Psr())
+        assert f._compile(0, ["params"], Ellipsis) is None
+
+        fr = Constant(2)("fr")
+        f = Function(delay, log10_A=amp, fr=fr, scale=3)("d", psr=Psr())
+
+        msg = "Compiled Function call does not match direct call"
+        mask = Psr.freqs > 1000
+        assert np.allclose(f(params={"amp": -6}), delay(Psr.toas, Psr.freqs, -6, 2, 3)), msg
+        assert np.allclose(f(params={}), delay(Psr.toas, Psr.freqs, -7, 2, 3)), msg
+        assert np.allclose(f(params={"amp": -6}, mask=mask), delay(Psr.toas[:2], Psr.freqs[:2], -6, 2, 3)), msg
+        assert np.allclose(f(params={"amp": -6}, scale=1), delay(Psr.toas, Psr.freqs, -6, 2, 1)), msg
+        assert len(f._plans) == 3 and all(plan is not None for _, _, plan in f._plans.values()), msg
+
+        fr.value = 1
+        f.add_kwarg(scale=2)
+        assert not f._plans
+        assert np.allclose(f(params={"amp": -6}), delay(Psr.toas, Psr.freqs, -6, 1, 2)), msg
+
+        # a parameter shadowing a pulsar attribute must be resolved at every call
+        f = Function(delay, freqs=Uniform(100, 3000))("d", psr=Psr())
+        assert np.allclose(f(params={"d_freqs": 700}), delay(Psr.toas, 700)), msg
+        assert np.allclose(f(params={}), delay(Psr.toas, Psr.freqs)), msg
+        assert f._plans[(0, "params")][2] is None, msg
+
+        # pulsar attributes are read at every call, and plans are recompiled when the pulsar changes
+        psr = Psr()
+        f = Function(delay, log10_A=amp)("d", psr=psr)
+        assert np.allclose(f(params={"amp": -6}), delay(Psr.toas, Psr.freqs, -6)), msg
+        psr.toas = np.arange(4.0) + 1
+        assert np.allclose(f(params={"amp": -6}), delay(psr.toas, Psr.freqs, -6)), msg
+        assert np.allclose(f(params={"amp": -6}, mask=mask), delay(psr.toas[:2], Psr.freqs[:2], -6)), msg
+        psr._version = 1
+        assert np.allclose(f(params={"amp": -6}, mask=mask), delay(psr.toas[:2], Psr.freqs[:2], -6)), msg
+        assert f._plans[(0, "params", "mask")][1] == 1, msg
@@ -10,14 +10,16 @@ Tests for common signal and PTA class modules.
 
 
 # import os
-# import pickle
 import itertools
+import pickle
+import sys
 import unittest
 import pytest
 
 import numpy as np
 
 from enterprise.pulsar import Pulsar
+from enterprise.pulsar_inflate import PulsarInflater, memmap
 from enterprise.signals import gp_signals, parameter, signal_base, utils, white_signals
 
 from .enterprise_test_data import datadir
@@ -330,6 +332,46 @@ class TestPTASignals(unittest.TestCase):
         assert pta["B1855+09"].items() == list(zip(pta["B1855+09"].keys(), pta["B1855+09"].values())), msg
         assert pta["B1855+09"]["red_noise"] == pta.pulsarmodels[0].signals[0], msg
 
+    @pytest.mark.skipif(sys.version_info < (3, 8), reason="Requires Python >= 3.8")
+    def test_deflate_inflate(self):
+        """Test moving the combined basis of a pulsar model to shared memory"""
+
+        # models are made of dynamically created classes, which pickle cannot serialize
+        cloudpickle = pytest.importorskip("cloudpickle")
+
+        pl = utils.powerlaw(log10_A=parameter.Uniform(-18, -12), gamma=parameter.Uniform(1, 7))
+        ef = white_signals.MeasurementNoise(efac=parameter.Uniform(0.5, 1.5))
+        rn = gp_signals.FourierBasisGP(spectrum=pl, components=20)
+        dm = gp_signals.BasisGP(pl, utils.createfourierdesignmatrix_dm(nmodes=20), name="dm_gp")
+        model = gp_signals.TimingModel() + ef + rn + dm
+
+        m = model(self.psrs[0])
+        params = parameter.sample(m.params)
+        basis = np.asarray(model(self.psrs[0]).get_basis(params))
+
+        m.deflate()
+        assert isinstance(m.__dict__["_Fmat"], PulsarInflater)
+
+        pkl = cloudpickle.dumps(m)
+
+        pkl_m1, pkl_m2 = pickle.loads(pkl), pickle.loads(pkl)
+        pkl_m1.inflate()
+        pkl_m2.inflate()
+
+        msg = "Combined basis is not backed by shared memory"
+        assert all(isinstance(pm._Fmat, memmap) for pm in [pkl_m1, pkl_m2]), msg
+        assert pkl_m1._Fmat.shm.name == pkl_m2._Fmat.shm.name == m.__dict__["_Fmat"].shmname, msg
+
+        msg = "Basis changed by deflating the model"
+        assert np.array_equal(np.asarray(pkl_m1.get_basis(params)), basis), msg
+
+        del pkl_m1, pkl_m2
+
+        m.destroy()
+
+        with self.assertRaises(FileNotFoundError):
+            pickle.loads(pkl).inflate()
+
 
 @pytest.mark.skipif(not PINT_INSTALLED, reason="Skipping tests that require PINT because it isn't installed")
 class TestPTASignalsPint(TestPTASignals):
@@ -9,16 +9,18 @@ Tests for `pulsar` module. Will eventually want to add tests
 for time slicing, PINT integration and pickling.
 """
 
+import copy
 import sys
 import os
 import shutil
+import tempfile
 import unittest
 import pickle
 import pytest
 
 import numpy as np
 
-from enterprise.pulsar import Pulsar
+from enterprise.pulsar import Pulsar, load_pulsars, open_dataset, pulsar_hash, save_dataset
 from tests.enterprise_test_data import datadir
 from tests.enterprise_test_data import LIBSTEMPO_INSTALLED, PINT_INSTALLED
 
@@ -193,6 +195,46 @@ class TestPulsar(unittest.TestCase):
 
         os.remove("B1855+09.pkl")
 
+    def test_presort(self):
+        """Test storing the arrays in time order"""
+
+        psr = Pulsar(datadir + "/B1855+09_NANOGrav_9yv1.gls.par", datadir + "/B1855+09_NANOGrav_9yv1.tim", presort=True)
+
+        for attr in ["toas", "stoas", "residuals", "toaerrs", "freqs", "Mmat", "planetssb", "pos_t", "backend_flags"]:
+            assert np.array_equal(getattr(psr, attr), getattr(self.psr, attr))
+        assert all(np.array_equal(psr.flags[flag], self.psr.flags[flag]) for flag in self.psr.flags)
+        assert np.array_equal(psr.iisort, self.psr.iisort)
+
+        # properties are read-only views of the stored arrays
+        assert not psr.Mmat.flags.writeable
+        assert np.shares_memory(psr.Mmat, psr._designmatrix)
+
+        # filtering with a mask in the original order matches the default storage
+        psr_sorted = copy.deepcopy(self.psr)
+        mask = np.arange(len(psr.toas)) % 3 > 0
+        psr.filter_data(mask=mask, start_time=53500)
+        psr_sorted.filter_data(mask=mask, start_time=53500)
+
+        for attr in ["toas", "residuals", "Mmat", "isort", "iisort"]:
+            assert np.array_equal(getattr(psr, attr), getattr(psr_sorted, attr))
+
+    def test_planets_storage(self):
+        """Test deferred, single-precision and epoch-averaged ephemerides"""
+
+        parfile, timfile = datadir + "/B1855+09_NANOGrav_9yv1.gls.par", datadir + "/B1855+09_NANOGrav_9yv1.tim"
+
+        psr = Pulsar(parfile, timfile, planets="lazy", drop_t2pulsar=False)
+        assert psr._planetssb is None
+        assert np.allclose(psr.planetssb, self.psr.planetssb)
+        assert np.allclose(psr.sunssb, self.psr.sunssb)
+
+        psr = Pulsar(parfile, timfile, planets_dtype=np.float32, planets_dt=1.0)
+        assert psr.planetssb.dtype == np.float32 and psr.planetssb.shape == self.psr.planetssb.shape
+        assert len(psr._planetssb) < len(psr.toas)
+        assert np.allclose(psr.planetssb, self.psr.planetssb, atol=1e-3)
+
+        assert Pulsar(parfile, timfile, planets=False).planetssb is None
+
     def test_wrong_input(self):
         """Test exception when incorrect par(tim) file given."""
 
@@ -208,6 +250,19 @@ class TestPulsar(unittest.TestCase):
         with self.assertRaises(ValueError):
             Pulsar(datadir + "/B1855+09_NANOGrav_9yv1.gls.par", datadir + "/B1855+09_NANOGrav_9yv1.time")
 
+    def test_load_pulsars(self):
+        """Test loading pulsars in parallel, and from cache"""
+
+        pairs = [(datadir + "/B1855+09_NANOGrav_9yv1.gls.par", datadir + "/B1855+09_NANOGrav_9yv1.tim")] * 2
+
+        with tempfile.TemporaryDirectory() as cachedir:
+            psrs = load_pulsars(pairs, workers=2, cachedir=cachedir)
+            assert len(os.listdir(cachedir)) == 1
+            assert np.allclose(psrs[1].residuals, self.psr.residuals, rtol=1e-10)
+
+            psrs = load_pulsars(pairs[:1], cachedir=cachedir)
+            assert np.allclose(psrs[0].Mmat, self.psr.Mmat)
+
     def test_to_feather(self):
         """Test creating feather file from Pulsar method"""
 
@@ -217,9 +272,126 @@ class TestPulsar(unittest.TestCase):
         loaded_psr = Pulsar("test.feather")
         assert np.allclose(self.psr.residuals, loaded_psr.residuals, rtol=1e-10)
 
+        # matrices are memory-mapped views in the compact format, and copies in the legacy format
+        assert not loaded_psr.Mmat.flags.writeable
+        self.psr.to_feather("test.feather", version=1)
+        legacy_psr = Pulsar("test.feather")
+        for attr in ["Mmat", "sunssb", "pos_t", "planetssb"]:
+            assert np.array_equal(getattr(loaded_psr, attr), getattr(legacy_psr, attr))
+            assert np.allclose(getattr(self.psr, attr), getattr(loaded_psr, attr))
+
         os.remove("test.feather")
 
 
+class TestPulsarHash(unittest.TestCase):
+    def test_pulsar_hash(self):
+        """Test that the pulsar cache key follows file contents, INCLUDEs and options"""
+
+        with tempfile.TemporaryDirectory() as path:
+            parfile, timfile, incfile = [os.path.join(path, name) for name in ["psr.par", "psr.tim", "more.tim"]]
+            for filename, content in [(parfile, "PSR J0000+0000\n"), (timfile, "FORMAT 1\nINCLUDE more.tim\n")]:
+                with open(filename, "w") as f:
+                    f.write(content)
+            with open(incfile, "w") as f:
+                f.write("toa 1400 55000.0 1.0 ao\n")
+
+            h = pulsar_hash(parfile, timfile, ephem="DE440")
+            assert h == pulsar_hash(parfile, timfile, ephem="DE440")
+            assert h != pulsar_hash(parfile, timfile, ephem="DE430")
+            assert h != pulsar_hash(parfile, timfile, ephem="DE440", timing_package="other")
+
+            with open(incfile, "a") as f:
+                f.write("toa 1400 55001.0 1.0 ao\n")
+            assert h != pulsar_hash(parfile, timfile, ephem="DE440")
+
+
+class TestPulsarDataset(unittest.TestCase):
+    def test_dataset(self):
+        """Test saving and lazily opening a multi-pulsar dataset"""
+
+        psr = Pulsar(datadir + "/B1855+09_NANOGrav_9yv1.t2.feather")
+        noisedict = {"B1855+09_efac": 1.1, "J1909-3744_efac": 0.9}
+
+        with tempfile.TemporaryDirectory() as path:
+            save_dataset([psr], path, noisedict=noisedict)
+            dataset = open_dataset(path)
+
+            assert list(dataset) == ["B1855+09"] and len(dataset) == 1
+            assert dataset.ntoas == {"B1855+09": len(psr.toas)}
+            assert dataset.noisedict == {"B1855+09_efac": 1.1}
+
+            # arrays are only read when first accessed
+            loaded_psr = dataset["B1855+09"]
+            assert loaded_psr is dataset.pulsars()[0]
+            assert "Mmat" not in loaded_psr.__dict__ and "flags" not in loaded_psr.__dict__
+
+            assert np.array_equal(loaded_psr.Mmat, psr.Mmat)
+            assert np.array_equal(loaded_psr.planetssb, psr.planetssb)
+            assert np.array_equal(loaded_psr.residuals, psr.residuals)
+            assert all(np.array_equal(loaded_psr.flags[flag], psr.flags[flag]) for flag in psr.flags)
+            assert "Mmat" in loaded_psr.__dict__
+
+            with self.assertRaises(AttributeError):
+                loaded_psr.foo
+
+            with self.assertRaises(KeyError):
+                dataset["J1909-3744"]
+
+    def test_optional_planets(self):
+        """Test feather files without ephemerides, and reading them on first access"""
+
+        psr = Pulsar(datadir + "/B1855+09_NANOGrav_9yv1.t2.feather")
+
+        with tempfile.TemporaryDirectory() as path:
+            save_dataset([psr], path, planets=False)
+            loaded_psr = open_dataset(path, lazy=False)["B1855+09"]
+            assert loaded_psr.planetssb is None and loaded_psr.sunssb is None
+            assert np.array_equal(loaded_psr.Mmat, psr.Mmat)
+
+            filename = os.path.join(path, "B1855+09.feather")
+            psr.save_feather(filename)
+
+            lazy_psr = Pulsar(filename, planets="lazy")
+            assert "planetssb" not in lazy_psr.__dict__ and "Mmat" in lazy_psr.__dict__
+            assert np.array_equal(lazy_psr.planetssb, psr.planetssb)
+
+            # pickling reads the remaining columns
+            pkl_psr = pickle.loads(pickle.dumps(Pulsar(filename, planets="lazy")))
+            assert np.array_equal(pkl_psr.sunssb, psr.sunssb)
+
+            assert Pulsar(filename, planets=False).planetssb is None
+
+    @pytest.mark.skipif(sys.version_info < (3, 8), reason="Requires Python >= 3.8")
+    def test_deflate_inflate(self):
+        """Test moving lazily loaded feather arrays to shared memory"""
+
+        psr = Pulsar(datadir + "/B1855+09_NANOGrav_9yv1.t2.feather")
+
+        with tempfile.TemporaryDirectory() as path:
+            save_dataset([psr], path)
+            lazy_psr = open_dataset(path)["B1855+09"]
+
+            lazy_psr.deflate()
+            assert "_table" not in lazy_psr.__dict__
+
+            pkl = pickle.dumps(lazy_psr)
+
+        pkl_psr = pickle.loads(pkl)
+        pkl_psr.inflate()
+
+        assert np.array_equal(pkl_psr.Mmat, psr.Mmat)
+        assert np.array_equal(pkl_psr.toas, psr.toas)
+        assert np.array_equal(pkl_psr.planetssb, psr.planetssb)
+        assert all(np.array_equal(pkl_psr.flags[flag], psr.flags[flag]) for flag in psr.flags)
+
+        del pkl_psr
+
+        lazy_psr.destroy()
+
+        with self.assertRaises(FileNotFoundError):
+            pickle.loads(pkl).inflate()
+
+
 @pytest.mark.skipif(not PINT_INSTALLED, reason="Skipping tests that require PINT because it isn't installed")
 class TestPulsarPint(TestPulsar):
     @classmethod
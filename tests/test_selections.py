@@ -44,6 +44,85 @@ class TestSelections(unittest.TestCase):
             msg = "Selection mask not independent for {}".format(sel)
             assert np.all(sum(mask for mask in s.masks.values()) == 1), msg
 
+    def test_flag_codes(self):
+        """Check that the encoded flags match the flag values"""
+
+        for codes, names, values in [
+            (self.psr.backend_codes, self.psr.backend_names, self.psr.backend_flags),
+            (self.psr.flag_codes["fe"], self.psr.flag_names["fe"], self.psr.flags["fe"]),
+        ]:
+            assert np.array_equal(np.array(names)[codes], values)
+
+        s = selections.Selection(selections.by_backend)(self.psr)
+        assert sorted(s.masks) == sorted(np.unique(self.psr.backend_flags))
+        assert all(np.array_equal(mask, self.psr.backend_flags == key) for key, mask in s.masks.items())
+
+        masks = selections.Selection(selections.custom_backends_dict({"fe": None, "backend": None}))(self.psr).masks
+        fe = selections.Selection(selections.by_frontend)(self.psr).masks
+        assert masks.keys() == {**fe, **s.masks}.keys()
+        assert all(np.array_equal(masks[key], mask) for key, mask in {**fe, **s.masks}.items())
+
+    def test_flag_values(self):
+        """Check that the selection functions still accept flag values"""
+
+        flags, backend_flags, toas = self.psr.flags, self.psr.backend_flags, self.psr.toas
+        for sel, masks in [
+            (selections.by_backend, selections.by_backend(backend_flags)),
+            (selections.nanograv_backends, selections.nanograv_backends(backend_flags)),
+            (selections.by_frontend, selections.by_frontend(flags)),
+            (selections.custom_backends(["ASP", "PUPPI"]), selections.custom_backends(["ASP", "PUPPI"])(backend_flags)),
+            (
+                selections.custom_backends_dict({"fe": "L-wide", "backend": None}),
+                selections.custom_backends_dict({"fe": "L-wide", "backend": None})(backend_flags, flags, toas),
+            ),
+        ]:
+            s = selections.Selection(sel)(self.psr)
+            msg = "Selection from flag values differs for {}".format(sel.__name__)
+            assert list(s.masks) == list(masks), msg
+            assert all(np.array_equal(s.masks[key], mask) for key, mask in masks.items()), msg
+
+        # user selections (and pulsars) without integer codes use the flag values
+        def user_backends(backend_flags):
+            return {"": backend_flags != ""}
+
+        s = selections.Selection(user_backends)(self.psr)
+        assert np.all(s.masks[""])
+
+        class FlagPulsar(object):
+            def __init__(self, psr):
+                self.toas, self.backend_flags = psr.toas, psr.backend_flags
+
+        s = selections.Selection(selections.by_backend)(FlagPulsar(self.psr))
+        assert all(np.array_equal(mask, backend_flags == key) for key, mask in s.masks.items())
+
+    def test_groups(self):
+        """Check integer group IDs against the selection masks"""
+
+        s = selections.Selection(selections.by_backend)(self.psr)
+        names, ids = s.groups
+
+        assert names == list(s.masks)
+        assert all(np.array_equal(ids == ii, s.masks[name]) for ii, name in enumerate(names))
+        assert np.all(ids >= 0)
+
+    def test_indices(self):
+        """Check cached masks, and their index and slice forms"""
+
+        s1 = selections.Selection(selections.by_backend)(self.psr)
+        s2 = selections.Selection(selections.by_backend)(self.psr)
+
+        assert s1.masks is s2.masks
+        assert all(not mask.flags.writeable for mask in s1.masks.values())
+
+        toas = np.arange(len(self.psr.toas))
+        for key, mask in s1.masks.items():
+            assert np.array_equal(toas[s1.indices[key]], np.flatnonzero(mask))
+
+        # time segments of sorted TOAs are contiguous
+        s = selections.Selection(selections.cut_half)(self.psr)
+        assert all(isinstance(idx, slice) for idx in s.indices.values())
+        assert s.indices["t1"].stop == s.indices["t2"].start
+
 
 @pytest.mark.skipif(not PINT_INSTALLED, reason="Skipping tests that require PINT because it isn't installed")
 class TestSelectionsPint(TestSelections):
@@ -13,6 +13,8 @@ import unittest
 import pytest
 
 import numpy as np
+import scipy.sparse as sps
+from scipy.interpolate import interp1d
 
 import enterprise.constants as const
 from enterprise.pulsar import Pulsar
@@ -57,12 +59,60 @@ class TestUtils(unittest.TestCase):
         msg = "Fourier design matrix shape incorrect"
         assert self.F.shape == (4005, 2 * nf), msg
 
+    def test_createfourierdesignmatrix_recurrence(self, nf=30):
+        """Check the recurrence-based Fourier design matrix against direct evaluation."""
+
+        toas = self.psr.toas
+        f = np.arange(1, nf + 1) / (toas.max() - toas.min())
+
+        F = np.zeros((len(toas), 2 * nf))
+        F[:, ::2] = np.sin(2 * np.pi * toas[:, None] * f[None, :])
+        F[:, 1::2] = np.cos(2 * np.pi * toas[:, None] * f[None, :])
+
+        msg = "Fourier design matrix values incorrect"
+        assert np.allclose(self.F, F, atol=1e-10), msg
+
+        # the same with random phases
+        F1, _ = utils.createfourierdesignmatrix_red(toas, nmodes=nf, pseed=10)
+        F2, _ = utils.createfourierdesignmatrix_red(toas, nmodes=nf, pseed=10)
+        phase = np.arctan2(F1[:, 0], F1[:, 1]) - 2 * np.pi * toas * f[0]
+        assert np.allclose(F1, F2) and np.allclose(np.sin(phase), np.sin(phase[0]), atol=1e-8), msg
+
+        # bases are cached but returned as independent copies
+        F3, _ = utils.createfourierdesignmatrix_red(toas, nmodes=nf)
+        F3[:] = 0.0
+        assert np.allclose(utils.createfourierdesignmatrix_red(toas, nmodes=nf)[0], F, atol=1e-10), msg
+
+        msg = "DM-variation Fourier design matrix values incorrect"
+        assert np.allclose(self.Fdm, F * (1400 / self.psr.freqs[:, None]) ** 2, atol=1e-10), msg
+
     def test_create_fft_time_basis(self, nk=30):
         """Check FFT interpolation design matrix shape."""
 
         msg = "FFT interpolation design matrix shape incorrect"
         assert self.B.shape == (4005, nk), msg
 
+    def test_create_fft_time_basis_sparse(self, nk=30):
+        """Check the sparse linear interpolation bases against interp1d."""
+
+        toas = self.psr.toas
+        tc = np.linspace(toas.min(), toas.max(), nk)
+        B = interp1d(tc, np.identity(nk), kind=1)(toas).T
+
+        msg = "FFT interpolation design matrix values incorrect"
+        assert sps.isspmatrix_csr(self.B) and self.B.nnz <= 2 * len(toas), msg
+        assert np.allclose(self.B.toarray(), B), msg
+        assert np.allclose(self.Bdm.toarray(), B * (1400 / self.psr.freqs[:, None]) ** 2), msg
+
+        # linear interpolation basis, without the empty columns
+        U, nodes = utils.linear_interp_basis(toas, dt=30 * 86400)
+        x = np.arange(toas.min(), toas.max() + 30 * 86400, 30 * 86400)
+        B = interp1d(x, np.identity(len(x)), kind=1, bounds_error=False, fill_value=0)(toas).T
+
+        msg = "Linear interpolation basis incorrect"
+        idx = B.sum(axis=0) != 0
+        assert sps.issparse(U) and np.allclose(U.toarray(), B[:, idx]) and np.allclose(nodes, x[idx]), msg
+
     def test_createfourierdesignmatrix_dm(self, nf=30):
         """Check DM-variation Fourier design matrix shape."""
 
@@ -194,6 +244,29 @@ class TestUtils(unittest.TestCase):
         assert np.allclose(utils.powerlaw(f, log10_A, gamma), pl), msg
         assert np.allclose(utils.turnover(f, log10_A, gamma, lf0, kappa, beta), pt), msg
 
+    def test_toeplitz_inv(self):
+        """Test the structured inversion of FFT GP priors."""
+        tc = np.linspace(0, 3e8, 301)
+        freqs = utils.knots_to_freqs(tc, oversample=3)
+        psd = np.concatenate([[0.0], utils.powerlaw(freqs[1:], log10_A=-14, gamma=2.0, components=1)])
+
+        cov = utils.psd2cov(tc, psd)
+        assert utils.psd2cov(tc, psd.copy()) is cov
+
+        inv, ld = utils.toeplitz_inv(cov[:, 0])
+        assert np.allclose(inv, np.linalg.inv(cov), rtol=1e-8, atol=1e-8 * np.abs(inv).max())
+        assert np.isclose(ld, np.linalg.slogdet(cov)[1])
+        assert utils.toeplitz_inv(np.array([1.0, 2.0])) is None
+
+        # a timing-model diagonal plus a Toeplitz block, inverted blockwise
+        phi = utils.KernelMatrix(305)
+        phi = phi.add(1e40 * np.ones(4), slice(0, 4))
+        phi = phi.add(cov, np.arange(4, 305))
+
+        phiinv, logdet = phi.inv(logdet=True)
+        assert np.allclose(phiinv[4:, 4:], inv) and np.allclose(np.diag(phiinv)[:4], 1e-40)
+        assert np.allclose(phiinv[:4, 4:], 0.0) and np.isclose(logdet, ld + 4 * np.log(1e40))
+
     @pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Test doesn't work in Github Actions due to limited memory.")
     def test_orf(self):
         """Test ORF functions."""
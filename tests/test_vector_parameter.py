@@ -105,6 +105,14 @@ class TestVectorParameter(unittest.TestCase):
         params = {"B1855+09_red_noise_log10_rho": x0[1:], "B1855+09_efac": x0[0]}
         assert np.allclose(pta.get_hypercube_transform(x0), np.array([1.25, -17.5, -15.0, -12.5])), msg
 
+        # test prior draws
+        msg = "Prior draws incorrect"
+        xs = pta.sample_prior(100)
+        assert xs.shape == (100, 4), msg
+        assert np.all((xs[:, 0] >= 0.5) & (xs[:, 0] <= 2)), msg
+        assert np.all((xs[:, 1:] >= -20) & (xs[:, 1:] <= -10)), msg
+        assert np.allclose(pta.get_lnprior(xs), np.log(prior)), msg
+
         # test PTA level parameter names
         pnames = [
             "B1855+09_efac",
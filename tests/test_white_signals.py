@@ -115,6 +115,39 @@ class TestWhiteSignals(unittest.TestCase):
         msg = "EFAC covariance incorrect."
         assert np.all(efm.get_ndiag(params) == nvec0), msg
 
+    def test_custom_ndiag_backend(self):
+        """Test custom variance functions that return values for all TOAs."""
+
+        @parameter.function
+        def psr_ndiag(psr, efac=1.0):
+            return efac**2 * psr.toaerrs**2
+
+        class FixedNdiag(object):
+            _params = {}
+
+            def __init__(self, pname, psr):
+                self.toaerrs = psr.toaerrs
+
+            def __call__(self, params):
+                return self.toaerrs**2
+
+        selection = Selection(selections.by_backend)
+        efm = white_signals.WhiteNoise(psr_ndiag(efac=parameter.Uniform(0.1, 5)), selection=selection)(self.psr)
+        fxm = white_signals.WhiteNoise(FixedNdiag, selection=selection)(self.psr)
+
+        backends = np.unique(self.psr.backend_flags)
+        efacs = 1.3 + 0.1 * np.arange(len(backends))
+        params = {"B1855+09_{}_efac".format(backend): efac for backend, efac in zip(backends, efacs)}
+
+        nvec0 = np.zeros_like(self.psr.toas)
+        for backend, efac in zip(backends, efacs):
+            ind = self.psr.backend_flags == backend
+            nvec0[ind] = efac**2 * self.psr.toaerrs[ind] ** 2
+
+        msg = "Custom covariance incorrect."
+        assert np.allclose(efm.get_ndiag(params), nvec0), msg
+        assert np.allclose(fxm.get_ndiag({}), self.psr.toaerrs**2), msg
+
     def test_equad(self):
         """Test that the deprecated EquadNoise is not available."""
 